@@ -1,16 +1,36 @@
 """
 Flask Backend API for Meeting Summarizer
 """
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context, g
 from flask_cors import CORS
+from werkzeug.http import parse_options_header
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import get_input_stream
 import os
 import json
+import hmac
 from datetime import datetime
+import threading
+import time
 import traceback
 
 from config import Config
-from services import TranscriptionService, SummarizationService
+from services import (
+    TranscriptionService, SummarizationService, AudioDecoder,
+    AsyncLLMClient, GeminiTransport, HTTPTransport, LlamaCppTransport, ExtractiveSummarizer,
+    SUMMARY_BACKENDS, JobQueue, QueueFullError, ModelRegistry,
+    ResultCache, hash_file, hash_text, make_key, PROMPT_VERSION,
+    ResumableUploadManager, UploadError, spool_multipart, EventBroker, format_sse,
+    MeetingIndex, SearchIndex, StreamingTranscriber, MeetingStore, create_storage,
+    AudioManifest, Diarizer, format_segments, new_ulid, is_meeting_id, is_legacy_meeting_id, MetricsRegistry, resident_memory_bytes, estimate_tokens,
+    Profiler, ProfileStore
+)
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:  # live transcription is optional
+    Sock = None
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -18,26 +38,274 @@ Config.init_app(app)
 
 # Enable CORS for frontend
 CORS(app, resources={r"/api/*": {"origins": "*"}})
+# WebSocket support for live transcription, when flask-sock is installed
+sock = Sock(app) if Sock is not None else None
 
 # Initialize services (lazy loading)
-transcription_service = None
-summarization_service = None
+# Summarizers by backend name, created on first use
+summarization_services = {}
+_summarization_lock = threading.Lock()
+job_queue = None
+_job_queue_lock = threading.Lock()
+result_cache = ResultCache(app.config['CACHE_FOLDER'], max_bytes=app.config['CACHE_MAX_BYTES'])
+# Progress events for GET /api/meetings/<id>/events
+event_broker = EventBroker()
+# Decodes uploads once, ahead of the transcription workers
+audio_decoder = AudioDecoder(app.config['DECODED_FOLDER'], workers=app.config['DECODE_WORKERS'],
+                             max_bytes=app.config['DECODED_MAX_BYTES'])
+
+# Shared by every model size; runs next to Whisper on its own threads
+diarizer = Diarizer(
+    max_speakers=app.config['DIARIZATION_MAX_SPEAKERS'],
+    vad_options={
+        'threshold_db': app.config['VAD_THRESHOLD_DB'],
+        'min_silence_seconds': app.config['VAD_MIN_SILENCE_SECONDS'],
+        'padding_seconds': app.config['VAD_PADDING_SECONDS']
+    },
+    workers=app.config['DIARIZATION_WORKERS']
+) if app.config['DIARIZATION_ENABLED'] else None
+# Uploaded audio and meeting data, on local disk or in a shared S3 bucket
+_s3_options = {
+    'bucket': app.config['S3_BUCKET'],
+    'prefix': app.config['S3_PREFIX'],
+    'endpoint_url': app.config['S3_ENDPOINT_URL'],
+    'region': app.config['S3_REGION']
+}
+audio_storage = create_storage(app.config['STORAGE_BACKEND'], app.config['UPLOAD_FOLDER'],
+                               _s3_options, area='uploads/')
+data_storage = create_storage(app.config['STORAGE_BACKEND'], app.config['DATA_FOLDER'],
+                              _s3_options, area='data/')
+# Where each meeting's audio is, with its size, hash and format
+audio_manifest = AudioManifest(audio_storage)
+# Chunks of resumable uploads are kept with the audio, so any node can resume them
+upload_manager = ResumableUploadManager(audio_storage, app.config['UPLOAD_FOLDER'],
+                                        app.config['MAX_UPLOAD_BYTES'])
+# Meeting documents with columnar segment files
+meeting_store = MeetingStore(data_storage, compress=app.config['COMPRESS_SEGMENTS'])
+# Profiles of individual requests and job stages, kept next to the meetings
+profile_store = ProfileStore(data_storage, keep=app.config['PROFILE_KEEP'])
+# Profiles of requests that don't belong to a meeting are filed under this name
+REQUEST_PROFILES = 'requests'
+
+# Metrics for GET /api/metrics; values other components keep are copied in
+# at scrape time by _collect_metrics
+metrics = MetricsRegistry(prefix='unthink_')
+http_seconds = metrics.histogram('http_request_duration_seconds', 'API request latency',
+                                 ['method', 'route', 'status'])
+stage_seconds = metrics.histogram('stage_duration_seconds',
+                                  'Wall time of each pipeline stage (upload, decode, vad, '
+                                  'transcribe, diarize, summarize)', ['stage'])
+upload_bytes = metrics.counter('upload_bytes_total', 'Audio bytes received')
+upload_rate = metrics.histogram('upload_throughput_bytes_per_second', 'Receive rate of whole-file uploads',
+                                buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8, 1e9))
+transcription_rtf = metrics.histogram('transcription_real_time_factor',
+                                      'Transcription wall time divided by audio duration', ['model'],
+                                      buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1, 1.5, 2, 5))
+llm_seconds = metrics.histogram('llm_request_duration_seconds', 'Latency of one model call', ['backend'])
+llm_tokens = metrics.counter('llm_tokens_total', 'Estimated prompt and completion tokens',
+                             ['backend', 'kind'])
+storage_seconds = metrics.histogram('storage_operation_duration_seconds',
+                                    'Latency of meeting and audio storage operations', ['operation'])
+jobs_finished = metrics.counter('jobs_finished_total', 'Finished jobs', ['kind', 'status'])
+job_wait_seconds = metrics.histogram('job_queue_wait_seconds', 'Time a job waited for its first worker',
+                                     ['kind'])
+queue_depth = metrics.gauge('job_queue_depth', 'Jobs waiting per worker pool', ['pool'])
+cache_lookups = metrics.counter('cache_lookups_total', 'Result cache lookups', ['result'])
+cache_bytes = metrics.gauge('cache_bytes', 'Size of the result cache')
+model_memory = metrics.gauge('model_memory_bytes', 'Weights of each loaded Whisper model', ['model'])
+process_memory = metrics.gauge('process_resident_memory_bytes', 'Resident memory of the API process')
+llm_in_flight = metrics.gauge('llm_in_flight', 'Model calls in flight', ['backend'])
+llm_events = metrics.counter('llm_events_total', 'Model call retries, timeouts, failures and '
+                             'coalesced duplicates', ['backend', 'event'])
+
+
+def _engine_options(engine: str) -> dict:
+    """Configured options for a transcription engine"""
+    if engine == 'faster-whisper':
+        return {
+            'compute_type': app.config['TRANSCRIPTION_COMPUTE_TYPE'],
+            'beam_size': app.config['TRANSCRIPTION_BEAM_SIZE'],
+            'cpu_threads': app.config['TRANSCRIPTION_THREADS'],
+            # Let each worker thread run a transcription at once
+            'workers': app.config['TRANSCRIBE_WORKERS']
+        }
+    return {'cpu_threads': app.config['TRANSCRIPTION_THREADS']}
+
+
+def _create_transcription_service(model_size: str):
+    """Build a transcription service for one model size"""
+    return TranscriptionService(
+        model_size=model_size,
+        chunk_processes=app.config['TRANSCRIBE_PROCESSES'],
+        chunk_seconds=app.config['CHUNK_SECONDS'],
+        chunk_overlap_seconds=app.config['CHUNK_OVERLAP_SECONDS'],
+        long_audio_threshold=app.config['LONG_AUDIO_THRESHOLD_SECONDS'],
+        decoder=audio_decoder,
+        vad=app.config['VAD_ENABLED'],
+        vad_options={
+            'threshold_db': app.config['VAD_THRESHOLD_DB'],
+            'min_silence_seconds': app.config['VAD_MIN_SILENCE_SECONDS'],
+            'padding_seconds': app.config['VAD_PADDING_SECONDS']
+        },
+        diarizer=diarizer,
+        engine=app.config['TRANSCRIPTION_ENGINE'],
+        engine_options=_engine_options(app.config['TRANSCRIPTION_ENGINE'])
+    )
+
+
+# Whisper models are loaded once per size and shared by all threads
+model_registry = ModelRegistry(_create_transcription_service, app.config['ALLOWED_MODEL_SIZES'])
+if app.config['PRELOAD_MODELS']:
+    model_registry.preload(app.config['PRELOAD_MODELS'],
+                           background=app.config['PRELOAD_IN_BACKGROUND'])
 
 
-def get_transcription_service():
-    """Lazy load transcription service"""
-    global transcription_service
-    if transcription_service is None:
-        transcription_service = TranscriptionService(model_size="base")
-    return transcription_service
+def get_transcription_service(model_size: str = None):
+    """Get the shared transcription service for a model size"""
+    return model_registry.get(model_size or app.config['WHISPER_MODEL'])
 
 
-def get_summarization_service():
-    """Lazy load summarization service"""
-    global summarization_service
-    if summarization_service is None:
-        summarization_service = SummarizationService()
-    return summarization_service
+# Live sessions get models of their own, loaded on first use, so a live pass
+# never waits for the inference lock of a batch job on the same model size
+live_model_registry = ModelRegistry(_create_transcription_service, app.config['ALLOWED_MODEL_SIZES'])
+
+
+def get_live_transcription_service(model_size: str = None):
+    """Get the transcription service live sessions share for a model size"""
+    return live_model_registry.get(model_size or app.config['LIVE_MODEL'])
+
+
+def _create_llm_client(transport, backend: str, max_concurrency: int = None):
+    """Wrap a transport in a client with the configured limits"""
+    def on_call(seconds, prompt, response):
+        llm_seconds.observe(seconds, backend=backend)
+        llm_tokens.inc(estimate_tokens(prompt), backend=backend, kind='prompt')
+        llm_tokens.inc(estimate_tokens(response), backend=backend, kind='completion')
+    
+    return AsyncLLMClient(
+        transport,
+        max_concurrency=max_concurrency or app.config['LLM_MAX_CONCURRENCY'],
+        rate_per_second=app.config['LLM_RATE_PER_SECOND'],
+        burst=app.config['LLM_BURST'],
+        max_retries=app.config['LLM_MAX_RETRIES'],
+        timeout=app.config['LLM_TIMEOUT_SECONDS'],
+        on_call=on_call
+    )
+
+
+def _create_summarizer(backend: str):
+    """Build the summarizer for one backend"""
+    if backend == 'extractive':
+        return ExtractiveSummarizer()
+
+    window_tokens = app.config['SUMMARY_WINDOW_TOKENS']
+    max_concurrency = None
+    if backend == 'http':
+        if not app.config['LLM_ENDPOINT']:
+            raise ValueError("LLM_ENDPOINT is required for the http summary backend")
+        transport = HTTPTransport(app.config['LLM_ENDPOINT'],
+                                  pool_size=app.config['LLM_MAX_CONCURRENCY'],
+                                  model_name=app.config['LLM_MODEL_NAME'],
+                                  timeout=app.config['LLM_TIMEOUT_SECONDS'])
+    elif backend == 'llama':
+        if not app.config['LLAMA_MODEL_PATH']:
+            raise ValueError("LLAMA_MODEL_PATH is required for the llama summary backend")
+        transport = LlamaCppTransport(app.config['LLAMA_MODEL_PATH'],
+                                      n_ctx=app.config['LLAMA_CONTEXT_TOKENS'],
+                                      n_threads=app.config['LLAMA_THREADS'])
+        # One prompt at a time on the CPU; smaller windows fit its context
+        window_tokens = app.config['LLAMA_WINDOW_TOKENS']
+        max_concurrency = 1
+    else:
+        if not app.config['GOOGLE_API_KEY']:
+            raise ValueError("Google API key is required. Set GOOGLE_API_KEY in .env file")
+        transport = GeminiTransport(app.config['GOOGLE_API_KEY'])
+
+    return SummarizationService(
+        window_tokens=window_tokens,
+        map_workers=app.config['SUMMARY_MAP_WORKERS'],
+        client=_create_llm_client(transport, backend, max_concurrency),
+        name=backend,
+        structured=app.config['SUMMARY_STRUCTURED_OUTPUT']
+    )
+
+
+def get_summarization_service(backend: str = None):
+    """
+    Lazy load the summarizer for a backend (default: SUMMARY_BACKEND)
+
+    Raises:
+        ValueError: If the backend is unknown or not configured
+    """
+    backend = backend or app.config['SUMMARY_BACKEND']
+    if backend not in SUMMARY_BACKENDS:
+        raise ValueError(f"Unknown summary backend '{backend}'. "
+                         f"Choose from: {', '.join(SUMMARY_BACKENDS)}")
+    # Locked so concurrent first requests share one client and its limits
+    with _summarization_lock:
+        if backend not in summarization_services:
+            summarization_services[backend] = _create_summarizer(backend)
+    return summarization_services[backend]
+
+
+def _requested_backend(body: dict = None):
+    """
+    Summary backend chosen by ?backend= or a JSON body field
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = request.args.get('backend') or (body or {}).get('backend')
+    if backend and backend not in SUMMARY_BACKENDS:
+        raise ValueError(f"Unknown summary backend '{backend}'. "
+                         f"Choose from: {', '.join(SUMMARY_BACKENDS)}")
+    return backend
+
+
+def _on_job_update(job):
+    """Record metrics for a job and forward its state to the event stream"""
+    if job.status == 'running' and job.stage_index == 0:
+        job_wait_seconds.observe(job.started_at - job.created_at, kind=job.kind)
+    elif job.status in ('done', 'failed'):
+        jobs_finished.inc(kind=job.kind, status=job.status)
+    _publish_job_update(job)
+
+
+def _publish_job_update(job):
+    """Forward job state changes to the meeting's event stream"""
+    if job.status == 'running':
+        event_broker.publish(job.meeting_id, 'stage', {
+            'job_id': job.job_id,
+            'stage': job.stage,
+            'progress': round(job.progress, 3)
+        })
+    elif job.status == 'done':
+        event_broker.publish(job.meeting_id, 'done', job.to_dict())
+    elif job.status == 'failed':
+        event_broker.publish(job.meeting_id, 'error', {'job_id': job.job_id, 'error': job.error})
+
+
+def get_job_queue():
+    """Lazy start the background job queue"""
+    global job_queue
+    with _job_queue_lock:
+        if job_queue is None:
+            job_queue = JobQueue(
+                pools={
+                    'transcribe': app.config['TRANSCRIBE_WORKERS'],
+                    'summarize': app.config['SUMMARIZE_WORKERS']
+                },
+                max_queued=app.config['JOB_QUEUE_SIZE'],
+                # Transcription workers load the Whisper model before taking work
+                worker_init={'transcribe': get_transcription_service},
+                on_update=_on_job_update
+            )
+    return job_queue
+
+
+def new_meeting_id():
+    """Generate a unique, time-sortable meeting ID (ULID) for a new upload"""
+    return new_ulid()
 
 
 def allowed_file(filename):
@@ -47,21 +315,427 @@ def allowed_file(filename):
 
 
 def save_result(meeting_id: str, data: dict):
-    """Save meeting result to JSON file"""
-    filepath = os.path.join(app.config['DATA_FOLDER'], f"{meeting_id}.json")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-
-def load_result(meeting_id: str):
-    """Load meeting result from JSON file"""
-    filepath = os.path.join(app.config['DATA_FOLDER'], f"{meeting_id}.json")
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    """Save meeting result atomically and update the metadata and search indexes"""
+    with storage_seconds.time(operation='meeting_write'):
+        meeting_store.save(meeting_id, data)
+    meeting_index.upsert(meeting_id, data)
+    search_index.index_meeting(meeting_id, data)
+
+
+def load_result(meeting_id: str, fields=None, start: float = None, end: float = None):
+    """Load a meeting result, optionally only some fields or a segment time range"""
+    with storage_seconds.time(operation='meeting_read'):
+        return meeting_store.load(meeting_id, fields=fields, start=start, end=end)
+
+
+# Metadata index for /api/meetings and full-text index for /api/search.
+# Both are local to this node: with local storage they are backfilled once
+# from existing files, with shared storage they follow the bucket (see
+# sync_indexes).
+meeting_index = MeetingIndex(app.config['INDEX_DB_PATH'])
+search_index = SearchIndex(app.config['INDEX_DB_PATH'])
+_index_sync_seen = {}
+
+
+def sync_indexes():
+    """
+    Index meetings that other nodes saved to shared storage
+    
+    Lists the stored meeting documents and re-indexes those modified since
+    the last look. Runs on a background thread (see _sync_indexes_forever),
+    never in a request. Does nothing with local storage, where every save
+    goes through this node.
+    """
+    if data_storage.name == 'local':
+        return
+    for meeting in meeting_store.list():
+        meeting_id = meeting['meeting_id']
+        if _index_sync_seen.get(meeting_id) == meeting['etag']:
+            continue
+        data = load_result(meeting_id)
+        if data:
+            meeting_index.upsert(meeting_id, data)
+            search_index.index_meeting(meeting_id, data)
+        _index_sync_seen[meeting_id] = meeting['etag']
+
+
+def _sync_indexes_forever():
+    """Keep the indexes in step with shared storage, every INDEX_SYNC_SECONDS"""
+    while True:
+        try:
+            sync_indexes()
+        except Exception as e:
+            print(f"Index sync failed: {e}")
+            traceback.print_exc()
+        time.sleep(app.config['INDEX_SYNC_SECONDS'])
+
+
+if data_storage.name == 'local':
+    if meeting_index.count() == 0:
+        meeting_index.rebuild([m['meeting_id'] for m in meeting_store.list()], load_result)
+    if search_index.is_empty():
+        for _meeting in meeting_index.query(limit=-1)[0]:
+            search_index.index_meeting(_meeting['meeting_id'], load_result(_meeting['meeting_id']) or {})
+else:
+    threading.Thread(target=_sync_indexes_forever, daemon=True).start()
+
+
+def _parse_bool(value):
+    """Parse an optional boolean query parameter"""
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _legacy_audio_key(meeting_id: str):
+    """Storage key of audio uploaded before manifests existed, matching the id exactly"""
+    for obj in audio_storage.list(meeting_id):
+        if obj['key'].rsplit('.', 1)[0] == meeting_id:
+            return obj['key']
     return None
 
 
+def find_audio(meeting_id: str, fetch: bool = True):
+    """
+    Look up a meeting's uploaded audio
+    
+    One read of the meeting's audio manifest. Audio uploaded before
+    manifests existed, which only legacy YYYYMMDD_HHMMSS ids can have, is
+    found by a scan for its exact file name and gets a manifest then. Any
+    other id without a manifest is not found, without listing the uploads.
+    
+    Args:
+        meeting_id: Meeting identifier
+        fetch: Add 'path', a local copy of the audio. With shared storage
+               the audio is streamed into UPLOAD_FOLDER first, which then
+               acts as a cache.
+    
+    Returns:
+        The manifest (key, size, sha256, format, ...), or None
+    """
+    if not is_meeting_id(meeting_id):
+        return None
+    manifest = audio_manifest.get(meeting_id)
+    if manifest:
+        key = manifest['key']
+    elif is_legacy_meeting_id(meeting_id):
+        key = _legacy_audio_key(meeting_id)
+    else:
+        key = None
+    if key is None:
+        return None
+    if not fetch:
+        return manifest or {'meeting_id': meeting_id, 'key': key}
+    
+    audio_path = audio_storage.local_path(key) or os.path.join(app.config['UPLOAD_FOLDER'], key)
+    if not os.path.exists(audio_path):
+        try:
+            with storage_seconds.time(operation='audio_fetch'):
+                audio_storage.download(key, audio_path)
+        except FileNotFoundError:
+            return None
+    if manifest is None:
+        manifest = audio_manifest.backfill(meeting_id, key, audio_path)
+    return dict(manifest, path=audio_path)
+
+
+def transcribe_cached(audio_path: str, language: str = None, model_size: str = None,
+                      progress_callback=None, segment_callback=None, audio_hash: str = None) -> dict:
+    """
+    Transcribe audio, reusing the result of an identical earlier upload
+    
+    The cache key is the SHA-256 of the audio bytes plus the model size,
+    language and VAD settings, so retries of the same recording skip
+    Whisper entirely. Pass ``audio_hash`` (from the audio manifest) to
+    skip re-hashing the file. A cached result is returned with
+    ``cached`` set.
+    """
+    service = get_transcription_service(model_size)
+    key_parts = ['transcript', audio_hash or hash_file(audio_path), service.model_size, language or 'auto']
+    if service.vad:
+        key_parts += ['vad', *sorted(service.vad_options.items())]
+    if service.engine.name != 'whisper':
+        key_parts += ['engine', service.engine.name, *sorted(service.engine.options.items())]
+    if service.diarizer is not None:
+        key_parts += ['speakers', *sorted(service.diarizer.options.items())]
+    key = make_key(*key_parts)
+    
+    result = result_cache.get(key)
+    if result is not None:
+        print(f"Transcript cache hit for {audio_path}")
+        if progress_callback:
+            progress_callback(1, 1)
+        if segment_callback and result['segments']:
+            segment_callback(result['segments'])
+        return dict(result, cached=True)
+    
+    result = service.transcribe_audio(audio_path, language=language,
+                                      progress_callback=progress_callback,
+                                      segment_callback=segment_callback)
+    timings = result.get('timings', {})
+    for stage, field in (('decode', 'decode_seconds'), ('vad', 'vad_seconds'),
+                         ('transcribe', 'inference_seconds'), ('diarize', 'diarization_seconds')):
+        if field in timings:
+            stage_seconds.observe(timings[field], stage=stage)
+    if timings.get('audio_seconds'):
+        transcription_rtf.observe(_real_time_factor(timings), model=service.model_name)
+    result_cache.put(key, result)
+    return result
+
+
+def _real_time_factor(timings: dict) -> float:
+    """Processing time per second of audio (below 1 is faster than real time)"""
+    busy = timings.get('decode_seconds', 0) + timings.get('vad_seconds', 0) + timings['inference_seconds']
+    return busy / timings['audio_seconds']
+
+
+def summarize_data(data: dict, progress_callback=None, backend: str = None) -> dict:
+    """
+    Summarize a saved meeting and store the result in ``data``
+    
+    Meetings with segments go through the map-reduce pipeline, reusing
+    window and merge summaries from the previous run so an edited or
+    extended transcript only re-runs what changed; older records without
+    segments fall back to a single prompt over the transcript. Each new
+    summary bumps ``summary_version`` and the one it replaces is kept in
+    ``summary_history``. ``backend`` picks the summarizer (default:
+    SUMMARY_BACKEND); window summaries are only reused from a run of the
+    same backend.
+    """
+    service = get_summarization_service(backend)
+    same_backend = data.get('summary_backend', app.config['SUMMARY_BACKEND']) == service.name
+    if data.get('segments'):
+        content = format_segments(data['segments'], separator='\n')
+    else:
+        content = data['transcript']
+    key = make_key('summary', hash_text(content), PROMPT_VERSION,
+                   service.model_name, service.window_tokens, service.structured)
+    
+    started = time.perf_counter()
+    summary_result = result_cache.get(key)
+    cached = summary_result is not None
+    if cached:
+        print(f"Summary cache hit for {data.get('meeting_id')}")
+    elif data.get('segments'):
+        summary_result = service.summarize_segments(
+            data['segments'],
+            previous_windows=data.get('summary_windows') if same_backend else None,
+            progress_callback=progress_callback,
+            previous_merges=data.get('summary_merges') if same_backend else None
+        )
+        result_cache.put(key, summary_result)
+    else:
+        summary_result = service.summarize_meeting(data['transcript'])
+        result_cache.put(key, summary_result)
+    
+    changed = (data.get('summary'), data.get('key_decisions'), data.get('action_items')) != \
+        (summary_result['summary'], summary_result['key_decisions'], summary_result['action_items'])
+    if 'summary' in data and changed:
+        history = data.setdefault('summary_history', [])
+        history.append({
+            'version': data.get('summary_version', 1),
+            'summary': data['summary'],
+            'key_decisions': data.get('key_decisions', []),
+            'action_items': data.get('action_items', []),
+            'action_item_details': data.get('action_item_details', []),
+            'summary_timestamp': data.get('summary_timestamp')
+        })
+        del history[:-app.config['SUMMARY_HISTORY_LIMIT']]
+        data['summary_version'] = data.get('summary_version', 1) + 1
+    elif 'summary' not in data:
+        data['summary_version'] = 1
+    
+    data.pop('summary_windows', None)
+    data.pop('summary_merges', None)
+    if 'windows' in summary_result:
+        data['summary_windows'] = summary_result['windows']
+    if 'merges' in summary_result:
+        data['summary_merges'] = summary_result['merges']
+    if 'stats' in summary_result:
+        data['summary_stats'] = summary_result['stats']
+    
+    data['summary'] = summary_result['summary']
+    data['key_decisions'] = summary_result['key_decisions']
+    data['action_items'] = summary_result['action_items']
+    data['action_item_details'] = summary_result.get('action_item_details', [])
+    data['summary_timestamp'] = datetime.now().isoformat()
+    data['summary_backend'] = service.name
+    data['summary_latency_seconds'] = round(time.perf_counter() - started, 3)
+    data.setdefault('timings', {}).update({
+        'summarize_seconds': data['summary_latency_seconds'],
+        'summary_cached': cached,
+        'llm_calls': summary_result.get('stats', {}).get('calls', 0) if not cached else 0
+    })
+    if not cached:
+        stage_seconds.observe(data['summary_latency_seconds'], stage='summarize')
+    return summary_result
+
+
+def _transcribe_stage(job):
+    """Job stage: transcribe the meeting audio and save the transcript"""
+    meeting_id = job.meeting_id
+    print(f"Starting transcription for {meeting_id}...")
+    event_broker.publish(meeting_id, 'stage', {'job_id': job.job_id, 'stage': 'decoding'})
+    
+    def on_progress(done, total):
+        job.update_progress(done / total)
+        event_broker.publish(meeting_id, 'progress', {
+            'job_id': job.job_id,
+            'stage': 'transcribing',
+            'chunk': done,
+            'chunks': total,
+            'progress': round(job.progress, 3)
+        })
+    
+    def on_segments(segments):
+        event_broker.publish(meeting_id, 'segments', {'job_id': job.job_id, 'segments': segments})
+    
+    result = transcribe_cached(
+        job.params['audio_path'],
+        model_size=job.params.get('model_size'),
+        progress_callback=on_progress,
+        segment_callback=on_segments,
+        audio_hash=job.params.get('audio_sha256')
+    )
+    
+    timings = dict(result.get('timings', {}), transcript_cached=result.get('cached', False),
+                   queued_seconds=round(job.started_at - job.created_at, 3))
+    if timings.get('audio_seconds') and 'inference_seconds' in timings:
+        timings['real_time_factor'] = round(_real_time_factor(timings), 4)
+    data = {
+        'meeting_id': meeting_id,
+        'timestamp': datetime.now().isoformat(),
+        'transcript': result['transcript'],
+        'segments': result['segments'],
+        'language': result['language'],
+        'timings': timings
+    }
+    if 'speakers' in result:
+        data['speakers'] = result['speakers']
+    save_result(meeting_id, data)
+    
+    job.result.update({
+        'meeting_id': meeting_id,
+        'transcript': result['transcript'],
+        'language': result['language']
+    })
+
+
+def _summarize_stage(job):
+    """Job stage: summarize the saved transcript"""
+    meeting_id = job.meeting_id
+    data = load_result(meeting_id)
+    if not data or 'transcript' not in data:
+        raise ValueError('Transcript not found. Please transcribe first.')
+    
+    print(f"Generating summary for {meeting_id}...")
+    
+    def on_progress(done, total):
+        job.update_progress(done / total)
+        event_broker.publish(meeting_id, 'progress', {
+            'job_id': job.job_id,
+            'stage': 'summarizing',
+            'window': done,
+            'windows': total,
+            'progress': round(job.progress, 3)
+        })
+    
+    summary_result = summarize_data(data, progress_callback=on_progress,
+                                    backend=job.params.get('summary_backend'))
+    save_result(meeting_id, data)
+    
+    job.result.update({
+        'meeting_id': meeting_id,
+        'summary': summary_result['summary'],
+        'key_decisions': summary_result['key_decisions'],
+        'action_items': summary_result['action_items'],
+        'action_item_details': data['action_item_details'],
+        'summary_version': data['summary_version'],
+        'backend': data['summary_backend'],
+        'latency_seconds': data['summary_latency_seconds'],
+        'stats': summary_result.get('stats')
+    })
+
+
+def _profiled_stage(stage: str, func):
+    """Wrap a job stage so it runs under the profiler and saves the result"""
+    def run(job):
+        profiler = Profiler(memory=app.config['PROFILE_MEMORY'])
+        try:
+            with profiler:
+                func(job)
+        finally:
+            try:
+                profile_id = profile_store.save(job.meeting_id, profiler, {
+                    'kind': 'job_stage', 'stage': stage, 'job_id': job.job_id, 'job_kind': job.kind
+                })
+                job.result.setdefault('profiles', []).append(profile_id)
+                print(f"Saved profile {profile_id} of {stage} for {job.meeting_id}")
+            except Exception as e:
+                print(f"Error saving profile of {stage}: {e}")
+                traceback.print_exc()
+    return run
+
+
+def submit_job(kind: str, meeting_id: str, stages: list, params: dict = None):
+    """
+    Queue a job for a meeting; every job submission goes through here
+    
+    A new job starts a fresh event stream for the meeting, so a client
+    subscribing afterwards never sees an earlier job's 'done' first.
+    
+    Raises:
+        QueueFullError: If the first stage's pool is at capacity
+    """
+    event_broker.reset(meeting_id)
+    if g.get('profile_requested'):
+        stages = [(pool, _profiled_stage(pool, func)) for pool, func in stages]
+    try:
+        job = get_job_queue().submit(kind, meeting_id, stages, params=params)
+    except QueueFullError as e:
+        event_broker.publish(meeting_id, 'error', {'error': str(e)})
+        raise
+    event_broker.publish(meeting_id, 'queued', {'job_id': job.job_id, 'kind': kind})
+    return job
+
+
+def enqueue_job(kind: str, meeting_id: str, stages: list, message: str):
+    """Submit a job for a meeting's audio and build the 202 response"""
+    audio = find_audio(meeting_id)
+    if not audio:
+        return jsonify({'error': 'Audio file not found'}), 404
+    audio_path = audio['path']
+    
+    body = request.get_json(silent=True) or {}
+    model_size = request.args.get('model_size') or body.get('model_size') or app.config['WHISPER_MODEL']
+    if model_size not in app.config['ALLOWED_MODEL_SIZES']:
+        return jsonify({
+            'error': f'Model size not allowed. Allowed sizes: {", ".join(sorted(app.config["ALLOWED_MODEL_SIZES"]))}'
+        }), 400
+    try:
+        summary_backend = _requested_backend(body)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        job = submit_job(kind, meeting_id, stages,
+                         params={'audio_path': audio_path, 'audio_sha256': audio['sha256'],
+                                 'model_size': model_size, 'summary_backend': summary_backend})
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    # Decode while the job waits, so the Whisper worker doesn't wait on ffmpeg
+    audio_decoder.prefetch(audio_path)
+    
+    return jsonify({
+        'meeting_id': meeting_id,
+        'job_id': job.job_id,
+        'model_size': model_size,
+        'status': job.status,
+        'status_url': f"/api/jobs/{job.job_id}",
+        'message': message
+    }), 202
+
+
 # Serve frontend
 @app.route('/')
 def index():
@@ -70,13 +744,161 @@ def index():
     return send_from_directory(frontend_path, 'index.html')
 
 
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _observe_request(response):
+    started = g.pop('request_started', None)
+    # Event streams stay open for the whole job; their duration says nothing about latency
+    if started is not None and not response.is_streamed:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_seconds.observe(time.perf_counter() - started, method=request.method,
+                             route=route, status=response.status_code)
+    return response
+
+
+def _is_admin() -> bool:
+    """Whether the request carries the admin token (Bearer or X-Admin-Token)"""
+    token = app.config['ADMIN_TOKEN']
+    if not token:
+        return False
+    supplied = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        supplied = authorization[len('Bearer '):]
+    return hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+
+@app.before_request
+def _start_profile():
+    """Profile this request when asked to with ?profile=1 or X-Profile: 1"""
+    wanted = request.args.get('profile') or request.headers.get('X-Profile')
+    if not (wanted and _parse_bool(wanted) and app.config['PROFILING_ENABLED'] and _is_admin()):
+        return
+    # Job routes hand the flag on to their stages, where the real work runs
+    g.profile_requested = True
+    g.profiler = Profiler(memory=app.config['PROFILE_MEMORY'])
+    g.profiler.start()
+
+
+@app.after_request
+def _save_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    meeting_id = (request.view_args or {}).get('meeting_id')
+    try:
+        profile_id = profile_store.save(meeting_id or REQUEST_PROFILES, profiler, {
+            'kind': 'request',
+            'method': request.method,
+            'route': request.url_rule.rule if request.url_rule else request.path,
+            'status': response.status_code
+        })
+        response.headers['X-Profile-Id'] = profile_id
+    except Exception as e:
+        print(f"Error saving profile: {e}")
+        traceback.print_exc()
+    return response
+
+
+def _collect_metrics():
+    """Copy queue, cache, model and LLM client state into the metrics"""
+    if job_queue is not None:
+        for pool, depth in job_queue.stats()['queued'].items():
+            queue_depth.set(depth, pool=pool)
+    cache = result_cache.stats()
+    cache_lookups.set(cache['hits'], result='hit')
+    cache_lookups.set(cache['misses'], result='miss')
+    cache_bytes.set(cache['bytes'])
+    model_memory.clear()
+    for size in model_registry.loaded_sizes():
+        model_memory.set(get_transcription_service(size).memory_bytes(), model=size)
+    for size in live_model_registry.loaded_sizes():
+        model_memory.set(get_live_transcription_service(size).memory_bytes(), model=f"live-{size}")
+    rss = resident_memory_bytes()
+    if rss is not None:
+        process_memory.set(rss)
+    for name, service in list(summarization_services.items()):
+        if hasattr(service, 'client'):
+            stats = service.client.stats()
+            llm_in_flight.set(stats['in_flight'], backend=name)
+            for event in ('retries', 'timeouts', 'failures', 'coalesced', 'streams_aborted'):
+                llm_events.set(stats[event], backend=name, event=event)
+
+
+metrics.add_collector(_collect_metrics)
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Metrics in the Prometheus text format
+    
+    Stage latencies, upload throughput, transcription real-time factor,
+    LLM latency and tokens, storage latency, queue depths, cache hit
+    counts and memory use. Disabled with METRICS_ENABLED=false.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), content_type=metrics.content_type)
+
+
+@app.route('/api/admin/profiles/<owner>', methods=['GET'])
+def list_profiles(owner):
+    """
+    List the stored profiles of a meeting (or 'requests' for requests
+    that don't belong to one), newest first. Needs the admin token.
+    """
+    if not _is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    if owner != REQUEST_PROFILES and not is_meeting_id(owner):
+        return jsonify({'error': 'Invalid meeting ID'}), 404
+    return jsonify({'owner': owner, 'profiles': profile_store.list(owner)})
+
+
+@app.route('/api/admin/profiles/<owner>/<profile_id>', methods=['GET'])
+def get_profile(owner, profile_id):
+    """
+    Get one profile: the JSON report with the slowest functions and the
+    allocation sites that grew most, or with ?format=pstats the raw
+    profile for snakeviz / python -m pstats. Needs the admin token.
+    """
+    if not _is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    if (owner != REQUEST_PROFILES and not is_meeting_id(owner)) or not is_meeting_id(profile_id):
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    if request.args.get('format') == 'pstats':
+        payload = profile_store.get_pstats(owner, profile_id)
+        if payload is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        return Response(payload, mimetype='application/octet-stream', headers={
+            'Content-Disposition': f'attachment; filename="{owner}-{profile_id}.pstats"'
+        })
+    
+    document = profile_store.get(owner, profile_id)
+    if document is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(document)
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'ready': model_registry.is_ready(),
+        'engine': app.config['TRANSCRIPTION_ENGINE'],
+        'models': model_registry.status()['models'],
+        'cache': result_cache.stats(),
+        'llm': {name: service.client.stats()
+                for name, service in summarization_services.items() if hasattr(service, 'client')}
     })
 
 
@@ -85,91 +907,193 @@ def upload_audio():
     """
     Upload audio file for processing
     
+    The multipart body is parsed as it arrives and the 'audio' field is
+    written straight to UPLOAD_FOLDER, so the file is stored once, limited
+    by MAX_UPLOAD_BYTES rather than MAX_CONTENT_LENGTH, and non-audio
+    content is rejected with 415 as soon as its first bytes arrive.
+    
     Returns:
         JSON with meeting_id for tracking
     """
     try:
-        # Check if file is present
-        if 'audio' not in request.files:
+        mimetype, options = parse_options_header(request.headers.get('Content-Type', ''))
+        if mimetype != 'multipart/form-data' or not options.get('boundary'):
             return jsonify({'error': 'No audio file provided'}), 400
         
-        file = request.files['audio']
-        
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({
-                'error': f'File type not allowed. Allowed types: {", ".join(app.config["ALLOWED_EXTENSIONS"])}'
-            }), 400
+        upload = {}
         
-        # Generate unique meeting ID
-        meeting_id = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = secure_filename(file.filename)
+        def destination(name):
+            if not name:
+                raise UploadError('No file selected', 400)
+            if not allowed_file(name):
+                raise UploadError(
+                    f'File type not allowed. Allowed types: {", ".join(app.config["ALLOWED_EXTENSIONS"])}', 400)
+            # Generate unique meeting ID
+            upload['meeting_id'] = new_meeting_id()
+            upload['filename'] = secure_filename(name)
+            file_ext = upload['filename'].rsplit('.', 1)[1].lower()
+            upload['audio_filename'] = f"{upload['meeting_id']}.{file_ext}"
+            upload['path'] = os.path.join(app.config['UPLOAD_FOLDER'], upload['audio_filename'])
+            return upload['path']
         
-        # Save the uploaded file
-        file_ext = filename.rsplit('.', 1)[1].lower()
-        audio_filename = f"{meeting_id}.{file_ext}"
-        audio_path = os.path.join(app.config['UPLOAD_FOLDER'], audio_filename)
-        file.save(audio_path)
+        # Stream the uploaded file to disk, hashing and sniffing it on the way
+        started = time.perf_counter()
+        # The raw body, bypassing MAX_CONTENT_LENGTH; the spool enforces MAX_UPLOAD_BYTES
+        body = get_input_stream(request.environ)
+        info = spool_multipart(body, options['boundary'].encode('latin-1'), 'audio', destination,
+                               app.config['MAX_UPLOAD_BYTES'])
+        if info is None:
+            return jsonify({'error': 'No audio file provided'}), 400
+        elapsed = time.perf_counter() - started
+        meeting_id, filename, audio_filename = upload['meeting_id'], upload['filename'], upload['audio_filename']
+        stage_seconds.observe(elapsed, stage='upload')
+        upload_bytes.inc(info['size'])
+        upload_rate.observe(info['size'] / max(elapsed, 1e-6))
+        with storage_seconds.time(operation='audio_write'):
+            audio_storage.put_file(audio_filename, upload['path'])
+        audio_manifest.record(meeting_id, audio_filename, dict(info, filename=filename))
         
         return jsonify({
             'meeting_id': meeting_id,
             'filename': filename,
+            'size': info['size'],
+            'sha256': info['sha256'],
+            'format': info['format'],
+            'codec': info['codec'],
             'message': 'File uploaded successfully'
         }), 200
         
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         print(f"Error uploading file: {e}")
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/transcribe/<meeting_id>', methods=['POST'])
-def transcribe(meeting_id):
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
     """
-    Transcribe audio file
+    Start a resumable upload
     
-    Args:
-        meeting_id: Unique meeting identifier
+    Expects JSON with 'filename' and optionally 'size' (total bytes).
+    Chunks are then sent with PUT /api/uploads/<upload_id>?offset=N.
     
     Returns:
-        JSON with transcript
+        JSON with upload_id, current offset and suggested chunk size
     """
     try:
-        # Find the audio file
-        audio_files = [f for f in os.listdir(app.config['UPLOAD_FOLDER']) 
-                      if f.startswith(meeting_id)]
+        body = request.get_json(silent=True) or {}
+        filename = secure_filename(body.get('filename', ''))
         
-        if not audio_files:
-            return jsonify({'error': 'Audio file not found'}), 404
+        if not filename or not allowed_file(filename):
+            return jsonify({
+                'error': f'File type not allowed. Allowed types: {", ".join(app.config["ALLOWED_EXTENSIONS"])}'
+            }), 400
         
-        audio_path = os.path.join(app.config['UPLOAD_FOLDER'], audio_files[0])
+        size = body.get('size')
+        if size is not None and (not isinstance(size, int) or isinstance(size, bool) or size < 0):
+            return jsonify({'error': 'size must be a non-negative integer'}), 400
         
-        # Transcribe
-        print(f"Starting transcription for {meeting_id}...")
-        service = get_transcription_service()
-        result = service.transcribe_audio(audio_path)
+        status = upload_manager.create(filename, size)
+        status['chunk_size'] = app.config['UPLOAD_CHUNK_SIZE']
+        return jsonify(status), 201
         
-        # Save result
-        data = {
-            'meeting_id': meeting_id,
-            'timestamp': datetime.now().isoformat(),
-            'transcript': result['transcript'],
-            'segments': result['segments'],
-            'language': result['language']
-        }
-        save_result(meeting_id, data)
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status_code
+    except Exception as e:
+        print(f"Error creating upload: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Get the number of bytes received so far for a resumable upload"""
+    try:
+        return jsonify(upload_manager.status(upload_id)), 200
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status_code
+
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def append_upload(upload_id):
+    """
+    Append a chunk to a resumable upload
+    
+    The raw request body is the chunk; its starting byte offset is given by
+    the 'offset' query parameter or the 'Upload-Offset' header. A mismatched
+    offset returns 409 with the offset the server expects.
+    """
+    try:
+        offset = request.args.get('offset', request.headers.get('Upload-Offset'))
+        if offset is None or not str(offset).isdigit():
+            return jsonify({'error': 'A numeric offset is required'}), 400
+        
+        status = upload_manager.append(upload_id, int(offset), request.stream)
+        upload_bytes.inc(status['offset'] - int(offset))
+        return jsonify(status), 200
+        
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status_code
+    except Exception as e:
+        print(f"Error appending upload chunk: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """
+    Finish a resumable upload and register it as a meeting
+    
+    Returns:
+        JSON with meeting_id, like POST /api/upload
+    """
+    try:
+        meeting_id = new_meeting_id()
+        info = upload_manager.complete(upload_id, app.config['UPLOAD_FOLDER'], meeting_id)
+        audio_key = os.path.basename(info['path'])
+        with storage_seconds.time(operation='audio_write'):
+            audio_storage.put_file(audio_key, info['path'])
+        audio_manifest.record(meeting_id, audio_key, info)
         
         return jsonify({
             'meeting_id': meeting_id,
-            'transcript': result['transcript'],
-            'language': result['language'],
-            'message': 'Transcription completed successfully'
+            'filename': info['filename'],
+            'size': info['size'],
+            'sha256': info['sha256'],
+            'format': info['format'],
+            'codec': info['codec'],
+            'message': 'File uploaded successfully'
         }), 200
         
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status_code
+    except Exception as e:
+        print(f"Error completing upload: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/transcribe/<meeting_id>', methods=['POST'])
+def transcribe(meeting_id):
+    """
+    Queue transcription of an audio file
+    
+    Args:
+        meeting_id: Unique meeting identifier
+    
+    Returns:
+        JSON with the job_id to poll at /api/jobs/<job_id>
+    """
+    try:
+        return enqueue_job('transcribe', meeting_id,
+                           [('transcribe', _transcribe_stage)],
+                           'Transcription queued')
+        
     except Exception as e:
-        print(f"Error transcribing audio: {e}")
+        print(f"Error queueing transcription: {e}")
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
@@ -182,28 +1106,28 @@ def summarize(meeting_id):
     Args:
         meeting_id: Unique meeting identifier
     
+    Query/Body:
+        backend: Summary backend (gemini, http, llama or extractive;
+                 default: SUMMARY_BACKEND)
+    
     Returns:
         JSON with summary, key decisions, and action items
     """
     try:
+        try:
+            backend = _requested_backend(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Load the transcription result
         data = load_result(meeting_id)
         
         if not data or 'transcript' not in data:
             return jsonify({'error': 'Transcript not found. Please transcribe first.'}), 404
         
-        transcript = data['transcript']
-        
-        # Generate summary
+        # Generate summary and update saved data
         print(f"Generating summary for {meeting_id}...")
-        service = get_summarization_service()
-        summary_result = service.summarize_meeting(transcript)
-        
-        # Update saved data
-        data['summary'] = summary_result['summary']
-        data['key_decisions'] = summary_result['key_decisions']
-        data['action_items'] = summary_result['action_items']
-        data['summary_timestamp'] = datetime.now().isoformat()
+        summary_result = summarize_data(data, backend=backend)
         save_result(meeting_id, data)
         
         return jsonify({
@@ -211,6 +1135,11 @@ def summarize(meeting_id):
             'summary': summary_result['summary'],
             'key_decisions': summary_result['key_decisions'],
             'action_items': summary_result['action_items'],
+            'action_item_details': data['action_item_details'],
+            'summary_version': data['summary_version'],
+            'backend': data['summary_backend'],
+            'latency_seconds': data['summary_latency_seconds'],
+            'stats': summary_result.get('stats'),
             'message': 'Summary generated successfully'
         }), 200
         
@@ -223,95 +1152,397 @@ def summarize(meeting_id):
 @app.route('/api/process/<meeting_id>', methods=['POST'])
 def process_meeting(meeting_id):
     """
-    Process meeting: transcribe and summarize in one call
+    Queue meeting processing: transcribe and summarize in one job
     
     Args:
         meeting_id: Unique meeting identifier
     
     Returns:
-        JSON with complete results
+        JSON with the job_id to poll at /api/jobs/<job_id>
     """
     try:
-        # Find the audio file
-        audio_files = [f for f in os.listdir(app.config['UPLOAD_FOLDER']) 
-                      if f.startswith(meeting_id)]
-        
-        if not audio_files:
-            return jsonify({'error': 'Audio file not found'}), 404
-        
-        audio_path = os.path.join(app.config['UPLOAD_FOLDER'], audio_files[0])
-        
-        # Step 1: Transcribe
-        print(f"Starting transcription for {meeting_id}...")
-        trans_service = get_transcription_service()
-        trans_result = trans_service.transcribe_audio(audio_path)
-        
-        # Step 2: Summarize
-        print(f"Generating summary for {meeting_id}...")
-        summ_service = get_summarization_service()
-        summary_result = summ_service.summarize_meeting(trans_result['transcript'])
+        return enqueue_job('process', meeting_id,
+                           [('transcribe', _transcribe_stage),
+                            ('summarize', _summarize_stage)],
+                           'Meeting processing queued')
         
-        # Save complete result
+    except Exception as e:
+        print(f"Error queueing meeting processing: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/meetings/<meeting_id>/events', methods=['GET'])
+def meeting_events(meeting_id):
+    """
+    Server-sent events stream of processing progress for a meeting
+    
+    Emits queued, stage, progress (transcribing chunk N of M, summarizing
+    window N of M), segments (new transcript segments) and finally done or
+    error. Reconnecting clients send Last-Event-ID to resume.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id', '0'))
+    last_event_id = int(last_event_id) if str(last_event_id).isdigit() else 0
+    
+    if not event_broker.has_history(meeting_id):
+        data = load_result(meeting_id)
+        if data is None and not find_audio(meeting_id, fetch=False):
+            return jsonify({'error': 'Meeting not found'}), 404
+    else:
+        data = None
+    
+    def generate():
+        yield 'retry: 3000\n\n'
+        if data is not None:
+            # Nothing in flight; report the stored result and finish
+            yield format_sse(0, 'done', {'meeting_id': meeting_id, 'status': 'done', 'result': data})
+            return
+        for item in event_broker.subscribe(meeting_id, last_event_id,
+                                           heartbeat_seconds=app.config['SSE_HEARTBEAT_SECONDS']):
+            if item is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_sse(*item)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def live_transcription(ws):
+    """
+    Live transcription over a WebSocket
+    
+    The client sends a JSON ``start`` message, then binary frames of 16-bit
+    little-endian mono PCM, then a JSON ``stop`` message. The server answers
+    with ``partial`` and ``final`` segment messages while audio arrives and,
+    after ``stop``, saves the meeting like an uploaded one (the audio is
+    kept as WAV) and queues its summary.
+    """
+    transcriber = None
+    meeting_id = None
+    started_at = None
+    
+    def send(message):
+        ws.send(json.dumps(message, ensure_ascii=False))
+    
+    def save(result):
         data = {
             'meeting_id': meeting_id,
-            'timestamp': datetime.now().isoformat(),
-            'transcript': trans_result['transcript'],
-            'segments': trans_result['segments'],
-            'language': trans_result['language'],
-            'summary': summary_result['summary'],
-            'key_decisions': summary_result['key_decisions'],
-            'action_items': summary_result['action_items']
+            'timestamp': started_at,
+            'source': 'live',
+            'transcript': result['transcript'],
+            'segments': result['segments'],
+            'language': result['language'],
+            'duration': result['duration']
         }
+        audio_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{meeting_id}.wav")
+        audio_storage.put_file(f"{meeting_id}.wav", audio_path)
+        audio_manifest.record(meeting_id, f"{meeting_id}.wav", {
+            'size': os.path.getsize(audio_path),
+            'sha256': hash_file(audio_path),
+            'format': 'wav',
+            'codec': 'pcm'
+        })
         save_result(meeting_id, data)
+    
+    try:
+        while True:
+            message = ws.receive()
+            if isinstance(message, (bytes, bytearray)):
+                if transcriber is None:
+                    send({'type': 'error', 'error': 'Send a start message before audio'})
+                    continue
+                for event in transcriber.feed(bytes(message)):
+                    send(event)
+                continue
+            
+            try:
+                control = json.loads(message)
+            except (TypeError, ValueError):
+                send({'type': 'error', 'error': 'Control messages must be JSON'})
+                continue
+            
+            if control.get('type') == 'start' and transcriber is None:
+                model_size = control.get('model_size') or app.config['LIVE_MODEL']
+                if model_size not in app.config['ALLOWED_MODEL_SIZES']:
+                    send({'type': 'error', 'error': f'Model size not allowed: {model_size}'})
+                    continue
+                sample_rate = control.get('sample_rate', 16000)
+                if not isinstance(sample_rate, int) or isinstance(sample_rate, bool) or sample_rate <= 0:
+                    send({'type': 'error', 'error': 'sample_rate must be a positive integer'})
+                    continue
+                meeting_id = new_meeting_id()
+                started_at = datetime.now().isoformat()
+                transcriber = StreamingTranscriber(
+                    get_live_transcription_service(model_size),
+                    language=control.get('language'),
+                    sample_rate=sample_rate,
+                    step_seconds=app.config['LIVE_STEP_SECONDS'],
+                    window_seconds=app.config['LIVE_WINDOW_SECONDS'],
+                    audio_path=os.path.join(app.config['UPLOAD_FOLDER'], f"{meeting_id}.wav")
+                )
+                send({'type': 'started', 'meeting_id': meeting_id, 'model_size': model_size})
+            
+            elif control.get('type') == 'stop' and transcriber is not None:
+                for event in transcriber.finish():
+                    send(event)
+                result = transcriber.result()
+                transcriber = None
+                save(result)
+                
+                response = {
+                    'type': 'done',
+                    'meeting_id': meeting_id,
+                    'transcript': result['transcript'],
+                    'language': result['language'],
+                    'duration': result['duration']
+                }
+                if control.get('summarize', True) and result['segments']:
+                    job = submit_job('summarize', meeting_id, [('summarize', _summarize_stage)])
+                    response['job_id'] = job.job_id
+                    response['status_url'] = f"/api/jobs/{job.job_id}"
+                send(response)
+                break
+            
+            else:
+                send({'type': 'error', 'error': f"Unexpected message: {control.get('type')}"})
+    
+    except ConnectionClosed:
+        print(f"Live transcription client disconnected ({meeting_id})")
+    except Exception as e:
+        print(f"Error in live transcription: {e}")
+        traceback.print_exc()
+        try:
+            send({'type': 'error', 'error': str(e)})
+        except Exception:
+            pass
+    finally:
+        if transcriber is not None:
+            # Dropped mid-meeting: keep what was finalized so far
+            transcriber.close()
+            result = transcriber.result()
+            if result['segments']:
+                save(result)
+
+
+if sock is not None:
+    sock.route('/api/live')(live_transcription)
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get status of a background job
+    
+    Returns:
+        JSON with status (queued/running/done/failed), progress, timings
+        and, once done, the job result
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.route('/api/meetings', methods=['GET'])
+def list_meetings():
+    """
+    Get a page of processed meetings from the metadata index
+    
+    Query parameters:
+        limit, offset: Pagination (limit defaults to 50, max 500)
+        sort: timestamp, summary_timestamp, duration, meeting_id or updated_at
+        order: asc or desc (default desc)
+        has_transcript, has_summary: true/false filters
+        language: Language code filter
+        since, until: ISO timestamp range
+    """
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        meetings, total = meeting_index.query(
+            limit=limit,
+            offset=offset,
+            sort=request.args.get('sort', 'timestamp'),
+            order=request.args.get('order', 'desc'),
+            has_transcript=_parse_bool(request.args.get('has_transcript')),
+            has_summary=_parse_bool(request.args.get('has_summary')),
+            language=request.args.get('language'),
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
         
         return jsonify({
-            'meeting_id': meeting_id,
-            'transcript': trans_result['transcript'],
-            'language': trans_result['language'],
-            'summary': summary_result['summary'],
-            'key_decisions': summary_result['key_decisions'],
-            'action_items': summary_result['action_items'],
-            'message': 'Meeting processed successfully'
+            'meetings': meetings,
+            'total': total,
+            'limit': limit,
+            'offset': offset
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error processing meeting: {e}")
-        traceback.print_exc()
+        print(f"Error listing meetings: {e}")
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/meetings', methods=['GET'])
-def list_meetings():
-    """Get list of all processed meetings"""
+@app.route('/api/search', methods=['GET'])
+def search_meetings():
+    """
+    Full-text search over transcripts, summaries, decisions and action items
+    
+    Query parameters:
+        q: Search terms (all must match; 'term*' matches a prefix)
+        limit, offset: Pagination (limit defaults to 20, max 100)
+        meeting_id: Restrict to one meeting
+    
+    Returns:
+        JSON with ranked hits including segment timestamps and snippets
+    """
     try:
-        meetings = []
-        data_folder = app.config['DATA_FOLDER']
-        
-        if os.path.exists(data_folder):
-            for filename in os.listdir(data_folder):
-                if filename.endswith('.json'):
-                    meeting_id = filename.replace('.json', '')
-                    data = load_result(meeting_id)
-                    if data:
-                        meetings.append({
-                            'meeting_id': meeting_id,
-                            'timestamp': data.get('timestamp'),
-                            'has_transcript': 'transcript' in data,
-                            'has_summary': 'summary' in data
-                        })
-        
-        return jsonify({'meetings': meetings}), 200
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+        
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        hits = search_index.search(query, limit=limit, offset=offset,
+                                   meeting_id=request.args.get('meeting_id'))
+        
+        return jsonify({'query': query, 'hits': hits, 'limit': limit, 'offset': offset}), 200
         
     except Exception as e:
-        print(f"Error listing meetings: {e}")
+        print(f"Error searching meetings: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/meetings/<meeting_id>/transcript', methods=['PATCH'])
+def edit_transcript(meeting_id):
+    """
+    Correct transcript segments or append new ones
+    
+    Body:
+        edits: List of {"index": n, "text": "...", "speaker": "..."}
+               replacing a segment's text and/or speaker
+        append: List of {"start": s, "end": e, "text": "..."} new segments
+                (optionally with "speaker")
+        speakers: {"Speaker 1": "Alice", ...} renaming speakers everywhere
+        summarize: Queue a re-summary (default: if the meeting has one)
+        backend: Summary backend for the re-summary (default: the one
+                 that made the current summary)
+    
+    Returns:
+        202 with a job_id when a re-summary was queued (only the windows
+        whose text changed are re-run), otherwise 200
+    """
+    try:
+        data = load_result(meeting_id)
+        if not data or 'transcript' not in data:
+            return jsonify({'error': 'Transcript not found. Please transcribe first.'}), 404
+        if not data.get('segments'):
+            return jsonify({'error': 'Meeting has no segments to edit'}), 400
+        
+        body = request.get_json(silent=True) or {}
+        try:
+            backend = _requested_backend(body) or data.get('summary_backend')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        edits = body.get('edits') or []
+        append = body.get('append') or []
+        renames = body.get('speakers') or {}
+        segments = data['segments']
+        
+        for edit in edits:
+            index = edit.get('index')
+            if not isinstance(index, int) or not 0 <= index < len(segments) \
+                    or not isinstance(edit.get('text', ''), str) \
+                    or not isinstance(edit.get('speaker', ''), str) \
+                    or not ('text' in edit or 'speaker' in edit):
+                return jsonify({'error': f'Invalid edit: {edit}'}), 400
+        for segment in append:
+            if not isinstance(segment.get('text'), str) or \
+                    not isinstance(segment.get('speaker', ''), str) or \
+                    not all(isinstance(segment.get(k), (int, float)) for k in ('start', 'end')):
+                return jsonify({'error': f'Invalid segment: {segment}'}), 400
+        if not isinstance(renames, dict) or \
+                not all(isinstance(v, str) and v.strip() for v in renames.values()):
+            return jsonify({'error': 'speakers must map speaker labels to new names'}), 400
+        
+        for edit in edits:
+            if 'text' in edit:
+                segments[edit['index']]['text'] = edit['text'].strip()
+            if edit.get('speaker', '').strip():
+                segments[edit['index']]['speaker'] = edit['speaker'].strip()
+        for s in append:
+            segment = {'start': s['start'], 'end': s['end'], 'text': s['text'].strip()}
+            if s.get('speaker', '').strip():
+                segment['speaker'] = s['speaker'].strip()
+            segments.append(segment)
+        if renames:
+            renames = {old: new.strip() for old, new in renames.items()}
+            for segment in segments:
+                if segment.get('speaker') in renames:
+                    segment['speaker'] = renames[segment['speaker']]
+        segments.sort(key=lambda s: s['start'])
+        if any(s.get('speaker') for s in segments):
+            data['speakers'] = list(dict.fromkeys(s['speaker'] for s in segments if s.get('speaker')))
+        data['transcript'] = ' '.join(s['text'] for s in segments)
+        data['transcript_edited_at'] = datetime.now().isoformat()
+        save_result(meeting_id, data)
+        
+        response = {
+            'meeting_id': meeting_id,
+            'segments': len(segments),
+            'edited': len(edits),
+            'appended': len(append),
+            'renamed': len(renames)
+        }
+        if not body.get('summarize', 'summary' in data):
+            response['message'] = 'Transcript updated'
+            return jsonify(response), 200
+        
+        job = submit_job('summarize', meeting_id, [('summarize', _summarize_stage)],
+                         params={'summary_backend': backend})
+        response.update({
+            'job_id': job.job_id,
+            'status_url': f"/api/jobs/{job.job_id}",
+            'message': 'Transcript updated, summary refresh queued'
+        })
+        return jsonify(response), 202
+        
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        print(f"Error editing transcript: {e}")
+        traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/meetings/<meeting_id>', methods=['GET'])
 def get_meeting(meeting_id):
-    """Get full details of a specific meeting"""
+    """
+    Get full details of a specific meeting
+    
+    Query Parameters:
+        fields: Comma-separated fields to return, e.g. summary,action_items
+                (default: all). Segments are only read when requested.
+        start: Only segments ending after this time (seconds)
+        end: Only segments starting before this time (seconds)
+    """
     try:
-        data = load_result(meeting_id)
+        fields = request.args.get('fields')
+        fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+        try:
+            start = float(request.args['start']) if 'start' in request.args else None
+            end = float(request.args['end']) if 'end' in request.args else None
+        except ValueError:
+            return jsonify({'error': 'start and end must be numbers'}), 400
+        
+        data = load_result(meeting_id, fields=fields, start=start, end=end)
         
         if not data:
             return jsonify({'error': 'Meeting not found'}), 404
@@ -337,11 +1568,17 @@ if __name__ == '__main__':
     📋 API Endpoints:
        - GET  /api/health
        - POST /api/upload
+       - POST /api/uploads  (resumable: PUT/GET /api/uploads/<id>, POST .../complete)
        - POST /api/transcribe/<meeting_id>
        - POST /api/summarize/<meeting_id>
        - POST /api/process/<meeting_id>
+       - GET  /api/jobs/<job_id>
+       - GET  /api/meetings/<meeting_id>/events  (SSE)
+       - WS   /api/live  (live transcription, needs flask-sock)
        - GET  /api/meetings
        - GET  /api/meetings/<meeting_id>
+       - PATCH /api/meetings/<meeting_id>/transcript
+       - GET  /api/search?q=
     
     📖 Documentation: See API_DOCUMENTATION.md
     
@@ -18,14 +18,150 @@ class Config:
     
     # Upload Configuration - paths relative to project root
     UPLOAD_FOLDER = os.path.join(parent_dir, 'uploads')
-    MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max file size
+    MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max request body (one upload or chunk)
+    # Resumable uploads are sent in chunks, so they may exceed MAX_CONTENT_LENGTH
+    MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 2 * 1024 * 1024 * 1024))
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # chunk size suggested to clients
     ALLOWED_EXTENSIONS = {'wav', 'mp3', 'm4a', 'flac', 'ogg', 'webm'}
+    # Uploads decoded to 16 kHz PCM (.npy), reused by every transcription
+    DECODED_FOLDER = os.path.join(UPLOAD_FOLDER, '.decoded')
+    # ffmpeg processes decoding queued jobs ahead of the Whisper workers
+    DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', 1))
+    # Size of DECODED_FOLDER above which least recently used files are deleted
+    DECODED_MAX_BYTES = int(os.getenv('DECODED_MAX_BYTES', 10 * 1024 * 1024 * 1024))
     
     # Data Storage - paths relative to project root
     DATA_FOLDER = os.path.join(parent_dir, 'data')
+    # SQLite index of meeting metadata used for listing
+    INDEX_DB_PATH = os.path.join(DATA_FOLDER, 'meetings.sqlite3')
+    # zlib-compress transcript text in the per-meeting .segments files
+    COMPRESS_SEGMENTS = os.getenv('COMPRESS_SEGMENTS', 'True').lower() == 'true'
+    
+    # Storage Backend
+    # local: audio and meetings in UPLOAD_FOLDER and DATA_FOLDER
+    # s3: an S3-compatible bucket (AWS, MinIO) shared by every API node, so
+    #     the API can run behind a load balancer; UPLOAD_FOLDER then only
+    #     caches audio for Whisper. Credentials come from the usual AWS
+    #     environment variables or instance role.
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+    S3_BUCKET = os.getenv('S3_BUCKET')
+    S3_PREFIX = os.getenv('S3_PREFIX', '')  # e.g. unthink/
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+    S3_REGION = os.getenv('S3_REGION')
+    # How often a node picks up meetings saved by other nodes
+    INDEX_SYNC_SECONDS = float(os.getenv('INDEX_SYNC_SECONDS', 5))
+    
+    # Whisper Models
+    # Models listed in PRELOAD_MODELS are loaded at startup so the first
+    # request doesn't pay for whisper.load_model.
+    WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')
+    ALLOWED_MODEL_SIZES = {m.strip() for m in os.getenv('ALLOWED_MODEL_SIZES', 'tiny,base,small').split(',')} | {WHISPER_MODEL}
+    PRELOAD_MODELS = [m.strip() for m in os.getenv('PRELOAD_MODELS', WHISPER_MODEL).split(',') if m.strip()]
+    PRELOAD_IN_BACKGROUND = os.getenv('PRELOAD_IN_BACKGROUND', 'True').lower() == 'true'
+    # Inference engine: 'whisper' (reference PyTorch) or 'faster-whisper'
+    # (CTranslate2 with int8 weights, several times faster on CPU; needs
+    # pip install faster-whisper). Both return the same result format.
+    TRANSCRIPTION_ENGINE = os.getenv('TRANSCRIPTION_ENGINE', 'whisper')
+    TRANSCRIPTION_COMPUTE_TYPE = os.getenv('TRANSCRIPTION_COMPUTE_TYPE', 'int8')  # faster-whisper only
+    TRANSCRIPTION_BEAM_SIZE = int(os.getenv('TRANSCRIPTION_BEAM_SIZE', 1))  # faster-whisper only; 1 = greedy
+    TRANSCRIPTION_THREADS = int(os.getenv('TRANSCRIPTION_THREADS', 0))  # threads per model, 0 = library default
+    
+    # Result Cache - transcripts and summaries keyed by content hash
+    CACHE_FOLDER = os.path.join(parent_dir, 'cache')
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+    
+    # Background Job Queue
+    # Whisper already uses every core for one file, so a single transcription
+    # worker keeps the CPU saturated without oversubscribing it.
+    TRANSCRIBE_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', 1))
+    SUMMARIZE_WORKERS = int(os.getenv('SUMMARIZE_WORKERS', 4))
+    JOB_QUEUE_SIZE = int(os.getenv('JOB_QUEUE_SIZE', 100))
+    # Keep-alive comment interval on SSE progress streams; keep it below
+    # the load balancer's idle timeout
+    SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    
+    # Long-audio Transcription
+    # Recordings longer than the threshold are split into chunks and
+    # transcribed by a pool of processes, each holding its own model.
+    TRANSCRIBE_PROCESSES = int(os.getenv('TRANSCRIBE_PROCESSES', max((os.cpu_count() or 1) // 4, 1)))
+    CHUNK_SECONDS = float(os.getenv('CHUNK_SECONDS', 120))
+    CHUNK_OVERLAP_SECONDS = float(os.getenv('CHUNK_OVERLAP_SECONDS', 2))
+    LONG_AUDIO_THRESHOLD_SECONDS = float(os.getenv('LONG_AUDIO_THRESHOLD_SECONDS', 600))
+    
+    # Voice Activity Detection
+    # Cuts silence (waiting for people to join, breaks) before Whisper runs;
+    # segment times are mapped back onto the original recording.
+    VAD_ENABLED = os.getenv('VAD_ENABLED', 'False').lower() == 'true'
+    VAD_THRESHOLD_DB = float(os.getenv('VAD_THRESHOLD_DB', 12))  # above the noise floor
+    VAD_MIN_SILENCE_SECONDS = float(os.getenv('VAD_MIN_SILENCE_SECONDS', 1.0))
+    VAD_PADDING_SECONDS = float(os.getenv('VAD_PADDING_SECONDS', 0.3))
+    
+    # Speaker Diarization
+    # Labels every segment with a speaker (Speaker 1, Speaker 2, ...) found
+    # by clustering voice features, on a CPU thread alongside Whisper.
+    # Summaries then attribute action items to speakers.
+    DIARIZATION_ENABLED = os.getenv('DIARIZATION_ENABLED', 'False').lower() == 'true'
+    DIARIZATION_MAX_SPEAKERS = int(os.getenv('DIARIZATION_MAX_SPEAKERS', 8))
+    DIARIZATION_WORKERS = int(os.getenv('DIARIZATION_WORKERS', 2))  # recordings diarized at once
+    
+    # Live Transcription (WebSocket /api/live)
+    # Whisper re-runs on a rolling buffer every LIVE_STEP_SECONDS of new
+    # audio, so a small model keeps up best on CPU. Live sessions load their
+    # own copy of the model, separate from batch jobs' (more memory, but
+    # never queued behind a long transcription).
+    LIVE_MODEL = os.getenv('LIVE_MODEL', WHISPER_MODEL)
+    LIVE_STEP_SECONDS = float(os.getenv('LIVE_STEP_SECONDS', 2.0))
+    LIVE_WINDOW_SECONDS = float(os.getenv('LIVE_WINDOW_SECONDS', 30.0))
+    
+    # Summarization Backend
+    # gemini: Google Gemini (needs GOOGLE_API_KEY)
+    # http: JSON completion endpoint at LLM_ENDPOINT (e.g. examples/fake_llm_server.py)
+    # llama: local GGUF model at LLAMA_MODEL_PATH via llama-cpp-python
+    # extractive: TextRank over the transcript, no model or network needed
+    # Requests can pick another backend with ?backend=
+    LLM_ENDPOINT = os.getenv('LLM_ENDPOINT')
+    SUMMARY_BACKEND = os.getenv('SUMMARY_BACKEND', 'http' if LLM_ENDPOINT else 'gemini')
+    LLAMA_MODEL_PATH = os.getenv('LLAMA_MODEL_PATH')
+    LLAMA_CONTEXT_TOKENS = int(os.getenv('LLAMA_CONTEXT_TOKENS', 8192))
+    LLAMA_THREADS = int(os.getenv('LLAMA_THREADS', 0)) or None
+    LLAMA_WINDOW_TOKENS = int(os.getenv('LLAMA_WINDOW_TOKENS', 3000))  # must fit LLAMA_CONTEXT_TOKENS with the prompt
+    
+    # LLM Client
+    # Each LLM backend has one client, so these limits hold across all
+    # requests and workers.
+    LLM_MODEL_NAME = os.getenv('LLM_MODEL_NAME', 'http')  # name of the LLM_ENDPOINT model
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 8))
+    LLM_RATE_PER_SECOND = float(os.getenv('LLM_RATE_PER_SECOND', 0)) or None  # 0 disables
+    LLM_BURST = int(os.getenv('LLM_BURST', 0)) or None
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 4))
+    LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', 120))
+    
+    # Map-reduce Summarization
+    # Transcripts larger than one window are summarized window by window
+    # and the partial summaries merged in a reduce pass.
+    SUMMARY_WINDOW_TOKENS = int(os.getenv('SUMMARY_WINDOW_TOKENS', 8000))
+    SUMMARY_MAP_WORKERS = int(os.getenv('SUMMARY_MAP_WORKERS', 4))
+    # Ask the model for schema-checked JSON (summary, decisions, action items
+    # with owner and due date) instead of the SUMMARY: / KEY DECISIONS: text
+    SUMMARY_STRUCTURED_OUTPUT = os.getenv('SUMMARY_STRUCTURED_OUTPUT', 'True').lower() == 'true'
+    # Earlier summaries kept in a meeting's summary_history
+    SUMMARY_HISTORY_LIMIT = int(os.getenv('SUMMARY_HISTORY_LIMIT', 10))
+    
+    # Metrics - Prometheus text format at GET /api/metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # Profiling - cProfile/tracemalloc for single requests, asked for with
+    # ?profile=1 or an X-Profile: 1 header plus the admin token. Results
+    # are read back through /api/admin/profiles. Off unless both are set.
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    PROFILE_MEMORY = os.getenv('PROFILE_MEMORY', 'True').lower() == 'true'  # also trace allocations
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 10))  # profiles kept per meeting
     
     @staticmethod
     def init_app(app):
         """Initialize application directories"""
         os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+        os.makedirs(Config.DECODED_FOLDER, exist_ok=True)
         os.makedirs(Config.DATA_FOLDER, exist_ok=True)
+        os.makedirs(Config.CACHE_FOLDER, exist_ok=True)
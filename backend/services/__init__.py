@@ -2,11 +2,98 @@
 Services package initialization
 """
 from .transcription_service import TranscriptionService, transcribe_audio
-from .summarization_service import SummarizationService, summarize_meeting
+from .transcription_engines import (
+    WhisperEngine, FasterWhisperEngine, TRANSCRIPTION_ENGINES, create_engine
+)
+from .audio_decoder import AudioDecoder
+from .vad import detect_speech, SpeechMap
+from .diarization import Diarizer, assign_speakers
+from .streaming_transcriber import StreamingTranscriber
+from .summarization_service import (
+    SummarizationService, summarize_meeting, estimate_tokens, format_segments, PROMPT_VERSION
+)
+from .llm_client import (
+    AsyncLLMClient, GeminiTransport, HTTPTransport, LlamaCppTransport, LLMError, LLMTimeoutError
+)
+from .summarization_backends import ExtractiveSummarizer, SUMMARY_BACKENDS
+from .structured_output import (
+    SUMMARY_SCHEMA, StreamingJSONParser, StructuredOutputError, normalize_summary, parse_json
+)
+from .job_queue import JobQueue, Job, QueueFullError
+from .model_registry import ModelRegistry
+from .progress_events import EventBroker, format_sse
+from .meeting_index import MeetingIndex
+from .meeting_store import MeetingStore
+from .audio_manifest import AudioManifest
+from .ids import new_ulid, is_meeting_id, is_legacy_meeting_id
+from .storage import LocalStorage, S3Storage, create_storage, atomic_write
+from .search_index import SearchIndex
+from .upload_service import (
+    ResumableUploadManager, UploadError, spool_stream, spool_multipart, sniff_audio_format
+)
+from .metrics import MetricsRegistry, resident_memory_bytes
+from .profiling import Profiler, ProfileStore
+from .result_cache import ResultCache, hash_file, hash_text, make_key
 
 __all__ = [
     'TranscriptionService',
     'SummarizationService',
     'transcribe_audio',
-    'summarize_meeting'
+    'WhisperEngine',
+    'FasterWhisperEngine',
+    'TRANSCRIPTION_ENGINES',
+    'create_engine',
+    'AudioDecoder',
+    'detect_speech',
+    'SpeechMap',
+    'Diarizer',
+    'assign_speakers',
+    'StreamingTranscriber',
+    'summarize_meeting',
+    'estimate_tokens',
+    'format_segments',
+    'PROMPT_VERSION',
+    'AsyncLLMClient',
+    'GeminiTransport',
+    'HTTPTransport',
+    'LlamaCppTransport',
+    'ExtractiveSummarizer',
+    'SUMMARY_BACKENDS',
+    'SUMMARY_SCHEMA',
+    'StreamingJSONParser',
+    'StructuredOutputError',
+    'normalize_summary',
+    'parse_json',
+    'LLMError',
+    'LLMTimeoutError',
+    'JobQueue',
+    'Job',
+    'QueueFullError',
+    'ModelRegistry',
+    'EventBroker',
+    'format_sse',
+    'MeetingIndex',
+    'MeetingStore',
+    'AudioManifest',
+    'new_ulid',
+    'is_meeting_id',
+    'is_legacy_meeting_id',
+    'LocalStorage',
+    'S3Storage',
+    'create_storage',
+    'atomic_write',
+    'SearchIndex',
+    'ResumableUploadManager',
+    'UploadError',
+    'spool_stream',
+    'spool_multipart',
+    'sniff_audio_format',
+    'MetricsRegistry',
+    'resident_memory_bytes',
+    'Profiler',
+    'ProfileStore',
+    'ResultCache',
+    'hash_file',
+    'hash_text',
+    'make_key'
 ]
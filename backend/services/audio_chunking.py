@@ -0,0 +1,175 @@
+"""
+Helpers for splitting long recordings into overlapping chunks and
+stitching the per-chunk Whisper output back into one transcript
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Whisper always works on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Frame size used for the energy envelope when looking for quiet split points
+FRAME_SECONDS = 0.02
+
+
+def frame_energy(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """
+    Compute the RMS energy of consecutive non-overlapping frames
+
+    Args:
+        audio: Mono float32 samples
+        frame_length: Samples per frame
+
+    Returns:
+        Array with one RMS value per frame (a trailing partial frame is dropped)
+    """
+    num_frames = len(audio) // frame_length
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+def plan_chunks(audio: np.ndarray, chunk_seconds: float = 120.0,
+                overlap_seconds: float = 2.0, search_seconds: float = 10.0,
+                sample_rate: int = SAMPLE_RATE) -> List[Dict]:
+    """
+    Choose chunk boundaries at the quietest point near every ``chunk_seconds``
+
+    Each chunk owns the region between two boundaries and is padded by
+    ``overlap_seconds`` on both sides so words cut at a boundary are still
+    heard in full by one of the two neighbouring chunks.
+
+    Args:
+        audio: Mono float32 samples
+        chunk_seconds: Target length of each chunk
+        overlap_seconds: Padding added on each side of a boundary
+        search_seconds: How far around the target boundary to look for silence
+        sample_rate: Sample rate of ``audio``
+
+    Returns:
+        List of dicts with sample ranges ``start``/``end`` (audio to decode)
+        and ``keep_start``/``keep_end`` (region whose segments are kept)
+    """
+    total = len(audio)
+    chunk_len = int(chunk_seconds * sample_rate)
+    if total <= chunk_len:
+        return [{'start': 0, 'end': total, 'keep_start': 0, 'keep_end': total}]
+
+    frame_length = int(FRAME_SECONDS * sample_rate)
+    energy = frame_energy(audio, frame_length)
+    search = int(search_seconds * sample_rate)
+
+    boundaries = [0]
+    while total - boundaries[-1] > chunk_len + search:
+        target = boundaries[-1] + chunk_len
+        lo = max((target - search) // frame_length, 0)
+        hi = min((target + search) // frame_length, len(energy))
+        if hi > lo:
+            boundary = (lo + int(np.argmin(energy[lo:hi]))) * frame_length
+        else:
+            boundary = target
+        boundaries.append(boundary)
+    boundaries.append(total)
+
+    overlap = int(overlap_seconds * sample_rate)
+    chunks = []
+    for keep_start, keep_end in zip(boundaries[:-1], boundaries[1:]):
+        chunks.append({
+            'start': max(keep_start - overlap, 0),
+            'end': min(keep_end + overlap, total),
+            'keep_start': keep_start,
+            'keep_end': keep_end
+        })
+    return chunks
+
+
+def _normalize_text(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def stitch_segments(chunk_results: List[Dict],
+                    sample_rate: int = SAMPLE_RATE) -> Tuple[str, List[Dict]]:
+    """
+    Merge per-chunk segments into a single timeline
+
+    Segment times are shifted by the chunk start. A segment is kept only if
+    its midpoint falls inside the chunk's owned region, so text heard in an
+    overlap is kept once; identical text repeated across a boundary is also
+    dropped.
+
+    Args:
+        chunk_results: Chunk dicts from ``plan_chunks`` with an added
+                       ``segments`` list of chunk-relative Whisper segments,
+                       in chunk order
+
+    Returns:
+        Tuple of (full transcript text, stitched segments)
+    """
+    stitched: List[Dict] = []
+    for chunk in chunk_results:
+        offset = chunk['start'] / sample_rate
+        keep_start = chunk['keep_start'] / sample_rate
+        keep_end = chunk['keep_end'] / sample_rate
+        for segment in chunk['segments']:
+            text = segment['text'].strip()
+            if not text:
+                continue
+            start = segment['start'] + offset
+            end = segment['end'] + offset
+            midpoint = (start + end) / 2
+            if midpoint < keep_start or midpoint >= keep_end:
+                continue
+            if stitched and _normalize_text(stitched[-1]['text']) == _normalize_text(text) \
+                    and start - stitched[-1]['end'] < 1.0:
+                stitched[-1]['end'] = max(stitched[-1]['end'], end)
+                continue
+            stitched.append({
+                'start': round(max(start, stitched[-1]['end'] if stitched else 0.0), 3),
+                'end': round(end, 3),
+                'text': text
+            })
+
+    transcript = ' '.join(segment['text'] for segment in stitched)
+    return transcript, stitched
+
+
+# --- Process pool workers -------------------------------------------------
+# Each worker process loads its own Whisper model once and keeps it for the
+# lifetime of the pool.
+
+_worker_model = None
+
+
+def init_chunk_worker(model_size: str, num_threads: int, engine: str = 'whisper',
+                      engine_options: Dict = None):
+    """Process pool initializer: limit the engine's threads and load the model"""
+    global _worker_model
+    from .transcription_engines import create_engine
+
+    options = dict(engine_options or {}, cpu_threads=max(num_threads, 1))
+    _worker_model = create_engine(engine, model_size, **options)
+
+
+def transcribe_chunk(audio, language: str = None, start: int = 0, end: int = None) -> Dict:
+    """
+    Transcribe one chunk in a worker process
+
+    Args:
+        audio: Float32 samples, or the path of a decoded .npy file; a path
+               avoids pickling the samples to the worker, which then reads
+               only ``start:end`` from the memory-mapped file
+        language: Optional language code
+    """
+    if isinstance(audio, str):
+        from .audio_decoder import load_pcm
+        audio = load_pcm(audio, start, end)
+    result = _worker_model.transcribe(audio, language=language)
+    return {
+        'language': result.get('language'),
+        'segments': [
+            {'start': s['start'], 'end': s['end'], 'text': s['text']}
+            for s in result['segments']
+        ]
+    }
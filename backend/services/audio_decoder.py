@@ -0,0 +1,243 @@
+"""
+Decode stage: converts uploads to 16 kHz mono PCM once and keeps the
+samples in a memory-mappable .npy file for every later transcription
+"""
+import hashlib
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from .audio_chunking import SAMPLE_RATE
+
+# Bytes reserved for the .npy header so samples can be streamed to disk
+# before their count is known; a 1-D int16 header always fits
+NPY_HEADER_BYTES = 128
+READ_SIZE = 1024 * 1024
+
+
+def _npy_header(num_samples: int) -> bytes:
+    """A version 1.0 .npy header for ``num_samples`` int16 values, padded to NPY_HEADER_BYTES"""
+    header = "{'descr': '<i2', 'fortran_order': False, 'shape': (%d,), }" % num_samples
+    prefix = b'\x93NUMPY\x01\x00'
+    body_len = NPY_HEADER_BYTES - len(prefix) - 2
+    header = header.ljust(body_len - 1) + '\n'
+    return prefix + body_len.to_bytes(2, 'little') + header.encode('latin1')
+
+
+def decode_to_npy(audio_path: str, npy_path: str, sample_rate: int = SAMPLE_RATE) -> int:
+    """
+    Decode an audio file with ffmpeg into an int16 .npy file
+
+    ffmpeg's output is streamed straight to disk, so memory use does not
+    depend on the recording length. The file is written under a temporary
+    name and renamed when complete.
+
+    Args:
+        audio_path: Source audio file
+        npy_path: Destination .npy file
+        sample_rate: Output sample rate
+
+    Returns:
+        Number of samples written
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-threads', '0', '-i', audio_path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-'
+    ]
+    tmp_path = f"{npy_path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as out:
+            out.write(b'\0' * NPY_HEADER_BYTES)
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            # stderr is drained on a thread so a chatty ffmpeg can't fill the pipe and stall
+            stderr_chunks = []
+            stderr_reader = threading.Thread(
+                target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True
+            )
+            stderr_reader.start()
+            size = 0
+            for chunk in iter(lambda: process.stdout.read(READ_SIZE), b''):
+                out.write(chunk)
+                size += len(chunk)
+            process.wait()
+            stderr_reader.join()
+            if process.returncode != 0:
+                raise RuntimeError(f"Failed to load audio: {b''.join(stderr_chunks).decode(errors='replace')}")
+
+            # An odd trailing byte can't be a sample
+            num_samples = size // 2
+            out.truncate(NPY_HEADER_BYTES + num_samples * 2)
+            out.seek(0)
+            out.write(_npy_header(num_samples))
+        os.replace(tmp_path, npy_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return num_samples
+
+
+def load_audio(audio_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio file with ffmpeg straight into memory
+
+    For callers without an AudioDecoder; the result is the float32 array
+    Whisper expects, the same as ``load_pcm`` of a decoded file.
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-threads', '0', '-i', audio_path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-'
+    ]
+    process = subprocess.run(cmd, capture_output=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to load audio: {process.stderr.decode(errors='replace')}")
+    # An odd trailing byte can't be a sample
+    pcm = process.stdout[:len(process.stdout) // 2 * 2]
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+def load_pcm(npy_path: str, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """
+    Read decoded samples as the float32 array Whisper expects
+
+    Only the requested range is read from the memory-mapped file.
+
+    Args:
+        npy_path: File written by ``decode_to_npy``
+        start: First sample
+        end: Sample after the last one (None for the end of the file)
+    """
+    samples = np.load(npy_path, mmap_mode='r')
+    return samples[start:end].astype(np.float32) / 32768.0
+
+
+class AudioDecoder:
+    """
+    Decodes each upload once and runs decoding ahead of transcription.
+
+    Decoded files live in ``decoded_dir``, named after a hash of the
+    source's full path, size and modification time, so files with the same
+    name in different directories never share samples and a replaced file
+    is decoded again. Re-transcribing with another model size, a chunked run
+    or ``transcribe_with_timestamps`` never starts ffmpeg again. ``prefetch``
+    decodes on a background thread when a job is queued, so by the time a
+    Whisper worker picks the job up its audio is ready.
+
+    Like ResultCache, the directory is bounded by ``max_bytes``: least
+    recently used files are evicted, and file mtimes keep the order across
+    restarts.
+    """
+
+    def __init__(self, decoded_dir: str, workers: int = 1, max_bytes: int = 10 * 1024 ** 3):
+        """
+        Args:
+            decoded_dir: Directory for decoded .npy files
+            workers: Concurrent ffmpeg processes used for prefetching
+            max_bytes: Total size above which least recently used decoded
+                       files are deleted (the newest is always kept)
+        """
+        self.decoded_dir = decoded_dir
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1),
+                                            thread_name_prefix='decode')
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Guards the LRU index; prefetch checks it while holding _lock
+        self._index_lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(decoded_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from the files on disk"""
+        found = []
+        for entry in os.scandir(self.decoded_dir):
+            if entry.is_file() and entry.name.endswith('.npy'):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._total_bytes += size
+
+    def decoded_path(self, audio_path: str) -> str:
+        """Where the decoded samples of ``audio_path`` are stored"""
+        stat = os.stat(audio_path)
+        source = f"{os.path.abspath(audio_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        digest = hashlib.sha256(source.encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+        return os.path.join(self.decoded_dir, f"{os.path.basename(audio_path)}.{digest}.npy")
+
+    def is_decoded(self, audio_path: str) -> bool:
+        """True if an up-to-date decoded file exists; counts as a use for the LRU order"""
+        npy_path = self.decoded_path(audio_path)
+        try:
+            os.utime(npy_path)
+        except FileNotFoundError:
+            with self._index_lock:
+                self._total_bytes -= self._entries.pop(npy_path, 0)
+            return False
+        with self._index_lock:
+            if npy_path in self._entries:
+                self._entries.move_to_end(npy_path)
+        return True
+
+    def _add(self, npy_path: str):
+        """Record a new decoded file and evict the least recently used ones"""
+        size = os.path.getsize(npy_path)
+        with self._index_lock:
+            self._total_bytes += size - self._entries.pop(npy_path, 0)
+            self._entries[npy_path] = size
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                path, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def prefetch(self, audio_path: str) -> Future:
+        """
+        Start decoding in the background if it isn't done or running already
+
+        Returns:
+            Future resolving to the decoded file path
+        """
+        with self._lock:
+            future = self._inflight.get(audio_path)
+            if future is not None:
+                return future
+            if self.is_decoded(audio_path):
+                future = Future()
+                future.set_result(self.decoded_path(audio_path))
+                return future
+            future = self._executor.submit(self._decode, audio_path)
+            self._inflight[audio_path] = future
+            return future
+
+    def decode(self, audio_path: str) -> str:
+        """
+        Decode ``audio_path`` (or wait for a prefetch in progress)
+
+        Returns:
+            Path of the decoded .npy file
+        """
+        return self.prefetch(audio_path).result()
+
+    def _decode(self, audio_path: str) -> str:
+        try:
+            npy_path = self.decoded_path(audio_path)
+            num_samples = decode_to_npy(audio_path, npy_path)
+            self._add(npy_path)
+            print(f"Decoded {audio_path}: {num_samples / SAMPLE_RATE:.0f}s of audio")
+            return npy_path
+        finally:
+            with self._lock:
+                self._inflight.pop(audio_path, None)
+
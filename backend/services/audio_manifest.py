@@ -0,0 +1,79 @@
+"""
+Per-meeting record of the uploaded audio, so finding it is one read
+instead of a directory scan
+"""
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from .result_cache import hash_file
+
+MANIFEST_PREFIX = 'manifests/'
+
+
+class AudioManifest:
+    """
+    Stores ``manifests/<meeting_id>.json`` next to the audio in a storage
+    backend, with the audio's key, size, SHA-256, format and codec.
+    """
+
+    def __init__(self, storage):
+        """
+        Args:
+            storage: Storage backend holding the uploaded audio
+        """
+        self.storage = storage
+
+    @staticmethod
+    def _key(meeting_id: str) -> str:
+        return f"{MANIFEST_PREFIX}{meeting_id}.json"
+
+    def record(self, meeting_id: str, key: str, info: Dict) -> Dict:
+        """
+        Write the manifest for a meeting's audio
+
+        Args:
+            meeting_id: Meeting identifier
+            key: Storage key of the audio
+            info: size, sha256, format, codec and optionally filename, as
+                  returned by spool_stream / ResumableUploadManager.complete
+
+        Returns:
+            The manifest
+        """
+        manifest = {
+            'meeting_id': meeting_id,
+            'key': key,
+            'filename': info.get('filename'),
+            'size': info['size'],
+            'sha256': info['sha256'],
+            'format': info.get('format'),
+            'codec': info.get('codec'),
+            'created_at': datetime.now().isoformat()
+        }
+        self.storage.put_bytes(self._key(meeting_id),
+                               json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+        return manifest
+
+    def get(self, meeting_id: str) -> Optional[Dict]:
+        """The manifest for a meeting, or None"""
+        try:
+            return json.loads(self.storage.get_bytes(self._key(meeting_id)))
+        except FileNotFoundError:
+            return None
+
+    def backfill(self, meeting_id: str, key: str, local_path: str) -> Dict:
+        """
+        Create the manifest for audio uploaded before manifests existed
+
+        Args:
+            meeting_id: Meeting identifier
+            key: Storage key of the audio
+            local_path: Local copy of the audio, hashed once here
+        """
+        return self.record(meeting_id, key, {
+            'size': os.path.getsize(local_path),
+            'sha256': hash_file(local_path),
+            'format': key.rsplit('.', 1)[-1].lower() if '.' in key else None
+        })
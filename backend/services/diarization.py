@@ -0,0 +1,443 @@
+"""
+Speaker diarization on the CPU: MFCC embeddings over the speech spans,
+clustered into speakers, then merged into the transcript segments
+"""
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_chunking import SAMPLE_RATE
+from .vad import detect_speech
+
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.01
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20
+
+# Frames turned into MFCCs at once; bounds the memory of the framed copy
+# (about 25 MB of float32 per block) whatever the recording length
+BLOCK_FRAMES = 6000
+
+# Windows are first grouped into at most this many clusters with k-means,
+# which is linear in the number of windows; only the cluster centroids go
+# through the agglomerative step, whose cost grows with the cube
+MICRO_CLUSTERS = 64
+
+# Speakers holding less than this share of the speech are folded into the
+# closest other speaker; they are almost always noise, laughter or crosstalk
+MIN_SPEAKER_SHARE = 0.03
+
+# Frames more than 20 dB below a span's loud frames don't count towards
+# its embeddings (in units of MFCC coefficient 0)
+VOICED_RANGE = 20 / 10 * np.log(10) * np.sqrt(N_MELS)
+
+# Neighbour whose distance sets each cluster's scale in the affinity
+NEIGHBOURS = 7
+
+SPEAKER_LABEL = 'Speaker {}'
+
+_mel_cache: Dict[Tuple[int, int], np.ndarray] = {}
+
+
+def _mel_filterbank(sample_rate: int, n_fft: int = N_FFT, n_mels: int = N_MELS) -> np.ndarray:
+    """Triangular mel filters, shape (n_mels, n_fft // 2 + 1)"""
+    key = (sample_rate, n_fft)
+    if key not in _mel_cache:
+        def to_mel(hz):
+            return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+        def to_hz(mel):
+            return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+        edges = to_hz(np.linspace(to_mel(20.0), to_mel(min(7600.0, sample_rate / 2)), n_mels + 2))
+        bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+        lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+        rising = (bins - lower) / (center - lower)
+        falling = (upper - bins) / (upper - center)
+        _mel_cache[key] = np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+    return _mel_cache[key]
+
+
+def _dct_matrix(n_mels: int = N_MELS, n_mfcc: int = N_MFCC) -> np.ndarray:
+    """Orthonormal DCT-II basis, shape (n_mels, n_mfcc)"""
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[None, :]
+    basis = np.cos(np.pi / n_mels * (n[:, None] + 0.5) * k) * np.sqrt(2.0 / n_mels)
+    basis[:, 0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+
+def mfcc(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Mel-frequency cepstral coefficients of a recording
+
+    Args:
+        audio: Mono float32 samples
+        sample_rate: Sample rate of ``audio``
+
+    Returns:
+        Array of shape (frames, N_MFCC), one row per 10 ms; column 0 is the
+        frame's overall log energy
+    """
+    frame_length = int(FRAME_SECONDS * sample_rate)
+    hop = int(HOP_SECONDS * sample_rate)
+    if len(audio) < frame_length:
+        return np.zeros((0, N_MFCC), dtype=np.float32)
+
+    emphasized = np.empty(len(audio), dtype=np.float32)
+    emphasized[0] = audio[0]
+    np.subtract(audio[1:], 0.97 * audio[:-1], out=emphasized[1:])
+    frames = np.lib.stride_tricks.sliding_window_view(emphasized, frame_length)[::hop]
+
+    window = np.hamming(frame_length).astype(np.float32)
+    filters = _mel_filterbank(sample_rate)
+    dct = _dct_matrix()
+    out = np.empty((len(frames), N_MFCC), dtype=np.float32)
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES] * window
+        power = np.abs(np.fft.rfft(block, n=N_FFT)) ** 2
+        log_mel = np.log(power.astype(np.float32) @ filters.T + 1e-8)
+        out[start:start + len(block)] = log_mel @ dct
+    return out
+
+
+def window_embeddings(features: np.ndarray, voiced: np.ndarray, window: int,
+                      hop: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean of the voiced frames in every sliding window
+
+    Uses running sums, so the cost doesn't depend on the window length. A
+    sequence shorter than ``window`` gives a single embedding over all of
+    it. Quiet frames (pauses between words, breaths) are left out: their
+    spectrum is the room's rather than the speaker's, and windows
+    containing many of them would otherwise form clusters of their own.
+
+    Args:
+        features: Per-frame features
+        voiced: Boolean mask of the frames to average
+        window: Frames per window
+        hop: Frames between window starts
+
+    Returns:
+        (embeddings of shape (windows, coefficients), window start frames);
+        windows without a voiced frame are dropped
+    """
+    count = len(features)
+    if count == 0:
+        return np.zeros((0, features.shape[1]), dtype=np.float32), np.zeros(0, dtype=int)
+    window = min(window, count)
+    starts = np.arange(0, count - window + 1, hop)
+    if starts[-1] != count - window:
+        starts = np.append(starts, count - window)
+
+    weights = voiced.astype(np.float64)
+    zero = np.zeros((1, features.shape[1]))
+    sums = np.concatenate((zero, np.cumsum(features * weights[:, None], axis=0)))
+    counts = np.concatenate(([0.0], np.cumsum(weights)))
+    voiced_frames = counts[starts + window] - counts[starts]
+    keep = voiced_frames > 0
+    starts = starts[keep]
+    means = (sums[starts + window] - sums[starts]) / voiced_frames[keep, None]
+    return means.astype(np.float32), starts
+
+
+def _squared_distances(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Squared Euclidean distance of every point to every centroid"""
+    return (np.square(points).sum(axis=1)[:, None] - 2 * points @ centroids.T
+            + np.square(centroids).sum(axis=1)[None, :])
+
+
+def _kmeans(points: np.ndarray, k: int, iterations: int = 15, seed: int = 0) -> np.ndarray:
+    """
+    k-means with k-means++ seeding
+
+    Returns:
+        Cluster index of each point, numbered from 0 without gaps
+    """
+    rng = np.random.default_rng(seed)
+    centroids = [points[rng.integers(len(points))]]
+    nearest = np.square(points - centroids[0]).sum(axis=1)
+    for _ in range(1, k):
+        total = nearest.sum()
+        if total <= 0:
+            break
+        centroids.append(points[rng.choice(len(points), p=nearest / total)])
+        nearest = np.minimum(nearest, np.square(points - centroids[-1]).sum(axis=1))
+    centroids = np.array(centroids)
+
+    labels = np.zeros(len(points), dtype=int)
+    for iteration in range(iterations):
+        new_labels = np.argmin(_squared_distances(points, centroids), axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=len(centroids))
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, points)
+        occupied = counts > 0
+        centroids[occupied] = sums[occupied] / counts[occupied, None]
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def _estimate_groups(centroids: np.ndarray, sizes: np.ndarray, max_speakers: int,
+                     num_speakers: Optional[int]) -> np.ndarray:
+    """
+    Spectral clustering of the k-means centroids
+
+    The affinity of two centroids is scaled by the distance of each to its
+    NEIGHBOURS-th nearest neighbour, so dense and spread-out voices are
+    treated alike; the number of speakers is the position of the largest
+    gap between the smallest eigenvalues of the graph Laplacian.
+
+    Returns:
+        Group index of each centroid
+    """
+    count = len(centroids)
+    if count == 1:
+        return np.zeros(1, dtype=int)
+    distances = np.maximum(_squared_distances(centroids, centroids), 0.0)
+    scale = np.sqrt(np.sort(distances, axis=1)[:, min(NEIGHBOURS, count - 1)])
+    affinity = np.exp(-distances / (scale[:, None] * scale[None, :] + 1e-12))
+    weight = np.sqrt(sizes)
+    affinity *= weight[:, None] * weight[None, :]
+    degree = np.sqrt(affinity.sum(axis=1))
+    laplacian = np.eye(count) - affinity / degree[:, None] / degree[None, :]
+    eigenvalues, eigenvectors = np.linalg.eigh(laplacian)
+
+    if num_speakers:
+        groups = min(num_speakers, count)
+    else:
+        groups = int(np.argmax(np.diff(eigenvalues[:min(max_speakers, count - 1) + 1]))) + 1
+    if groups == 1:
+        return np.zeros(count, dtype=int)
+    vectors = eigenvectors[:, :groups]
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-10)
+    return _kmeans(vectors, groups)
+
+
+def cluster_speakers(embeddings: np.ndarray, max_speakers: int = 8,
+                     num_speakers: Optional[int] = None, seed: int = 0) -> np.ndarray:
+    """
+    Group window embeddings into speakers
+
+    The windows are reduced to at most MICRO_CLUSTERS k-means clusters,
+    and only those are grouped into speakers (``_estimate_groups``), so
+    the cost is O(windows * MICRO_CLUSTERS): it grows linearly with the
+    length of the meeting, never with its square.
+
+    Args:
+        embeddings: One row per window
+        max_speakers: Upper bound when the count is estimated
+        num_speakers: Exact number of speakers, when known
+
+    Returns:
+        Speaker index of every window
+    """
+    if len(embeddings) == 0:
+        return np.zeros(0, dtype=int)
+    # Give every coefficient the same weight; the higher ones vary less
+    points = (embeddings - embeddings.mean(axis=0)) / (embeddings.std(axis=0) + 1e-6)
+    labels = _kmeans(points, min(MICRO_CLUSTERS, len(points)), seed=seed)
+    sizes = np.bincount(labels).astype(float)
+    sums = np.zeros((len(sizes), points.shape[1]))
+    np.add.at(sums, labels, points)
+
+    groups = _estimate_groups(sums / sizes[:, None], sizes, max_speakers, num_speakers)
+    group_sizes = np.bincount(groups, weights=sizes)
+    group_sums = np.zeros((len(group_sizes), points.shape[1]))
+    np.add.at(group_sums, groups, sums)
+
+    if not num_speakers:
+        while len(group_sizes) > 1 and group_sizes.min() < MIN_SPEAKER_SHARE * group_sizes.sum():
+            small = int(np.argmin(group_sizes))
+            centroids = group_sums / group_sizes[:, None]
+            distances = np.square(centroids - centroids[small]).sum(axis=1)
+            distances[small] = np.inf
+            into = int(np.argmin(distances))
+            group_sizes[into] += group_sizes[small]
+            group_sums[into] += group_sums[small]
+            group_sizes = np.delete(group_sizes, small)
+            group_sums = np.delete(group_sums, small, axis=0)
+
+    # Reassign every window to the closest speaker; k-means boundaries
+    # don't always fall where the speakers change
+    return np.argmin(_squared_distances(points, group_sums / group_sizes[:, None]), axis=1)
+
+
+def assign_speakers(segments: List[Dict], turns: List[Dict]) -> List[Dict]:
+    """
+    Label each segment with the speaker it overlaps most
+
+    Segments falling entirely in a gap between turns take the closest
+    turn's speaker.
+
+    Args:
+        segments: Transcript segments with start and end
+        turns: Sorted, non-overlapping speaker turns from ``Diarizer.diarize``
+
+    Returns:
+        Copies of the segments with a 'speaker' field
+    """
+    if not turns:
+        return [dict(s) for s in segments]
+    turn_starts = np.array([t['start'] for t in turns])
+    turn_ends = np.array([t['end'] for t in turns])
+    speakers = [t['speaker'] for t in turns]
+
+    labelled = []
+    for segment in segments:
+        start, end = segment['start'], max(segment['end'], segment['start'])
+        first = int(np.searchsorted(turn_ends, start, side='right'))
+        last = int(np.searchsorted(turn_starts, end, side='left'))
+        overlap: Dict[str, float] = {}
+        for i in range(first, last):
+            shared = min(end, turn_ends[i]) - max(start, turn_starts[i])
+            if shared > 0:
+                overlap[speakers[i]] = overlap.get(speakers[i], 0.0) + shared
+        if overlap:
+            speaker = max(overlap, key=overlap.get)
+        else:
+            before, after = min(first, len(turns) - 1), max(first - 1, 0)
+            gap_before = abs(start - turn_ends[after])
+            gap_after = abs(turn_starts[before] - end)
+            speaker = speakers[after] if gap_before <= gap_after else speakers[before]
+        labelled.append(dict(segment, speaker=speaker))
+    return labelled
+
+
+class Diarizer:
+    """
+    Works out who spoke when, without a neural model.
+
+    Each speech span is cut into overlapping windows; a window's embedding
+    is the mean of its MFCCs, which mostly captures the shape of the
+    speaker's vocal tract. The embeddings are clustered into speakers
+    and consecutive windows of one speaker become a turn. This separates
+    distinct voices well in a clean recording, but it is not a speaker
+    recognition model: similar voices can be merged, and a single voice
+    over a changing channel (a phone, then a laptop) can be split.
+
+    ``submit`` runs diarization on a background thread, so it can overlap
+    with Whisper on the same decoded samples; numpy and torch both release
+    the GIL for their heavy work.
+    """
+
+    def __init__(self, window_seconds: float = 1.5, hop_seconds: float = 0.75,
+                 max_speakers: int = 8, vad_options: Dict = None, workers: int = 1):
+        """
+        Args:
+            window_seconds: Audio summarized by one embedding
+            hop_seconds: Step between windows (half the window overlaps)
+            max_speakers: Upper bound on the estimated number of speakers
+            vad_options: Keyword arguments for ``detect_speech`` when no
+                         speech spans are passed in
+            workers: Recordings diarized at once by ``submit``
+        """
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.max_speakers = max_speakers
+        self.vad_options = vad_options or {}
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1),
+                                            thread_name_prefix='diarize')
+
+    @property
+    def options(self) -> Dict:
+        """Settings that change the result (part of the transcript cache key)"""
+        return {
+            'window_seconds': self.window_seconds,
+            'hop_seconds': self.hop_seconds,
+            'max_speakers': self.max_speakers
+        }
+
+    def submit(self, audio: np.ndarray, spans: List[Tuple[int, int]] = None,
+               num_speakers: int = None) -> Future:
+        """Start ``diarize`` in the background and return its Future"""
+        return self._executor.submit(self.diarize, audio, spans, num_speakers)
+
+    def diarize(self, audio: np.ndarray, spans: List[Tuple[int, int]] = None,
+                num_speakers: int = None, sample_rate: int = SAMPLE_RATE) -> Dict:
+        """
+        Find the speaker turns in a recording
+
+        Args:
+            audio: Mono float32 samples of the whole recording
+            spans: Speech (start, end) sample ranges; found with
+                   ``detect_speech`` when not given
+            num_speakers: Exact number of speakers, when known
+            sample_rate: Sample rate of ``audio``
+
+        Returns:
+            turns (sorted start, end and speaker, in seconds), speakers
+            (labels in order of first appearance) and seconds (time taken)
+        """
+        started = time.perf_counter()
+        if spans is None:
+            spans = detect_speech(audio, sample_rate, **self.vad_options)
+
+        hop = HOP_SECONDS * sample_rate
+        window_frames = max(int(round(self.window_seconds / HOP_SECONDS)), 1)
+        hop_frames = max(int(round(self.hop_seconds / HOP_SECONDS)), 1)
+        # A third of a window is too little to say anything about the voice
+        min_frames = max(window_frames // 3, 1)
+
+        # Only the window means are kept, never the frames of the whole
+        # recording
+        embeddings, windows = [], []
+        for index, (start, end) in enumerate(spans):
+            features = mfcc(audio[start:end], sample_rate)
+            if len(features) < min_frames:
+                continue
+            # Coefficient 0 is loudness: it picks the voiced frames, but says
+            # more about the distance to the microphone than about the voice
+            loudness = features[:, 0]
+            voiced = loudness > np.percentile(loudness, 90) - VOICED_RANGE
+            span_embeddings, starts = window_embeddings(features[:, 1:], voiced,
+                                                        window_frames, hop_frames)
+            embeddings.append(span_embeddings)
+            length = min(window_frames, len(features))
+            windows.extend((index, int(s), int(s) + length, len(features)) for s in starts)
+        if not embeddings:
+            return {'turns': [], 'speakers': [], 'seconds': round(time.perf_counter() - started, 3)}
+        labels = cluster_speakers(np.concatenate(embeddings), self.max_speakers, num_speakers)
+
+        # Each window owns the audio closer to its centre than to its
+        # neighbours'; adjacent windows of one speaker are joined into a turn
+        order: Dict[int, str] = {}
+        turns: List[Dict] = []
+        for i, (index, first, last, frames) in enumerate(windows):
+            span_start = spans[index][0]
+            same_span_before = i > 0 and windows[i - 1][0] == index
+            same_span_after = i + 1 < len(windows) and windows[i + 1][0] == index
+            begin = (first + windows[i - 1][2]) / 2 if same_span_before else 0
+            finish = (last + windows[i + 1][1]) / 2 if same_span_after else frames
+            begin = (span_start + begin * hop) / sample_rate
+            finish = min(span_start + finish * hop + (FRAME_SECONDS - HOP_SECONDS) * sample_rate,
+                         spans[index][1]) / sample_rate
+            speaker = order.setdefault(int(labels[i]), SPEAKER_LABEL.format(len(order) + 1))
+            if turns and turns[-1]['speaker'] == speaker and same_span_before:
+                turns[-1]['end'] = round(finish, 3)
+            else:
+                turns.append({'start': round(begin, 3), 'end': round(finish, 3), 'speaker': speaker})
+        return {
+            'turns': turns,
+            'speakers': list(order.values()),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+
+
+def diarize(audio: np.ndarray, spans: List[Tuple[int, int]] = None, num_speakers: int = None) -> Dict:
+    """
+    Convenience function to diarize samples with the default settings
+
+    Args:
+        audio: Mono 16 kHz float32 samples
+        spans: Optional speech spans
+        num_speakers: Exact number of speakers, when known
+
+    Returns:
+        Diarization result dictionary
+    """
+    return Diarizer().diarize(audio, spans, num_speakers)
@@ -0,0 +1,53 @@
+"""
+Unique, time-sortable meeting ids (ULIDs)
+"""
+import os
+import re
+import threading
+import time
+
+# Crockford's base32: no I, L, O or U, so ids read back unambiguously
+_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_RANDOM_BITS = 80
+
+# New ULIDs, and the YYYYMMDD_HHMMSS ids of meetings uploaded before them
+MEETING_ID_PATTERN = re.compile(r'^(?:[0-9A-HJKMNP-TV-Z]{26}|\d{8}_\d{6})$')
+LEGACY_ID_PATTERN = re.compile(r'^\d{8}_\d{6}$')
+
+_lock = threading.Lock()
+_last = [0, 0]  # millisecond timestamp and random part of the last id
+
+
+def new_ulid() -> str:
+    """
+    Generate a ULID: 48 bits of milliseconds since the epoch, then 80
+    random bits, as 26 base32 characters
+
+    Ids sort by creation time. Within one millisecond the random part is
+    incremented instead of redrawn, so ids from this process stay unique
+    and ordered however fast they are made.
+    """
+    with _lock:
+        now = int(time.time() * 1000)
+        if now <= _last[0]:
+            now = _last[0]
+            random_part = _last[1] + 1
+            if random_part >= 1 << _RANDOM_BITS:
+                now += 1
+                random_part = int.from_bytes(os.urandom(10), 'big')
+        else:
+            random_part = int.from_bytes(os.urandom(10), 'big')
+        _last[0], _last[1] = now, random_part
+
+    value = (now << _RANDOM_BITS) | random_part
+    return ''.join(_ALPHABET[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def is_meeting_id(value: str) -> bool:
+    """Whether ``value`` looks like a meeting id (ULID or legacy timestamp)"""
+    return bool(MEETING_ID_PATTERN.match(value or ''))
+
+
+def is_legacy_meeting_id(value: str) -> bool:
+    """Whether ``value`` is a YYYYMMDD_HHMMSS id from before ULIDs"""
+    return bool(LEGACY_ID_PATTERN.match(value or ''))
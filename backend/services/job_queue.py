@@ -0,0 +1,268 @@
+"""
+Background job queue for long-running transcription and summarization work
+"""
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised when a pool cannot accept more queued work"""
+
+
+class Job:
+    """A unit of work that moves through one or more worker pools"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, kind: str, meeting_id: str, stages: List[Tuple[str, Callable]],
+                 params: Dict = None):
+        """
+        Args:
+            kind: Job type (e.g. 'transcribe', 'process')
+            meeting_id: Meeting the job belongs to
+            stages: Ordered list of (pool_name, callable) pairs. Each callable
+                    receives the job and stores its output in ``job.result``
+            params: Arbitrary request parameters made available to the stages
+        """
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.meeting_id = meeting_id
+        self.stages = stages
+        self.params = params or {}
+        self.result: Dict = {}
+        self.status = Job.QUEUED
+        self.stage = stages[0][0] if stages else None
+        self.stage_index = 0
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stage_timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update_progress(self, fraction: float):
+        """
+        Report progress within the current stage
+
+        Args:
+            fraction: Completed fraction of the current stage (0.0 - 1.0)
+        """
+        fraction = min(max(fraction, 0.0), 1.0)
+        with self._lock:
+            self.progress = (self.stage_index + fraction) / max(len(self.stages), 1)
+
+    @staticmethod
+    def _isoformat(ts: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        """Serialize job status for the API"""
+        with self._lock:
+            now = time.time()
+            end = self.finished_at or now
+            data = {
+                'job_id': self.job_id,
+                'kind': self.kind,
+                'meeting_id': self.meeting_id,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': round(self.progress, 3),
+                'created_at': self._isoformat(self.created_at),
+                'started_at': self._isoformat(self.started_at),
+                'finished_at': self._isoformat(self.finished_at),
+                'timings': {
+                    'queued_seconds': round((self.started_at or now) - self.created_at, 3),
+                    'run_seconds': round(end - self.started_at, 3) if self.started_at else 0.0,
+                    'stages': {k: round(v, 3) for k, v in self.stage_timings.items()},
+                },
+            }
+            if self.error:
+                data['error'] = self.error
+            if include_result and self.status == Job.DONE:
+                data['result'] = self.result
+            return data
+
+
+class JobQueue:
+    """
+    Bounded worker pools that run jobs stage by stage.
+
+    Each pool has its own queue and worker threads, so a CPU-bound stage
+    (Whisper) and a network-bound stage (Gemini) can be sized independently.
+    When a stage finishes, the job is handed to the next stage's pool, which
+    frees the worker for the next job instead of idling on the LLM call.
+    """
+
+    def __init__(self, pools: Dict[str, int], max_queued: int = 100,
+                 max_finished: int = 1000, worker_init: Dict[str, Callable] = None,
+                 on_update: Callable[[Job], None] = None):
+        """
+        Args:
+            pools: Mapping of pool name to number of worker threads
+            max_queued: Maximum number of jobs waiting in each pool
+            max_finished: Number of finished jobs kept for status lookups
+            worker_init: Optional per-pool callables run once in each worker
+                         thread before it accepts work (e.g. model loading)
+            on_update: Optional callable invoked with the job whenever it
+                       starts a stage, finishes or fails
+        """
+        self.pool_sizes = dict(pools)
+        self.max_finished = max_finished
+        self.worker_init = worker_init or {}
+        self.on_update = on_update
+        self._queues = {name: queue.Queue(maxsize=max_queued) for name in pools}
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start worker threads (idempotent)"""
+        with self._start_lock:
+            if self._started:
+                return
+            for name, size in self.pool_sizes.items():
+                for i in range(size):
+                    thread = threading.Thread(
+                        target=self._worker_loop,
+                        args=(name,),
+                        name=f"{name}-worker-{i}",
+                        daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+            self._started = True
+
+    def submit(self, kind: str, meeting_id: str, stages: List[Tuple[str, Callable]],
+               params: Dict = None) -> Job:
+        """
+        Enqueue a new job
+
+        Args:
+            kind: Job type
+            meeting_id: Meeting identifier
+            stages: Ordered (pool_name, callable) stages
+            params: Request parameters for the stages
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If the first stage's pool is at capacity
+        """
+        self.start()
+        job = Job(kind, meeting_id, stages, params)
+        self._enqueue(job)
+        with self._jobs_lock:
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        """Queue depths and job counts per status"""
+        with self._jobs_lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'workers': self.pool_sizes,
+            'queued': {name: q.qsize() for name, q in self._queues.items()},
+            'jobs': counts,
+        }
+
+    def _enqueue(self, job: Job):
+        pool = job.stages[job.stage_index][0]
+        try:
+            self._queues[pool].put_nowait(job)
+        except queue.Full:
+            raise QueueFullError(f"Job queue '{pool}' is full, try again later")
+
+    def _notify(self, job: Job):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(job)
+        except Exception as e:
+            print(f"Job update listener failed: {e}")
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs beyond ``max_finished``"""
+        finished = [jid for jid, j in self._jobs.items() if j.status in (Job.DONE, Job.FAILED)]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    def _worker_loop(self, pool: str):
+        init = self.worker_init.get(pool)
+        if init is not None:
+            try:
+                init()
+            except Exception as e:
+                print(f"Worker init failed for pool '{pool}': {e}")
+                traceback.print_exc()
+
+        work_queue = self._queues[pool]
+        while True:
+            job = work_queue.get()
+            try:
+                self._run_stage(job)
+            finally:
+                work_queue.task_done()
+
+    def _run_stage(self, job: Job):
+        pool, func = job.stages[job.stage_index]
+        with job._lock:
+            job.status = Job.RUNNING
+            job.stage = pool
+            if job.started_at is None:
+                job.started_at = time.time()
+        self._notify(job)
+
+        stage_start = time.time()
+        try:
+            func(job)
+        except Exception as e:
+            print(f"Job {job.job_id} ({job.kind}) failed in stage '{pool}': {e}")
+            traceback.print_exc()
+            with job._lock:
+                job.stage_timings[pool] = time.time() - stage_start
+                job.status = Job.FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+            self._notify(job)
+            return
+
+        with job._lock:
+            job.stage_timings[pool] = time.time() - stage_start
+            job.stage_index += 1
+            job.progress = job.stage_index / len(job.stages)
+            done = job.stage_index >= len(job.stages)
+            if done:
+                job.status = Job.DONE
+                job.finished_at = time.time()
+            else:
+                job.status = Job.QUEUED
+                job.stage = job.stages[job.stage_index][0]
+
+        if done:
+            self._notify(job)
+        else:
+            # Hand off to the next pool; block rather than drop an
+            # in-flight job if that pool is momentarily full.
+            next_pool = job.stages[job.stage_index][0]
+            self._queues[next_pool].put(job)
@@ -0,0 +1,403 @@
+"""
+Asyncio LLM client with concurrency limits, rate limiting, retries,
+deadlines and coalescing of identical prompts
+"""
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from .structured_output import StreamingJSONParser
+
+
+class LLMError(Exception):
+    """A model call failed and will not be retried"""
+
+
+class RetryableLLMError(LLMError):
+    """A model call failed in a way worth retrying (rate limit, 5xx, reset)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """A model call did not finish before its deadline"""
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter for coroutines
+
+    Allows bursts of up to ``capacity`` calls and ``rate`` calls per second
+    on average.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a call may start"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class GeminiTransport:
+    """Calls Google Gemini through google-generativeai"""
+
+    def __init__(self, api_key: str, model_name: str = 'gemini-2.5-flash'):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        try:
+            from google.api_core import exceptions
+            self._retryable = (exceptions.TooManyRequests, exceptions.ResourceExhausted,
+                               exceptions.ServiceUnavailable, exceptions.InternalServerError,
+                               exceptions.DeadlineExceeded)
+        except ImportError:
+            self._retryable = ()
+
+    @staticmethod
+    def _config(schema: Optional[Dict]) -> Optional[Dict]:
+        if schema is None:
+            return None
+        return {'response_mime_type': 'application/json', 'response_schema': schema}
+
+    async def generate(self, prompt: str, schema: Optional[Dict] = None) -> str:
+        try:
+            response = await self.model.generate_content_async(
+                prompt, generation_config=self._config(schema))
+        except self._retryable as e:
+            raise RetryableLLMError(str(e))
+        return response.text
+
+    async def stream(self, prompt: str, schema: Optional[Dict] = None):
+        """Yield the response text chunk by chunk as the model generates it"""
+        try:
+            response = await self.model.generate_content_async(
+                prompt, generation_config=self._config(schema), stream=True)
+            async for chunk in response:
+                yield chunk.text
+        except self._retryable as e:
+            raise RetryableLLMError(str(e))
+
+
+class HTTPTransport:
+    """
+    Calls a JSON completion endpoint over a pool of keep-alive connections
+
+    Sends ``{"prompt": ...}`` and reads ``text`` (or ``content``, as returned
+    by a llama.cpp server) from the response. Structured calls add the
+    schema as ``json_schema``, which a llama.cpp server enforces. Used for self-hosted models and
+    for the fake server in examples/fake_llm_server.py.
+    """
+
+    def __init__(self, url: str, pool_size: int = 8, model_name: str = 'http',
+                 timeout: float = 120.0):
+        """
+        Args:
+            url: Endpoint URL, e.g. http://localhost:8089/generate
+            pool_size: Connections kept open to the endpoint
+            model_name: Name reported for cache keys and results
+            timeout: Socket timeout in seconds. The client's deadline only
+                     abandons the waiting coroutine, so without this a hung
+                     endpoint would keep the worker thread blocked; use the
+                     client's timeout.
+        """
+        parts = urlsplit(url)
+        self.model_name = model_name
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path or '/'
+        self._pool: 'queue.LifoQueue[http.client.HTTPConnection]' = queue.LifoQueue()
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            cls = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+            return cls(self._host, self._port, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection):
+        if self._pool.qsize() < self.pool_size:
+            self._pool.put(conn)
+        else:
+            conn.close()
+
+    def _post(self, prompt: str, schema: Optional[Dict] = None) -> str:
+        payload = {'prompt': prompt}
+        if schema is not None:
+            payload['json_schema'] = schema
+        conn = self._connection()
+        try:
+            conn.request('POST', self._path, body=json.dumps(payload),
+                         headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            body = response.read()
+        except socket.timeout:
+            # The connection may still receive the late response; never reuse it
+            conn.close()
+            raise RetryableLLMError(f"No response within {self.timeout:g}s")
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise RetryableLLMError(f"Connection error: {e}")
+
+        self._release(conn)
+        if response.status == 429 or response.status >= 500:
+            retry_after = response.getheader('Retry-After')
+            raise RetryableLLMError(
+                f"HTTP {response.status}",
+                retry_after=float(retry_after) if retry_after and retry_after.replace('.', '', 1).isdigit() else None
+            )
+        if response.status != 200:
+            raise LLMError(f"HTTP {response.status}: {body[:200]!r}")
+        data = json.loads(body)
+        return data.get('text', data.get('content', ''))
+
+    async def generate(self, prompt: str, schema: Optional[Dict] = None) -> str:
+        # http.client is blocking; each in-flight call holds one pooled
+        # connection on a worker thread
+        return await asyncio.get_running_loop().run_in_executor(None, self._post, prompt, schema)
+
+
+class LlamaCppTransport:
+    """
+    Runs a local GGUF model on the CPU through llama-cpp-python
+
+    Needs no network access. The model handles one prompt at a time, so
+    calls are serialized.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int = 8192, n_threads: Optional[int] = None,
+                 max_tokens: int = 1024):
+        """
+        Args:
+            model_path: Path to a .gguf model file
+            n_ctx: Context window in tokens; prompts must fit in it
+            n_threads: CPU threads (default: llama.cpp's choice)
+            max_tokens: Longest response generated
+        """
+        from llama_cpp import Llama
+
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        self.model_name = f"llama.cpp:{os.path.basename(model_path)}"
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def _complete(self, prompt: str, schema: Optional[Dict] = None) -> str:
+        # A schema is compiled into a grammar, so the output always parses
+        response_format = {'type': 'json_object', 'schema': schema} if schema is not None else None
+        with self._lock:
+            output = self.llm.create_chat_completion(
+                messages=[{'role': 'user', 'content': prompt}],
+                max_tokens=self.max_tokens,
+                temperature=0.2,
+                response_format=response_format
+            )
+        return output['choices'][0]['message']['content']
+
+    async def generate(self, prompt: str, schema: Optional[Dict] = None) -> str:
+        return await asyncio.get_running_loop().run_in_executor(None, self._complete, prompt, schema)
+
+
+class AsyncLLMClient:
+    """
+    Shared client for all model calls made by the service.
+
+    Calls run on an event loop in a background thread, so synchronous
+    callers (Flask handlers, job workers, map-reduce threads) share one
+    set of limits:
+
+    * at most ``max_concurrency`` calls in flight
+    * at most ``rate_per_second`` calls started per second (token bucket)
+    * retries on rate limits and transient errors with exponential backoff
+      and full jitter
+    * a deadline per call that covers every retry
+    * identical prompts in flight at the same time share a single call
+
+    Calls with a JSON schema ask the transport for schema-constrained
+    output. When the transport can stream, the response is checked as it
+    arrives and the stream is dropped once the object is complete or
+    broken.
+    """
+
+    def __init__(self, transport, max_concurrency: int = 8,
+                 rate_per_second: Optional[float] = None, burst: Optional[int] = None,
+                 max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 20.0,
+                 timeout: float = 120.0,
+                 on_call: Optional[Callable[[float, str, str], None]] = None):
+        """
+        Args:
+            transport: Object with ``async generate(prompt, schema=None) -> str``,
+                       ``model_name`` and optionally ``stream(prompt, schema=None)``
+            max_concurrency: Calls in flight at once
+            rate_per_second: Average call start rate (None for no limit)
+            burst: Calls that may start at once after an idle period
+            max_retries: Retries after the first attempt
+            base_delay: First backoff delay in seconds
+            max_delay: Backoff cap in seconds
+            timeout: Default deadline per call in seconds, retries included
+            on_call: Called after each successful model call with its
+                     duration in seconds, the prompt and the response
+                     (for metrics); runs on the client's event loop
+        """
+        self.transport = transport
+        self.model_name = transport.model_name
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.on_call = on_call
+        self._stats = {'calls': 0, 'coalesced': 0, 'retries': 0, 'timeouts': 0, 'failures': 0,
+                       'streams_aborted': 0}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name='llm-client', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        # Created on the loop's own thread so they bind to it
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(self.rate_per_second, self.burst) if self.rate_per_second else None
+        # Room for every concurrent call; HTTPTransport blocks a thread per call
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='llm-io'))
+        self._ready.set()
+        self._loop.run_forever()
+
+    def generate(self, prompt: str, timeout: Optional[float] = None,
+                 schema: Optional[Dict] = None) -> str:
+        """
+        Blocking call for synchronous code
+
+        Args:
+            prompt: Prompt text
+            timeout: Deadline in seconds, retries included (default ``self.timeout``)
+            schema: JSON schema the response should follow
+
+        Returns:
+            The model's response text
+
+        Raises:
+            LLMTimeoutError: If the deadline passed
+            LLMError: If the call failed for good
+        """
+        future = asyncio.run_coroutine_threadsafe(self.agenerate(prompt, timeout, schema), self._loop)
+        return future.result()
+
+    async def agenerate(self, prompt: str, timeout: Optional[float] = None,
+                        schema: Optional[Dict] = None) -> str:
+        """Coroutine version of ``generate``; must run on this client's loop"""
+        key_text = prompt if schema is None else prompt + json.dumps(schema, sort_keys=True)
+        key = hashlib.sha256(key_text.encode('utf-8')).hexdigest()
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self._stats['coalesced'] += 1
+            return await asyncio.shield(shared)
+
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        task = asyncio.ensure_future(self._call(prompt, deadline, schema))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _call(self, prompt: str, deadline: float, schema: Optional[Dict]) -> str:
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    if self._bucket is not None:
+                        await asyncio.wait_for(self._bucket.acquire(), self._remaining(deadline))
+                    self._stats['calls'] += 1
+                    started = time.perf_counter()
+                    response = await asyncio.wait_for(self._invoke(prompt, schema),
+                                                      self._remaining(deadline))
+                    if self.on_call is not None:
+                        self.on_call(time.perf_counter() - started, prompt, response)
+                    return response
+            except asyncio.TimeoutError:
+                self._stats['timeouts'] += 1
+                raise LLMTimeoutError('Model call timed out')
+            except RetryableLLMError as e:
+                if attempt >= self.max_retries:
+                    self._stats['failures'] += 1
+                    raise LLMError(f"Giving up after {attempt + 1} attempts: {e}")
+                # Full jitter keeps clients that failed together from retrying together
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                if time.monotonic() + delay >= deadline:
+                    self._stats['timeouts'] += 1
+                    raise LLMTimeoutError(f"Model call timed out while retrying: {e}")
+                print(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                self._stats['retries'] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+            except Exception:
+                self._stats['failures'] += 1
+                raise
+
+    async def _invoke(self, prompt: str, schema: Optional[Dict]) -> str:
+        if schema is None or not hasattr(self.transport, 'stream'):
+            return await self.transport.generate(prompt, schema)
+
+        parser = StreamingJSONParser()
+        chunks = []
+        stream = self.transport.stream(prompt, schema)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if not parser.feed(chunk):
+                    # Complete or broken; the rest of the stream is of no use
+                    if parser.error:
+                        self._stats['streams_aborted'] += 1
+                    break
+        finally:
+            await stream.aclose()
+        return ''.join(chunks)
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return remaining
+
+    def stats(self) -> Dict:
+        """Call counters and current load"""
+        return dict(self._stats, in_flight=len(self._inflight),
+                    max_concurrency=self.max_concurrency,
+                    rate_per_second=self.rate_per_second)
@@ -0,0 +1,178 @@
+"""
+SQLite index of meeting metadata so listings don't read every meeting file
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class MeetingIndex:
+    """
+    One row of list-level metadata per meeting, maintained on every save.
+
+    Listing, sorting and filtering read only this table, so the cost of
+    ``GET /api/meetings`` depends on the page size rather than on the total
+    size of all transcripts.
+    """
+
+    SORT_COLUMNS = {'timestamp', 'summary_timestamp', 'duration', 'meeting_id', 'updated_at'}
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS meetings (
+                    meeting_id TEXT PRIMARY KEY,
+                    timestamp TEXT,
+                    summary_timestamp TEXT,
+                    has_transcript INTEGER NOT NULL DEFAULT 0,
+                    has_summary INTEGER NOT NULL DEFAULT 0,
+                    duration REAL,
+                    language TEXT,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_meetings_timestamp ON meetings (timestamp)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_meetings_language ON meetings (language)')
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps this safe to use from
+        # request threads and job workers alike
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_from_data(meeting_id: str, data: Dict) -> Tuple:
+        segments = data.get('segments') or []
+        duration = data.get('duration')
+        if duration is None and segments:
+            duration = max(s.get('end', 0) for s in segments)
+        return (
+            meeting_id,
+            data.get('timestamp'),
+            data.get('summary_timestamp'),
+            int('transcript' in data),
+            int('summary' in data),
+            duration,
+            data.get('language'),
+            time.time()
+        )
+
+    def upsert(self, meeting_id: str, data: Dict):
+        """
+        Insert or update the index row for a meeting
+
+        Args:
+            meeting_id: Meeting identifier
+            data: Full meeting record as saved
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO meetings VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                self._row_from_data(meeting_id, data)
+            )
+
+    def delete(self, meeting_id: str):
+        """Remove a meeting from the index"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM meetings WHERE meeting_id = ?', (meeting_id,))
+
+    def count(self) -> int:
+        """Number of indexed meetings"""
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM meetings').fetchone()[0]
+
+    def query(self, limit: int = 50, offset: int = 0, sort: str = 'timestamp',
+              order: str = 'desc', has_transcript: Optional[bool] = None,
+              has_summary: Optional[bool] = None, language: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """
+        Return one page of meetings
+
+        Args:
+            limit: Page size
+            offset: Rows to skip
+            sort: Column to sort by (one of SORT_COLUMNS)
+            order: 'asc' or 'desc'
+            has_transcript: Filter on transcript presence
+            has_summary: Filter on summary presence
+            language: Filter on detected language
+            since: Only meetings with timestamp >= this ISO string
+            until: Only meetings with timestamp < this ISO string
+
+        Returns:
+            Tuple of (meetings on this page, total matching meetings)
+        """
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort}'. Allowed: {', '.join(sorted(self.SORT_COLUMNS))}")
+        direction = 'ASC' if order.lower() == 'asc' else 'DESC'
+
+        clauses, params = [], []
+        if has_transcript is not None:
+            clauses.append('has_transcript = ?')
+            params.append(int(has_transcript))
+        if has_summary is not None:
+            clauses.append('has_summary = ?')
+            params.append(int(has_summary))
+        if language:
+            clauses.append('language = ?')
+            params.append(language)
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        with self._connect() as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM meetings {where}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT * FROM meetings {where} ORDER BY {sort} {direction}, meeting_id {direction} '
+                f'LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+
+        meetings = [{
+            'meeting_id': row['meeting_id'],
+            'timestamp': row['timestamp'],
+            'summary_timestamp': row['summary_timestamp'],
+            'has_transcript': bool(row['has_transcript']),
+            'has_summary': bool(row['has_summary']),
+            'duration': row['duration'],
+            'language': row['language']
+        } for row in rows]
+        return meetings, total
+
+    def rebuild(self, meeting_ids: Iterable[str], load_fn) -> int:
+        """
+        Index the given meetings
+
+        Used once to backfill meetings saved before the index existed.
+
+        Args:
+            meeting_ids: Ids of the stored meetings
+            load_fn: Callable returning the meeting dict for an id
+
+        Returns:
+            Number of meetings indexed
+        """
+        indexed = 0
+        for meeting_id in meeting_ids:
+            data = load_fn(meeting_id)
+            if data:
+                self.upsert(meeting_id, data)
+                indexed += 1
+        return indexed
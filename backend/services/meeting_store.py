@@ -0,0 +1,272 @@
+"""
+Meeting storage: compact JSON and columnar segment files that can be read
+in part, on any storage backend
+"""
+import hashlib
+import json
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .storage import LocalStorage
+
+SEGMENTS_MAGIC = b'MSEG'
+
+# Segments files live under their own prefix so the top level holds only
+# meeting documents, which is all a listing needs to read
+SEGMENTS_PREFIX = 'segments/'
+
+# Segments whose text is compressed together; a time-range read only
+# decompresses the blocks it touches
+SEGMENT_BLOCK_SIZE = 256
+
+# Bytes fetched by the first read of a segments file; enough for the
+# header and time columns of most meetings, so a read takes one request
+# for the columns and one for the text
+HEAD_BYTES = 64 * 1024
+
+# Segment fields stored as columns; anything else (e.g. speaker) goes into
+# a compressed JSON side table
+_CORE_FIELDS = ('start', 'end', 'text')
+
+
+def encode_segments(segments: List[Dict], compress: bool = True) -> bytes:
+    """
+    Serialize segments into the columnar format
+
+    Layout: magic, header length (uint32), JSON header, start times and end
+    times (float64), text offsets (uint64, one per segment plus one), block
+    offsets (uint64), the text blocks, then the optional extras table.
+    """
+    count = len(segments)
+    texts = [s.get('text', '').encode('utf-8') for s in segments]
+    offsets = np.zeros(count + 1, dtype='<u8')
+    if count:
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+
+    blocks = []
+    for first in range(0, count, SEGMENT_BLOCK_SIZE):
+        raw = b''.join(texts[first:first + SEGMENT_BLOCK_SIZE])
+        blocks.append(zlib.compress(raw, 6) if compress else raw)
+    block_offsets = np.zeros(len(blocks) + 1, dtype='<u8')
+    if blocks:
+        np.cumsum([len(b) for b in blocks], out=block_offsets[1:])
+
+    extra_rows = [{k: v for k, v in s.items() if k not in _CORE_FIELDS} for s in segments]
+    extras = b''
+    if any(extra_rows):
+        extras = zlib.compress(json.dumps(extra_rows, separators=(',', ':')).encode('utf-8'))
+
+    header = json.dumps({
+        'version': 1,
+        'count': count,
+        'block_size': SEGMENT_BLOCK_SIZE,
+        'compression': 'zlib' if compress else 'none',
+        'extras_bytes': len(extras)
+    }).encode('utf-8')
+    return b''.join([
+        SEGMENTS_MAGIC, struct.pack('<I', len(header)), header,
+        np.array([s.get('start', 0.0) for s in segments], dtype='<f8').tobytes(),
+        np.array([s.get('end', 0.0) for s in segments], dtype='<f8').tobytes(),
+        offsets.tobytes(), block_offsets.tobytes(), *blocks, extras
+    ])
+
+
+def read_segments(storage, key: str, start: Optional[float] = None,
+                  end: Optional[float] = None) -> List[Dict]:
+    """
+    Read segments from a columnar file, optionally only those overlapping
+    [start, end] seconds
+
+    Only the time columns are read in full; text is fetched with ranged
+    reads (and decompressed) for the blocks that hold a selected segment.
+    """
+    head = storage.get_bytes(key, 0, HEAD_BYTES)
+    if head[:4] != SEGMENTS_MAGIC:
+        raise ValueError(f"Not a segments file: {key}")
+    header_length, = struct.unpack('<I', head[4:8])
+    header = json.loads(head[8:8 + header_length])
+    count = header['count']
+    block_size = header['block_size']
+    num_blocks = (count + block_size - 1) // block_size
+
+    columns_start = 8 + header_length
+    data_start = columns_start + 8 * (3 * count + 1 + num_blocks + 1)
+    if len(head) < data_start:
+        head += storage.get_bytes(key, len(head), data_start)
+    columns = np.frombuffer(head[columns_start:data_start], dtype='<u8')
+    starts = columns[:count].view('<f8')
+    ends = columns[count:2 * count].view('<f8')
+    # Plain lists: indexing numpy arrays one element at a time is slow
+    offsets = columns[2 * count:3 * count + 1].tolist()
+    block_offsets = columns[3 * count + 1:].tolist()
+
+    selected = np.ones(count, dtype=bool)
+    if start is not None:
+        selected &= ends > start
+    if end is not None:
+        selected &= starts < end
+    indices = np.flatnonzero(selected).tolist()
+    if not indices:
+        return []
+
+    # The selected blocks are contiguous for a time range; fetch them at once
+    first_block = indices[0] // block_size
+    last_block = indices[-1] // block_size
+    base_offset = block_offsets[first_block]
+    blob = storage.get_bytes(key, data_start + base_offset, data_start + block_offsets[last_block + 1])
+    texts = {}
+    for block in sorted({i // block_size for i in indices}):
+        raw = blob[block_offsets[block] - base_offset:block_offsets[block + 1] - base_offset]
+        if header['compression'] == 'zlib':
+            raw = zlib.decompress(raw)
+        first = block * block_size
+        base = offsets[first]
+        for i in range(first, min(first + block_size, count)):
+            texts[i] = raw[offsets[i] - base:offsets[i + 1] - base].decode('utf-8')
+
+    starts = starts[indices].tolist()
+    ends = ends[indices].tolist()
+    segments = [{'start': s, 'end': e, 'text': texts[i]} for i, s, e in zip(indices, starts, ends)]
+    if header['extras_bytes']:
+        extras_start = data_start + block_offsets[-1]
+        extras = json.loads(zlib.decompress(
+            storage.get_bytes(key, extras_start, extras_start + header['extras_bytes'])))
+        for i, segment in zip(indices, segments):
+            segment.update(extras[i])
+    return segments
+
+
+def _in_range(segments: List[Dict], start: Optional[float], end: Optional[float]) -> List[Dict]:
+    """Segments overlapping [start, end]"""
+    return [s for s in segments
+            if (start is None or s['end'] > start) and (end is None or s['start'] < end)]
+
+
+class MeetingStore:
+    """
+    Stores each meeting as ``<id>.json`` plus a ``<id>.<hash>.segments`` file
+    in a storage backend (a local directory or an S3 bucket).
+
+    The JSON document holds everything but the segments and is written
+    without indentation; a transcript that is just the joined segment text
+    is rebuilt on load instead of stored twice. Segments live in a columnar file named after its
+    content hash: saving unchanged segments (as the summary stage does) skips
+    the write, and a new segments file is in place before the JSON that
+    points to it, so a reader never sees a mismatched pair. Every write
+    replaces a whole object atomically. Documents written before this format, with inline segments, are
+    still read and are converted on their next save.
+    """
+
+    def __init__(self, storage, compress: bool = True):
+        """
+        Args:
+            storage: Storage backend, or a directory for local storage
+            compress: Compress segment text with zlib
+        """
+        self.storage = LocalStorage(storage) if isinstance(storage, str) else storage
+        self.compress = compress
+
+    @staticmethod
+    def key(meeting_id: str) -> str:
+        return f"{meeting_id}.json"
+
+    def exists(self, meeting_id: str) -> bool:
+        return self.storage.exists(self.key(meeting_id))
+
+    def list(self) -> List[Dict]:
+        """Stored meetings as dicts with meeting_id, modified (POSIX time) and etag"""
+        # Keys with a '/' belong to other data kept in the same storage
+        # (segments, profiles); older segments files sit next to the documents
+        return [{'meeting_id': o['key'][:-len('.json')], 'modified': o['modified'], 'etag': o['etag']}
+                for o in self.storage.list() if o['key'].endswith('.json') and '/' not in o['key']]
+
+    def _read_document(self, meeting_id: str) -> Optional[Dict]:
+        try:
+            return json.loads(self.storage.get_bytes(self.key(meeting_id)))
+        except FileNotFoundError:
+            return None
+
+    def save(self, meeting_id: str, data: Dict):
+        """Write a meeting atomically"""
+        document = {k: v for k, v in data.items() if k != 'segments'}
+        previous = self._segments_ref(meeting_id)
+
+        if 'segments' in data:
+            payload = encode_segments(data['segments'], self.compress)
+            digest = hashlib.sha256(payload).hexdigest()[:16]
+            filename = f"{SEGMENTS_PREFIX}{meeting_id}.{digest}.segments"
+            if not self.storage.exists(filename):
+                self.storage.put_bytes(filename, payload)
+            document['_segments'] = {'file': filename, 'count': len(data['segments'])}
+            # The transcript is usually the joined segment text; don't store it twice
+            if document.get('transcript') == ' '.join(s['text'] for s in data['segments']):
+                del document['transcript']
+                document['_segments']['transcript'] = True
+
+        self.storage.put_bytes(self.key(meeting_id),
+                               json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+        if previous and previous != document.get('_segments', {}).get('file'):
+            self.storage.delete(previous)
+
+    def load(self, meeting_id: str, fields: Optional[Iterable[str]] = None,
+             start: Optional[float] = None, end: Optional[float] = None) -> Optional[Dict]:
+        """
+        Read a meeting, or part of one
+
+        Args:
+            meeting_id: Meeting identifier
+            fields: Top-level fields to return (default: all). The segments
+                    file is only opened for 'segments' or 'transcript'.
+            start: Only return segments ending after this time (seconds)
+            end: Only return segments starting before this time (seconds)
+
+        Returns:
+            The meeting dict, or None if it doesn't exist
+        """
+        fields = set(fields) if fields is not None else None
+        want_segments = fields is None or 'segments' in fields
+        want_transcript = fields is None or 'transcript' in fields
+        ranged = start is not None or end is not None
+        for attempt in range(3):
+            document = self._read_document(meeting_id)
+            if document is None:
+                return None
+            ref = document.pop('_segments', None)
+            derived = ref is not None and ref.get('transcript') and want_transcript
+            if ref is None or not (want_segments or derived):
+                break
+            try:
+                if derived:
+                    segments = read_segments(self.storage, ref['file'])
+                    document['transcript'] = ' '.join(s['text'] for s in segments)
+                    if want_segments:
+                        document['segments'] = _in_range(segments, start, end) if ranged else segments
+                elif want_segments:
+                    document['segments'] = read_segments(self.storage, ref['file'], start, end)
+                break
+            except FileNotFoundError:
+                # A concurrent save replaced the segments between our two
+                # reads; the new document points to the new file
+                if attempt == 2:
+                    raise
+
+        if not want_segments:
+            document.pop('segments', None)
+        elif ref is None and ranged and 'segments' in document:
+            document['segments'] = _in_range(document['segments'], start, end)
+
+        if fields is not None:
+            document = {k: v for k, v in document.items() if k in fields or k == 'meeting_id'}
+        return document
+
+    def _segments_ref(self, meeting_id: str) -> Optional[str]:
+        """Segments file the stored document points to, if any"""
+        try:
+            document = self._read_document(meeting_id)
+        except ValueError:
+            return None
+        return ((document or {}).get('_segments') or {}).get('file')
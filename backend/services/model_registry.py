@@ -0,0 +1,119 @@
+"""
+Registry of loaded Whisper models shared across request and worker threads
+"""
+import threading
+import traceback
+from typing import Callable, Dict, Iterable, Optional
+
+
+class ModelRegistry:
+    """
+    Loads each model size at most once and hands out the shared instance.
+
+    Models can be preloaded at startup, optionally in a background thread;
+    ``status()`` reports per-model readiness for the health endpoint.
+    """
+
+    NOT_LOADED = 'not_loaded'
+    LOADING = 'loading'
+    LOADED = 'loaded'
+    FAILED = 'failed'
+
+    def __init__(self, factory: Callable[[str], object], allowed_sizes: Iterable[str]):
+        """
+        Args:
+            factory: Callable that builds a service for a model size
+            allowed_sizes: Model sizes requests may ask for
+        """
+        self.factory = factory
+        self.allowed_sizes = set(allowed_sizes)
+        self._services: Dict[str, object] = {}
+        self._states: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self._preload_sizes: list = []
+        self._lock = threading.Lock()
+        self._size_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, model_size: str):
+        """
+        Return the service for a model size, loading it on first use
+
+        Concurrent callers asking for the same size wait for a single load.
+
+        Raises:
+            ValueError: If the size is not in ``allowed_sizes``
+        """
+        if model_size not in self.allowed_sizes:
+            raise ValueError(f"Unsupported model size '{model_size}'. "
+                             f"Allowed: {', '.join(sorted(self.allowed_sizes))}")
+
+        service = self._services.get(model_size)
+        if service is not None:
+            return service
+
+        with self._lock:
+            size_lock = self._size_locks.setdefault(model_size, threading.Lock())
+
+        with size_lock:
+            service = self._services.get(model_size)
+            if service is None:
+                self._states[model_size] = ModelRegistry.LOADING
+                try:
+                    service = self.factory(model_size)
+                except Exception as e:
+                    self._states[model_size] = ModelRegistry.FAILED
+                    self._errors[model_size] = str(e)
+                    raise
+                self._services[model_size] = service
+                self._states[model_size] = ModelRegistry.LOADED
+                self._errors.pop(model_size, None)
+        return service
+
+    def preload(self, sizes: Iterable[str], background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load a set of model sizes ahead of the first request
+
+        Args:
+            sizes: Model sizes to load
+            background: Load in a daemon thread instead of blocking
+
+        Returns:
+            The loader thread when ``background`` is True
+        """
+        sizes = [s for s in sizes if s]
+        self._preload_sizes = sizes
+        for size in sizes:
+            self._states.setdefault(size, ModelRegistry.NOT_LOADED)
+
+        def load_all():
+            for size in sizes:
+                try:
+                    self.get(size)
+                except Exception as e:
+                    print(f"Failed to preload Whisper {size} model: {e}")
+                    traceback.print_exc()
+
+        if not background:
+            load_all()
+            return None
+
+        thread = threading.Thread(target=load_all, name='model-preload', daemon=True)
+        thread.start()
+        return thread
+
+    def loaded_sizes(self):
+        """Model sizes that are currently loaded"""
+        return list(self._services)
+
+    def is_ready(self) -> bool:
+        """True once every preloaded model is loaded"""
+        return all(self._states.get(s) == ModelRegistry.LOADED for s in self._preload_sizes)
+
+    def status(self) -> Dict:
+        """Readiness and per-model load state"""
+        models = {size: self._states.get(size, ModelRegistry.NOT_LOADED)
+                  for size in sorted(self.allowed_sizes | set(self._states))}
+        status = {'ready': self.is_ready(), 'models': models}
+        if self._errors:
+            status['errors'] = dict(self._errors)
+        return status
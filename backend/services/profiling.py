@@ -0,0 +1,223 @@
+"""
+On-demand profiling: cProfile and tracemalloc around one request or job
+stage, with the results kept next to the meeting they belong to
+"""
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .ids import new_ulid
+
+PROFILE_PREFIX = 'profiles/'
+
+# tracemalloc is process-wide; it runs while at least one profile wants it
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _start_tracing(frames: int):
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+
+
+def _location(filename: str, line: int) -> str:
+    # Paths relative to the backend or site-packages are easier to read
+    for marker in ('site-packages' + os.sep, 'backend' + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            filename = filename[index + len(marker):]
+            break
+    return f"{filename}:{line}"
+
+
+class Profiler:
+    """
+    Profiles the calling thread with cProfile and, optionally, the whole
+    process's allocations with tracemalloc.
+
+    Only the thread that started the profiler is traced, so work handed to
+    other threads (map-reduce workers, the LLM client's event loop, chunk
+    processes) shows up as time spent waiting for it. The memory figures
+    cover every thread: allocations made by concurrent requests are
+    included, and the peak is the process-wide peak during the block.
+    """
+
+    def __init__(self, memory: bool = True, top: int = 40, frames: int = 1):
+        """
+        Args:
+            memory: Trace allocations with tracemalloc (slows Python code
+                    down noticeably while active)
+            top: Functions and allocation sites kept in the report
+            frames: Stack frames stored per allocation
+        """
+        self.memory = memory
+        self.top = top
+        self.frames = frames
+        self.wall_seconds = 0.0
+        self._profile = cProfile.Profile()
+        self._started = None
+        self._start_snapshot = None
+        self._end_snapshot = None
+        self._peak_bytes = None
+        self._traced_bytes = None
+
+    def start(self):
+        if self.memory:
+            _start_tracing(self.frames)
+            tracemalloc.reset_peak()
+            self._start_snapshot = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self.wall_seconds = time.perf_counter() - self._started
+        if self.memory:
+            self._end_snapshot = tracemalloc.take_snapshot()
+            self._traced_bytes, self._peak_bytes = tracemalloc.get_traced_memory()
+            _stop_tracing()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def pstats_bytes(self) -> bytes:
+        """The raw profile, in the format of ``pstats.Stats.dump_stats``"""
+        return marshal.dumps(pstats.Stats(self._profile).stats)
+
+    def report(self) -> Dict:
+        """
+        Summary of the profile
+
+        Returns:
+            wall_seconds, the top functions by cumulative and by own time,
+            and (with ``memory``) peak_bytes plus the allocation sites that
+            grew the most
+        """
+        stats = pstats.Stats(self._profile).stats
+        rows = [{
+            'function': f"{_location(filename, line)}({name})",
+            'calls': calls,
+            'primitive_calls': primitive,
+            'own_seconds': round(own, 6),
+            'cumulative_seconds': round(cumulative, 6)
+        } for (filename, line, name), (primitive, calls, own, cumulative, _) in stats.items()]
+
+        report = {
+            'wall_seconds': round(self.wall_seconds, 6),
+            'function_calls': sum(row['calls'] for row in rows),
+            'by_cumulative_time': sorted(rows, key=lambda r: -r['cumulative_seconds'])[:self.top],
+            'by_own_time': sorted(rows, key=lambda r: -r['own_seconds'])[:self.top]
+        }
+        if self._end_snapshot is not None:
+            growth = self._end_snapshot.compare_to(self._start_snapshot, 'lineno')
+            report['memory'] = {
+                'peak_bytes': self._peak_bytes,
+                'traced_bytes': self._traced_bytes,
+                'top_growth': [{
+                    'location': _location(s.traceback[0].filename, s.traceback[0].lineno),
+                    'size_bytes': s.size,
+                    'size_diff_bytes': s.size_diff,
+                    'count_diff': s.count_diff
+                } for s in growth[:self.top] if s.size_diff > 0]
+            }
+        return report
+
+
+class ProfileStore:
+    """
+    Keeps profiles in a storage backend under
+    ``profiles/<meeting_id>/<profile_id>.json`` (the report) and
+    ``.pstats`` (the raw profile, for snakeviz or ``python -m pstats``).
+    Only the newest ``keep`` profiles per meeting are kept.
+    """
+
+    def __init__(self, storage, keep: int = 10):
+        """
+        Args:
+            storage: Storage backend (the one holding meeting data)
+            keep: Profiles kept per meeting
+        """
+        self.storage = storage
+        self.keep = keep
+
+    @staticmethod
+    def _key(owner: str, profile_id: str, extension: str) -> str:
+        return f"{PROFILE_PREFIX}{owner}/{profile_id}.{extension}"
+
+    def save(self, owner: str, profiler: Profiler, meta: Dict) -> str:
+        """
+        Store a finished profile
+
+        Args:
+            owner: Meeting id, or another name for profiles of requests
+                   that don't belong to a meeting
+            profiler: A stopped Profiler
+            meta: What was profiled (route, stage, job id, ...)
+
+        Returns:
+            The new profile's id
+        """
+        profile_id = new_ulid()
+        document = dict(meta, profile_id=profile_id, owner=owner,
+                        created_at=datetime.now().isoformat(), **profiler.report())
+        self.storage.put_bytes(self._key(owner, profile_id, 'pstats'), profiler.pstats_bytes())
+        self.storage.put_bytes(self._key(owner, profile_id, 'json'),
+                               json.dumps(document, separators=(',', ':')).encode('utf-8'))
+        self._prune(owner)
+        return profile_id
+
+    def _ids(self, owner: str) -> List[str]:
+        keys = [o['key'] for o in self.storage.list(f"{PROFILE_PREFIX}{owner}/")]
+        return sorted(k.rsplit('/', 1)[1][:-len('.json')] for k in keys if k.endswith('.json'))
+
+    def _prune(self, owner: str):
+        for profile_id in self._ids(owner)[:-self.keep]:
+            for extension in ('json', 'pstats'):
+                self.storage.delete(self._key(owner, profile_id, extension))
+
+    def list(self, owner: str) -> List[Dict]:
+        """Profiles of a meeting, newest first, without the function tables"""
+        profiles = []
+        for profile_id in reversed(self._ids(owner)):
+            document = self.get(owner, profile_id)
+            if document is not None:
+                profiles.append({k: v for k, v in document.items()
+                                 if k not in ('by_cumulative_time', 'by_own_time', 'memory')})
+        return profiles
+
+    def get(self, owner: str, profile_id: str) -> Optional[Dict]:
+        """A profile's report, or None"""
+        try:
+            return json.loads(self.storage.get_bytes(self._key(owner, profile_id, 'json')))
+        except FileNotFoundError:
+            return None
+
+    def get_pstats(self, owner: str, profile_id: str) -> Optional[bytes]:
+        """A profile's raw pstats data, or None"""
+        try:
+            return self.storage.get_bytes(self._key(owner, profile_id, 'pstats'))
+        except FileNotFoundError:
+            return None
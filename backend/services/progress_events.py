@@ -0,0 +1,108 @@
+"""
+In-process event broker for streaming meeting processing progress (SSE)
+"""
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, Optional
+
+# Event types that end a stream
+TERMINAL_EVENTS = ('done', 'error')
+
+
+class EventBroker:
+    """
+    Per-meeting event history with blocking subscribers.
+
+    Every published event gets an increasing id and is kept in a bounded
+    history, so a client that connects late (or reconnects with
+    Last-Event-ID) replays what it missed before receiving live events.
+    """
+
+    def __init__(self, max_events: int = 5000, retention_seconds: int = 3600):
+        """
+        Args:
+            max_events: Events kept per meeting
+            retention_seconds: How long a finished meeting's history is kept
+        """
+        self.max_events = max_events
+        self.retention_seconds = retention_seconds
+        self._streams: Dict[str, Dict] = {}
+        # Ids are global so they keep increasing across a reset()
+        self._next_id = 1
+        self._condition = threading.Condition()
+
+    def _stream(self, meeting_id: str) -> Dict:
+        stream = self._streams.get(meeting_id)
+        if stream is None:
+            stream = {'events': deque(maxlen=self.max_events), 'finished_at': None}
+            self._streams[meeting_id] = stream
+        return stream
+
+    def has_history(self, meeting_id: str) -> bool:
+        """True if any events are buffered for the meeting"""
+        with self._condition:
+            stream = self._streams.get(meeting_id)
+            return bool(stream and stream['events'])
+
+    def reset(self, meeting_id: str):
+        """Start a fresh history, e.g. when a new job is queued for a meeting"""
+        with self._condition:
+            self._streams.pop(meeting_id, None)
+            self._expire()
+
+    def publish(self, meeting_id: str, event: str, data: Dict):
+        """
+        Append an event and wake subscribers
+
+        Args:
+            meeting_id: Meeting the event belongs to
+            event: Event type (queued, stage, progress, segments, done, error)
+            data: JSON-serializable payload
+        """
+        with self._condition:
+            stream = self._stream(meeting_id)
+            stream['events'].append((self._next_id, event, data))
+            self._next_id += 1
+            if event in TERMINAL_EVENTS:
+                stream['finished_at'] = time.time()
+            self._condition.notify_all()
+
+    def subscribe(self, meeting_id: str, last_event_id: int = 0,
+                  heartbeat_seconds: float = 15.0) -> Iterator[Optional[tuple]]:
+        """
+        Yield (id, event, data) tuples after ``last_event_id``
+
+        Yields None when ``heartbeat_seconds`` pass without an event so the
+        caller can keep the connection alive. Stops after a terminal event.
+        """
+        while True:
+            with self._condition:
+                stream = self._stream(meeting_id)
+                pending = [e for e in stream['events'] if e[0] > last_event_id]
+                if not pending:
+                    self._condition.wait(timeout=heartbeat_seconds)
+                    stream = self._stream(meeting_id)
+                    pending = [e for e in stream['events'] if e[0] > last_event_id]
+
+            if not pending:
+                yield None
+                continue
+
+            for item in pending:
+                last_event_id = item[0]
+                yield item
+                if item[1] in TERMINAL_EVENTS:
+                    return
+
+    def _expire(self):
+        cutoff = time.time() - self.retention_seconds
+        for meeting_id in [m for m, s in self._streams.items()
+                           if s['finished_at'] and s['finished_at'] < cutoff]:
+            del self._streams[meeting_id]
+
+
+def format_sse(event_id: int, event: str, data: Dict) -> str:
+    """Render one event in text/event-stream format"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
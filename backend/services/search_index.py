@@ -0,0 +1,199 @@
+"""
+Full-text search over transcripts and summaries using SQLite FTS5
+"""
+import hashlib
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Fields indexed per meeting and how strongly a match in each one ranks.
+# Summaries and decisions are short and deliberate, so a hit there is a
+# better answer to "the meeting where we decided X" than a passing mention.
+FIELD_WEIGHTS = {
+    'summary': 3.0,
+    'key_decisions': 3.0,
+    'action_items': 2.0,
+    'segments': 1.0,
+    'transcript': 1.0,
+}
+
+
+def _build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression
+
+    Every term is quoted so user input can't inject FTS syntax; a trailing
+    '*' on a term is kept as a prefix search. Terms are ANDed.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith('*')
+        term = term.rstrip('*').replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """
+    Inverted index of meeting text, maintained incrementally on save.
+
+    Each indexed item (a segment, the summary, one decision or action item)
+    is a row in ``search_items``; an external-content FTS5 table indexes
+    their text. A per-field content hash lets a save skip fields that did
+    not change, so adding a summary does not re-index the transcript.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite database file (may be shared with MeetingIndex)
+        """
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS search_items (
+                    id INTEGER PRIMARY KEY,
+                    meeting_id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    item_index INTEGER NOT NULL,
+                    start REAL,
+                    end REAL,
+                    text TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_search_items_meeting
+                    ON search_items (meeting_id, field);
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                    text, content='search_items', content_rowid='id',
+                    tokenize='porter unicode61'
+                );
+                CREATE TRIGGER IF NOT EXISTS search_items_ai AFTER INSERT ON search_items BEGIN
+                    INSERT INTO search_fts (rowid, text) VALUES (new.id, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS search_items_ad AFTER DELETE ON search_items BEGIN
+                    INSERT INTO search_fts (search_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                END;
+                CREATE TABLE IF NOT EXISTS search_state (
+                    meeting_id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (meeting_id, field)
+                );
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _items_for_field(field: str, data: Dict) -> List[tuple]:
+        """(item_index, start, end, text) rows for one field of a meeting"""
+        value = data.get(field)
+        if not value:
+            return []
+        if field == 'segments':
+            return [(i, s.get('start'), s.get('end'), s['text'])
+                    for i, s in enumerate(value) if s.get('text')]
+        if isinstance(value, list):
+            return [(i, None, None, item if isinstance(item, str) else json.dumps(item))
+                    for i, item in enumerate(value) if item]
+        return [(0, None, None, value)]
+
+    def index_meeting(self, meeting_id: str, data: Dict):
+        """
+        Bring the index up to date with a saved meeting
+
+        Only fields whose content changed since the last call are rewritten.
+        The flat transcript is indexed only when there are no segments,
+        since the segments carry the same text plus timestamps.
+        """
+        fields = [f for f in FIELD_WEIGHTS if not (f == 'transcript' and data.get('segments'))]
+
+        with self._connect() as conn:
+            stored = {row['field']: row['content_hash'] for row in conn.execute(
+                'SELECT field, content_hash FROM search_state WHERE meeting_id = ?', (meeting_id,)
+            )}
+            for field in FIELD_WEIGHTS:
+                items = self._items_for_field(field, data) if field in fields else []
+                content_hash = hashlib.sha256(
+                    json.dumps(items, ensure_ascii=False).encode('utf-8')
+                ).hexdigest()
+                if stored.get(field) == content_hash or (not items and field not in stored):
+                    continue
+
+                conn.execute('DELETE FROM search_items WHERE meeting_id = ? AND field = ?',
+                             (meeting_id, field))
+                conn.executemany(
+                    'INSERT INTO search_items (meeting_id, field, item_index, start, end, text) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(meeting_id, field, *item) for item in items]
+                )
+                conn.execute('INSERT OR REPLACE INTO search_state VALUES (?, ?, ?)',
+                             (meeting_id, field, content_hash))
+
+    def delete_meeting(self, meeting_id: str):
+        """Remove every indexed item of a meeting"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM search_items WHERE meeting_id = ?', (meeting_id,))
+            conn.execute('DELETE FROM search_state WHERE meeting_id = ?', (meeting_id,))
+
+    def is_empty(self) -> bool:
+        """True if nothing has been indexed yet"""
+        with self._connect() as conn:
+            return conn.execute('SELECT 1 FROM search_state LIMIT 1').fetchone() is None
+
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               meeting_id: Optional[str] = None) -> List[Dict]:
+        """
+        Ranked full-text search
+
+        Args:
+            query: Free text; all terms must match, 'term*' matches a prefix
+            limit: Maximum hits to return
+            offset: Hits to skip
+            meeting_id: Restrict the search to one meeting
+
+        Returns:
+            Hits ordered best first, each with meeting_id, field, index,
+            segment start/end (for segments), a highlighted snippet and score
+        """
+        match = _build_match_query(query)
+        if not match:
+            return []
+
+        weight_case = ' '.join(f"WHEN '{f}' THEN {w}" for f, w in FIELD_WEIGHTS.items())
+        sql = f'''
+            SELECT i.meeting_id, i.field, i.item_index, i.start, i.end,
+                   snippet(search_fts, 0, '[', ']', '...', 16) AS snippet,
+                   bm25(search_fts) * (CASE i.field {weight_case} ELSE 1.0 END) AS score
+            FROM search_fts
+            JOIN search_items i ON i.id = search_fts.rowid
+            WHERE search_fts MATCH ?
+        '''
+        params: list = [match]
+        if meeting_id:
+            sql += ' AND i.meeting_id = ?'
+            params.append(meeting_id)
+        # bm25() is lower-is-better, so the weighted score sorts ascending
+        sql += ' ORDER BY score LIMIT ? OFFSET ?'
+        params += [limit, offset]
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [{
+            'meeting_id': row['meeting_id'],
+            'field': row['field'],
+            'index': row['item_index'],
+            'start': row['start'],
+            'end': row['end'],
+            'snippet': row['snippet'],
+            'score': round(-row['score'], 6)
+        } for row in rows]
@@ -0,0 +1,329 @@
+"""
+Storage backends for audio uploads and meeting data: local disk and
+S3-compatible object stores (AWS S3, MinIO, ...)
+"""
+import os
+import shutil
+import tempfile
+from datetime import timezone
+from typing import Dict, Iterator, List, Optional
+
+# Streaming chunk size for downloads
+CHUNK_BYTES = 1024 * 1024
+
+
+def atomic_write(path: str, payload: bytes):
+    """
+    Replace ``path`` with ``payload`` so readers see the old or the new
+    file, never a partial one
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class LocalStorage:
+    """
+    Objects are files under a root directory; keys are relative paths.
+
+    Writes are atomic (temp file + rename). Only suitable for a single
+    node, or several nodes sharing the directory over a network filesystem.
+    """
+
+    name = 'local'
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of the object on this machine (for tools that need a file)"""
+        return self._path(key)
+
+    def put_bytes(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, data)
+
+    def put_file(self, key: str, local_path: str):
+        """Store a local file under ``key`` (a no-op if it is already there)"""
+        path = self._path(key)
+        if os.path.abspath(local_path) == os.path.abspath(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+        os.close(fd)
+        shutil.copyfile(local_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def get_bytes(self, key: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """
+        Read an object, or the byte range [start, end)
+
+        Raises:
+            FileNotFoundError: If the object doesn't exist
+        """
+        with open(self._path(key), 'rb') as f:
+            f.seek(start)
+            return f.read() if end is None else f.read(max(end - start, 0))
+
+    def stream(self, key: str, chunk_size: int = CHUNK_BYTES) -> Iterator[bytes]:
+        with open(self._path(key), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def download(self, key: str, local_path: str):
+        if os.path.abspath(local_path) != os.path.abspath(self._path(key)):
+            shutil.copyfile(self._path(key), local_path)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str = '') -> List[Dict]:
+        """
+        Objects whose key starts with ``prefix``, in the directory the
+        prefix points into (e.g. 'profiles/abc/' lists that directory;
+        subdirectories are not descended into)
+
+        Returns:
+            Dicts with key, size, modified (POSIX time) and etag (changes
+            whenever the object does)
+        """
+        directory, _, name_prefix = prefix.rpartition('/')
+        base = self._path(directory) if directory else self.root
+        objects = []
+        try:
+            entries = os.scandir(base)
+        except FileNotFoundError:
+            return []
+        with entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.startswith(name_prefix) and not entry.name.startswith('.'):
+                    stat = entry.stat()
+                    key = f"{directory}/{entry.name}" if directory else entry.name
+                    objects.append({'key': key, 'size': stat.st_size, 'modified': stat.st_mtime,
+                                    'etag': f"{stat.st_mtime_ns:x}-{stat.st_size:x}"})
+        return sorted(objects, key=lambda o: o['key'])
+
+
+class S3Storage:
+    """
+    Objects in an S3-compatible bucket, under an optional key prefix.
+
+    Large files are sent as multipart uploads, reads can ask for a byte
+    range, and downloads stream to disk. ``endpoint_url`` points the client
+    at MinIO or another S3-compatible server. Lets several API nodes behind
+    a load balancer share uploads and meeting data.
+    """
+
+    name = 's3'
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, multipart_threshold: int = 16 * 1024 * 1024,
+                 part_size: int = 8 * 1024 * 1024):
+        """
+        Args:
+            bucket: Bucket name
+            prefix: Prepended to every key, e.g. 'unthink/data/'
+            endpoint_url: S3-compatible endpoint (default: AWS)
+            region: Bucket region
+            multipart_threshold: Files at least this large use multipart upload
+            part_size: Multipart part size (S3 minimum is 5 MiB)
+
+        Credentials come from the usual AWS sources (environment, profile,
+        instance role).
+        """
+        try:
+            import boto3
+            from botocore.config import Config as BotoConfig
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise ImportError("S3 storage requires boto3. Install it with: pip install boto3")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self._client_error = ClientError
+        # boto3 clients are thread-safe; one pool serves all request threads
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region,
+                                   config=BotoConfig(max_pool_connections=32,
+                                                     retries={'max_attempts': 5, 'mode': 'adaptive'}))
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _not_found(self, error) -> bool:
+        code = error.response.get('Error', {}).get('Code')
+        return code in ('404', 'NoSuchKey', 'NotFound')
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def put_bytes(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def put_file(self, key: str, local_path: str):
+        """Upload a local file, in parts if it is large"""
+        size = os.path.getsize(local_path)
+        if size < self.multipart_threshold:
+            with open(local_path, 'rb') as f:
+                self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=f)
+            return
+
+        upload = self.client.create_multipart_upload(Bucket=self.bucket, Key=self._key(key))
+        upload_id = upload['UploadId']
+        parts = []
+        try:
+            with open(local_path, 'rb') as f:
+                number = 1
+                while True:
+                    chunk = f.read(self.part_size)
+                    if not chunk:
+                        break
+                    part = self.client.upload_part(Bucket=self.bucket, Key=self._key(key),
+                                                   UploadId=upload_id, PartNumber=number, Body=chunk)
+                    parts.append({'PartNumber': number, 'ETag': part['ETag']})
+                    number += 1
+            self.client.complete_multipart_upload(Bucket=self.bucket, Key=self._key(key),
+                                                  UploadId=upload_id,
+                                                  MultipartUpload={'Parts': parts})
+        except BaseException:
+            # Don't leave billable orphaned parts behind
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(key),
+                                               UploadId=upload_id)
+            raise
+
+    def _get(self, key: str, **kwargs):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key), **kwargs)
+        except self._client_error as e:
+            if self._not_found(e):
+                raise FileNotFoundError(key)
+            raise
+
+    def get_bytes(self, key: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """
+        Read an object, or the byte range [start, end), with a ranged GET
+
+        Raises:
+            FileNotFoundError: If the object doesn't exist
+        """
+        if start == 0 and end is None:
+            return self._get(key)['Body'].read()
+        if end is not None and end <= start:
+            return b''
+        byte_range = f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            return self._get(key, Range=byte_range)['Body'].read()
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') == 'InvalidRange':
+                return b''
+            raise
+
+    def stream(self, key: str, chunk_size: int = CHUNK_BYTES) -> Iterator[bytes]:
+        body = self._get(key)['Body']
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def download(self, key: str, local_path: str):
+        """Stream an object to a local file (written atomically)"""
+        directory = os.path.dirname(local_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self.stream(key):
+                    f.write(chunk)
+            os.replace(tmp_path, local_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._client_error as e:
+            if self._not_found(e):
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def list(self, prefix: str = '') -> List[Dict]:
+        """
+        Objects whose key starts with ``prefix``, at the level the prefix
+        points into, like LocalStorage.list: keys with a further '/' are
+        not listed, so listing meetings doesn't page through every
+        segments file and profile in the bucket
+
+        Returns:
+            Dicts with key, size, modified (POSIX time) and etag (changes
+            whenever the object does)
+        """
+        objects = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix), Delimiter='/'):
+            for item in page.get('Contents', []):
+                modified = item['LastModified']
+                if modified.tzinfo is None:
+                    modified = modified.replace(tzinfo=timezone.utc)
+                objects.append({
+                    'key': item['Key'][len(self.prefix):],
+                    'size': item['Size'],
+                    'modified': modified.timestamp(),
+                    'etag': item['ETag'].strip('"')
+                })
+        return objects
+
+
+def create_storage(backend: str, local_root: str, s3_options: Dict = None, area: str = ''):
+    """
+    Build a storage backend
+
+    Args:
+        backend: 'local' or 's3'
+        local_root: Directory used by the local backend
+        s3_options: bucket, prefix, endpoint_url and region for S3
+        area: Key prefix inside the bucket for this kind of object, e.g. 'data/'
+
+    Raises:
+        ValueError: For an unknown backend or a missing bucket
+    """
+    if backend == 'local':
+        return LocalStorage(local_root)
+    if backend == 's3':
+        options = dict(s3_options or {})
+        if not options.get('bucket'):
+            raise ValueError("S3_BUCKET is required for the s3 storage backend")
+        options['prefix'] = (options.get('prefix') or '') + area
+        return S3Storage(**options)
+    raise ValueError(f"Unknown storage backend '{backend}'. Choose from: local, s3")
@@ -0,0 +1,183 @@
+"""
+Incremental transcription of a live audio stream with a rolling window
+"""
+import wave
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .audio_chunking import SAMPLE_RATE
+
+# Characters of finalized text passed to Whisper as context for the next window
+PROMPT_CHARS = 200
+
+# Buffers shorter than this are not worth a Whisper pass
+MIN_RUN_SECONDS = 0.5
+
+
+def resample(audio: np.ndarray, rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Linearly resample mono float32 audio to ``target_rate``"""
+    if rate == target_rate or len(audio) == 0:
+        return audio
+    num_out = int(round(len(audio) * target_rate / rate))
+    positions = np.arange(num_out) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+class StreamingTranscriber:
+    """
+    Turns a stream of PCM frames into partial and final segments.
+
+    Audio accumulates in a buffer that starts at the last finalized
+    segment. Every ``step_seconds`` of new audio the buffer is transcribed
+    again. Segments that end well before the end of the buffer won't change
+    with more context, so they are finalized and the buffer is cut after
+    them. The rest are reported as partial and may still be revised. The
+    buffer is capped at ``window_seconds``, so the cost of each pass stays
+    bounded however long the meeting runs.
+    """
+
+    def __init__(self, service, language: str = None, sample_rate: int = SAMPLE_RATE,
+                 step_seconds: float = 2.0, window_seconds: float = 30.0,
+                 commit_margin_seconds: float = 1.5, audio_path: Optional[str] = None):
+        """
+        Args:
+            service: TranscriptionService whose model is used
+            language: Optional language code
+            sample_rate: Sample rate of the incoming 16-bit mono PCM
+            step_seconds: New audio needed before the next Whisper pass
+            window_seconds: Longest buffer before segments are forced final
+            commit_margin_seconds: Segments ending closer than this to the
+                                   end of the buffer stay partial
+            audio_path: Optional WAV file that receives the 16 kHz audio
+        """
+        self.service = service
+        self.language = language
+        self.sample_rate = sample_rate
+        self.step = int(step_seconds * SAMPLE_RATE)
+        self.window = int(window_seconds * SAMPLE_RATE)
+        self.margin = commit_margin_seconds
+        self.segments: List[Dict] = []
+        self.partial: List[Dict] = []
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0     # samples finalized before the buffer
+        self._received = 0         # 16 kHz samples received in total
+        self._since_run = 0
+        self._leftover = b''       # odd byte carried to the next frame
+        self._languages: Counter = Counter()
+        self._wav = None
+        if audio_path:
+            self._wav = wave.open(audio_path, 'wb')
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(SAMPLE_RATE)
+
+    def feed(self, pcm: bytes) -> List[Dict]:
+        """
+        Add a frame of 16-bit little-endian mono PCM
+
+        Returns:
+            Events produced by this frame: ``{'type': 'final'|'partial',
+            'segments': [...]}``, empty until a pass runs
+        """
+        pcm = self._leftover + pcm
+        usable = len(pcm) - len(pcm) % 2
+        self._leftover = pcm[usable:]
+        samples = np.frombuffer(pcm[:usable], dtype='<i2')
+        audio = resample(samples.astype(np.float32) / 32768.0, self.sample_rate)
+        if len(audio) == 0:
+            return []
+
+        if self._wav is not None:
+            self._wav.writeframes((np.clip(audio, -1, 1) * 32767).astype('<i2').tobytes())
+        self._buffer = np.concatenate((self._buffer, audio))
+        self._received += len(audio)
+        self._since_run += len(audio)
+
+        if self._since_run < self.step:
+            return []
+        return self._run(final=False)
+
+    def finish(self) -> List[Dict]:
+        """Transcribe whatever is buffered and finalize everything"""
+        events = self._run(final=True) if len(self._buffer) else []
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+        return events
+
+    def close(self):
+        """Release the WAV file without a final pass (e.g. on disconnect)"""
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def result(self) -> Dict:
+        """Transcript in the same shape as TranscriptionService.transcribe_audio"""
+        language = self.language
+        if not language:
+            language = self._languages.most_common(1)[0][0] if self._languages else 'unknown'
+        return {
+            'transcript': ' '.join(s['text'] for s in self.segments),
+            'segments': list(self.segments),
+            'language': language,
+            'duration': round(self._received / SAMPLE_RATE, 3)
+        }
+
+    def _prompt(self) -> Optional[str]:
+        text = ' '.join(s['text'] for s in self.segments[-10:])
+        return text[-PROMPT_CHARS:] or None
+
+    def _run(self, final: bool) -> List[Dict]:
+        self._since_run = 0
+        if not final and len(self._buffer) < MIN_RUN_SECONDS * SAMPLE_RATE:
+            return []
+
+        result = self.service.transcribe_samples(self._buffer, language=self.language,
+                                                 initial_prompt=self._prompt())
+        self._languages[result['language']] += 1
+        segments = result['segments']
+        buffer_seconds = len(self._buffer) / SAMPLE_RATE
+
+        if final:
+            commit = segments
+        else:
+            commit = []
+            for segment in segments[:-1]:
+                if segment['end'] > buffer_seconds - self.margin:
+                    break
+                commit.append(segment)
+            if not commit and segments and len(self._buffer) > self.window:
+                commit = segments[:-1] or segments
+
+        events = []
+        offset = self._buffer_start / SAMPLE_RATE
+        if commit:
+            finalized = [self._shift(s, offset, buffer_seconds) for s in commit]
+            self.segments.extend(finalized)
+            events.append({'type': 'final', 'segments': finalized})
+            cut = len(self._buffer) if final else \
+                min(int(commit[-1]['end'] * SAMPLE_RATE), len(self._buffer))
+            self._buffer = self._buffer[cut:]
+            self._buffer_start += cut
+        elif not segments and len(self._buffer) > self.window:
+            # Nothing but silence for a whole window; keep only the tail
+            cut = len(self._buffer) - int(self.margin * SAMPLE_RATE)
+            self._buffer = self._buffer[cut:]
+            self._buffer_start += cut
+
+        self.partial = [] if final else \
+            [self._shift(s, offset, buffer_seconds) for s in segments[len(commit):]]
+        if not final:
+            events.append({'type': 'partial', 'segments': self.partial})
+        return events
+
+    @staticmethod
+    def _shift(segment: Dict, offset: float, limit: float) -> Dict:
+        """Move a buffer-relative segment onto the meeting timeline"""
+        return {
+            'start': round(float(offset + min(segment['start'], limit)), 3),
+            'end': round(float(offset + min(segment['end'], limit)), 3),
+            'text': segment['text']
+        }
@@ -0,0 +1,252 @@
+"""
+Schema-constrained JSON summaries: the schema, an incremental parser that
+checks the output while it streams in, local repair of truncated or
+slightly malformed JSON, and a short repair prompt for what can't be fixed
+locally.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Response schema for summaries. Kept to the subset of JSON Schema that
+# Gemini's response_schema, llama.cpp grammars and OpenAI-style json_schema
+# all accept, so the same dict works for every backend. Unknown owners and
+# due dates are empty strings rather than null for the same reason.
+SUMMARY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'summary': {'type': 'string'},
+        'key_decisions': {'type': 'array', 'items': {'type': 'string'}},
+        'action_items': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'task': {'type': 'string'},
+                    'owner': {'type': 'string'},
+                    'due_date': {'type': 'string'}
+                },
+                'required': ['task', 'owner', 'due_date']
+            }
+        }
+    },
+    'required': ['summary', 'key_decisions', 'action_items']
+}
+
+# Characters that may appear outside strings in JSON: structure, numbers,
+# true/false/null and whitespace
+_JSON_CHARS = set('{}[],:-+.0123456789eEtrufalsn \t\r\n')
+
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+
+
+class StructuredOutputError(ValueError):
+    """Model output is not valid JSON for the schema, even after local repair"""
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for a JSON object arriving in chunks.
+
+    Feed it chunks as the model streams them. Text before the first ``{``
+    (a Markdown fence, a preamble) is skipped and text after the object is
+    closed is ignored. Syntax errors outside strings, such as prose or a
+    mismatched bracket, are caught as soon as they arrive, so the caller can
+    stop the stream instead of paying for the rest of a broken response.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.error: Optional[str] = None
+        self._chars: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        # (position, open containers) at each comma between values; the
+        # points truncated output can be cut back to
+        self._cuts: List[Tuple[int, Tuple[str, ...]]] = []
+
+    @property
+    def text(self) -> str:
+        """The JSON received so far"""
+        return ''.join(self._chars)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add a chunk of model output
+
+        Returns:
+            False once the object is complete or broken, i.e. when reading
+            more of the stream is pointless
+        """
+        for ch in chunk:
+            if self.done or self.error:
+                break
+            if not self.started:
+                if ch != '{':
+                    continue
+                self.started = True
+            self._chars.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                elif ch == '\n':
+                    # Raw newlines are invalid JSON but common in model output
+                    self._chars[-1] = '\\n'
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._stack.append(ch)
+            elif ch in '}]':
+                if not self._stack or '{['['}]'.index(ch)] != self._stack[-1]:
+                    self.error = f"unexpected '{ch}' at position {len(self._chars) - 1}"
+                    break
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+            elif ch == ',':
+                self._cuts.append((len(self._chars) - 1, tuple(self._stack)))
+            elif ch not in _JSON_CHARS:
+                self.error = f"unexpected {ch!r} at position {len(self._chars) - 1}"
+        return not (self.done or self.error)
+
+    def finish(self) -> Any:
+        """
+        Parse what was received, repairing it locally if needed
+
+        Truncated output is closed off (open strings and brackets closed,
+        a dangling key or value dropped), trailing commas are removed and
+        anything after a syntax error is cut away.
+
+        Raises:
+            StructuredOutputError: If no usable JSON object can be recovered
+        """
+        if not self.started:
+            raise StructuredOutputError('no JSON object in the response')
+        text = self.text
+        if self.done:
+            try:
+                return json.loads(text)
+            except ValueError:
+                pass
+
+        candidates = []
+        if not self.error:
+            tail = '"' if self._in_string else ''
+            candidates.append(text + tail + self._closing(self._stack))
+        for position, stack in reversed(self._cuts):
+            candidates.append(text[:position] + self._closing(stack))
+        for candidate in candidates:
+            try:
+                return json.loads(_TRAILING_COMMA.sub(r'\1', candidate))
+            except ValueError:
+                continue
+        raise StructuredOutputError(self.error or 'truncated JSON could not be repaired')
+
+    @staticmethod
+    def _closing(stack) -> str:
+        return ''.join('}' if ch == '{' else ']' for ch in reversed(stack))
+
+
+def parse_json(text: str) -> Any:
+    """Parse a complete response, with the same local repair as the streaming parser"""
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    return parser.finish()
+
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_text(v) for v in value).strip()
+    return str(value).strip()
+
+
+def format_action_item(item: Dict) -> str:
+    """Render an action item as one line, e.g. 'Send the contract (owner: Ana, due: Friday)'"""
+    details = []
+    if item.get('owner'):
+        details.append(f"owner: {item['owner']}")
+    if item.get('due_date'):
+        details.append(f"due: {item['due_date']}")
+    return f"{item['task']} ({', '.join(details)})" if details else item['task']
+
+
+def normalize_summary(data: Any) -> Dict:
+    """
+    Check parsed JSON against the summary schema and normalize it
+
+    Near misses are accepted: decisions given as objects, action items
+    given as plain strings. Missing fields are not, since they usually mean
+    the object was cut short.
+
+    Returns:
+        summary, key_decisions and action_items (strings, as produced by the
+        text format) plus action_item_details with task, owner and due_date
+
+    Raises:
+        StructuredOutputError: If the data can't be read as a summary
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f'expected an object, got {type(data).__name__}')
+    missing = [key for key in SUMMARY_SCHEMA['required'] if key not in data]
+    if missing:
+        raise StructuredOutputError(f"missing {', '.join(missing)}")
+    summary = _text(data.get('summary'))
+    if not summary:
+        raise StructuredOutputError("empty 'summary'")
+
+    decisions = []
+    for decision in data.get('key_decisions') or []:
+        if isinstance(decision, dict):
+            decision = decision.get('decision') or decision.get('text') or ''
+        decision = _text(decision)
+        if decision:
+            decisions.append(decision)
+
+    details = []
+    for item in data.get('action_items') or []:
+        if isinstance(item, dict):
+            task = _text(item.get('task') or item.get('action') or item.get('description'))
+            owner = _text(item.get('owner') or item.get('assignee')) or None
+            due_date = _text(item.get('due_date') or item.get('due')) or None
+        else:
+            task, owner, due_date = _text(item), None, None
+        if task:
+            details.append({'task': task, 'owner': owner, 'due_date': due_date})
+
+    return {
+        'summary': summary,
+        'key_decisions': decisions,
+        'action_items': [format_action_item(item) for item in details],
+        'action_item_details': details
+    }
+
+
+def build_repair_prompt(response_text: str, error: str, schema: Dict = SUMMARY_SCHEMA) -> str:
+    """
+    Prompt asking the model to fix its own broken JSON
+
+    Only the broken output is sent, not the transcript, so a repair costs
+    a fraction of regenerating the summary.
+    """
+    return f"""
+The JSON below should match this schema but is invalid ({error}).
+Return only the corrected JSON object. Keep the content unchanged; only fix
+the syntax and structure. Use "" for an unknown owner or due_date.
+
+Schema:
+{json.dumps(schema)}
+
+JSON:
+{response_text}
+"""
@@ -0,0 +1,206 @@
+"""
+Summarization backends
+
+A backend is any object with:
+
+* ``name`` and ``model_name`` attributes
+* ``window_tokens`` and ``structured`` (part of the summary cache key)
+* ``summarize_meeting(transcript) -> Dict``
+* ``summarize_segments(segments, previous_windows=None, progress_callback=None,
+  previous_merges=None) -> Dict``
+
+Both methods return summary, key_decisions and action_items.
+SummarizationService is the LLM backend; it talks to Gemini, a JSON
+endpoint or a local llama.cpp model, depending on its client.
+ExtractiveSummarizer below needs no model at all.
+"""
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Backends selectable with SUMMARY_BACKEND or ?backend=
+SUMMARY_BACKENDS = ('gemini', 'http', 'llama', 'extractive')
+
+_STOPWORDS = set("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers him his how i if in into is it its itself just let me
+more most my no nor not now of off on once only or other our ours out over own same she
+should so some such than that the their theirs them then there these they this those through
+to too under until up very was we were what when where which while who whom why will with
+would you your yours yeah okay ok um uh like know think really right well going get got
+""".split())
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Phrases that mark a sentence as a decision or an action item
+_DECISION_CUES = re.compile(
+    r"\b(we (have )?decided|decision|agreed|agree to|we('ll| will) go with|let's go with|"
+    r"approved|final(ize|ized)?|settled on|conclusion)\b", re.I)
+_DUE = re.compile(r"\b(?:by|before|until|due) ((?:next |this )?(?:monday|tuesday|wednesday|thursday|"
+                  r"friday|saturday|sunday|tomorrow|tonight|week|month|end of \w+)|"
+                  r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w* \d{1,2})\b", re.I)
+_ACTION_CUES = re.compile(
+    r"\b(action item|follow up|i('ll| will)|you('ll| will)|we('ll| will)|(needs?|has) to|"
+    r"should|by (monday|tuesday|wednesday|thursday|friday|tomorrow|next week|end of)|"
+    r"assign(ed)?|take care of|owner|deadline)\b", re.I)
+# An action item the speaker takes on themselves
+_FIRST_PERSON = re.compile(r"\b(i('ll| will| can| am going to|'m going to)|let me)\b", re.I)
+
+
+def _split_sentences(segments: List[Dict]) -> List[Dict]:
+    """Split segment text into sentences, keeping each one's start time and speaker"""
+    sentences = []
+    for segment in segments:
+        for text in _SENTENCE_SPLIT.split(segment['text'].strip()):
+            text = text.strip()
+            if len(text.split()) >= 4:
+                sentences.append({'text': text, 'start': segment.get('start'),
+                                  'speaker': segment.get('speaker')})
+    return sentences
+
+
+def textrank(sentences: List[str], damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """
+    Score sentences by centrality in their TF-IDF cosine-similarity graph
+
+    The similarity matrix is never built: with L2-normalized rows X, the
+    graph's product with a vector is X @ (X.T @ v), computed in sparse form
+    with bincount. Memory and time per iteration are linear in the
+    number of words, so hour-long transcripts are fine.
+
+    Returns:
+        One score per sentence (higher is more central)
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+
+    vocabulary: Dict[str, int] = {}
+    rows, cols, counts = [], [], []
+    for i, sentence in enumerate(sentences):
+        terms: Dict[int, int] = {}
+        for word in _WORD.findall(sentence.lower()):
+            if word not in _STOPWORDS and len(word) > 2:
+                j = vocabulary.setdefault(word, len(vocabulary))
+                terms[j] = terms.get(j, 0) + 1
+        for j, count in terms.items():
+            rows.append(i)
+            cols.append(j)
+            counts.append(count)
+    if not rows:
+        return np.ones(n) / n
+
+    rows = np.array(rows)
+    cols = np.array(cols)
+    vocab_size = len(vocabulary)
+    document_frequency = np.bincount(cols, minlength=vocab_size)
+    values = np.array(counts, dtype=np.float64) * np.log((1 + n) / (1 + document_frequency[cols]))
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=n))
+    values /= np.maximum(norms[rows], 1e-12)
+    self_similarity = np.bincount(rows, weights=values ** 2, minlength=n)
+
+    def similarity_times(vector):
+        # (X X^T - diag) @ vector, i.e. without self-loops
+        projected = np.bincount(cols, weights=values * vector[rows], minlength=vocab_size)
+        return np.bincount(rows, weights=values * projected[cols], minlength=n) - self_similarity * vector
+
+    degree = similarity_times(np.ones(n))
+    degree[degree <= 0] = 1.0
+    scores = np.ones(n) / n
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * similarity_times(scores / degree)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+class ExtractiveSummarizer:
+    """
+    Offline summarizer that picks the most central sentences (TextRank)
+
+    Decisions and action items are the highest-ranked sentences containing
+    cue phrases ("we decided", "I'll", "by Friday", ...); a due date is
+    taken from phrases like "by Friday". The quality is
+    below an LLM's, but it runs in milliseconds on the CPU and never makes
+    an outbound call, which suits air-gapped deployments.
+    """
+
+    name = 'extractive'
+    model_name = 'textrank'
+    window_tokens = 0
+    structured = False
+
+    def __init__(self, summary_sentences: int = 8, max_items: int = 10):
+        """
+        Args:
+            summary_sentences: Sentences in the summary of a long meeting
+            max_items: Maximum key decisions and action items each
+        """
+        self.summary_sentences = summary_sentences
+        self.max_items = max_items
+
+    def summarize_meeting(self, transcript: str) -> Dict:
+        """Summarize plain transcript text"""
+        return self.summarize_segments([{'start': None, 'text': transcript}])
+
+    def summarize_segments(self, segments: List[Dict],
+                           previous_windows: Optional[List[Dict]] = None,
+                           progress_callback: Optional[Callable[[int, int], None]] = None,
+                           previous_merges: Optional[List[Dict]] = None) -> Dict:
+        """
+        Summarize transcript segments
+
+        ``previous_windows`` and ``previous_merges`` are accepted for
+        interface compatibility; a full pass is cheap enough to not need them.
+        """
+        sentences = _split_sentences(segments)
+        scores = textrank([s['text'] for s in sentences])
+        ranked = sorted(range(len(sentences)), key=lambda i: -scores[i])
+
+        count = min(max(len(sentences) // 20, 3), self.summary_sentences)
+        chosen = self._pick(sentences, ranked, None, set(), count)
+        summary = ' '.join(sentences[i]['text'] for i in sorted(chosen))
+
+        decisions = self._pick(sentences, ranked, _DECISION_CUES, set(), self.max_items)
+        actions = self._pick(sentences, ranked, _ACTION_CUES,
+                             {sentences[i]['text'].lower() for i in decisions}, self.max_items)
+        if progress_callback:
+            progress_callback(1, 1)
+
+        action_items = [sentences[i]['text'] for i in sorted(actions)]
+        speakers = [sentences[i]['speaker'] for i in sorted(actions)]
+        return {
+            'summary': summary,
+            'key_decisions': [sentences[i]['text'] for i in sorted(decisions)],
+            'action_items': action_items,
+            'action_item_details': [self._details(text, speaker)
+                                    for text, speaker in zip(action_items, speakers)],
+            'raw_response': '',
+            'stats': {'sentences': len(sentences), 'calls': 0}
+        }
+
+    @staticmethod
+    def _details(text: str, speaker: Optional[str] = None) -> Dict:
+        # Whoever says "I'll ..." takes the item on; for "you'll" or "we
+        # should" the speaker isn't the owner
+        due = _DUE.search(text)
+        owner = speaker if _FIRST_PERSON.search(text) else None
+        return {'task': text, 'owner': owner, 'due_date': due.group(1) if due else None}
+
+    @staticmethod
+    def _pick(sentences: List[Dict], ranked: List[int], cues, seen: set, limit: int) -> List[int]:
+        """Up to ``limit`` top-ranked sentences matching ``cues``, skipping repeats"""
+        chosen = []
+        for i in ranked:
+            if len(chosen) >= limit:
+                break
+            text = sentences[i]['text'].lower()
+            if text in seen or (cues is not None and not cues.search(text)):
+                continue
+            seen.add(text)
+            chosen.append(i)
+        return chosen
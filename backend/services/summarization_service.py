@@ -1,25 +1,206 @@
 """
 Summarization service using Google Gemini AI for generating meeting summaries
 """
-import google.generativeai as genai
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import hashlib
 import os
+import re
+
+from .llm_client import AsyncLLMClient, GeminiTransport
+from .structured_output import (
+    SUMMARY_SCHEMA, StructuredOutputError, build_repair_prompt, normalize_summary, parse_json
+)
+
+# Bump whenever the prompts or the response parsing change so cached
+# summaries produced by the old prompts are not reused
+PROMPT_VERSION = '3'
+
+# Section headings of the text response format: a line that is only the
+# heading ("## Summary", "**ACTION ITEMS**") or the heading, a colon and the
+# section's first line. "Action items were not discussed." is not a heading.
+_HEADING = re.compile(r'^[#*\s]*(SUMMARY|KEY DECISIONS?|ACTION ITEMS?)\b[*\s]*(?::[*\s]*(.*))?$', re.I)
+
+# Instructions for the JSON response format
+_JSON_FORMAT = """
+Respond with one JSON object and nothing else, in this form:
+
+{
+  "summary": "A comprehensive summary",
+  "key_decisions": ["Decision 1", "Decision 2"],
+  "action_items": [
+    {"task": "What needs to be done", "owner": "Who, or empty", "due_date": "When, or empty"}
+  ]
+}
+
+Use empty lists when there are no key decisions or action items.
+"""
+
+# Instructions for the text response format
+_TEXT_FORMAT = """
+Please format your response as follows:
+
+SUMMARY:
+[Provide a comprehensive summary here]
+
+KEY DECISIONS:
+- [Decision 1]
+- [Decision 2]
+...
+
+ACTION ITEMS:
+- [Action item 1]
+- [Action item 2]
+...
+
+If there are no key decisions or action items, explicitly state "None identified."
+"""
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a character estimate
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of prompt tokens in a piece of text"""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def format_segments(segments: List[Dict], separator: str = ' ') -> str:
+    """
+    Transcript text of a list of segments
+
+    Without speaker labels the texts are joined with ``separator``. With
+    them, each change of speaker starts a new line prefixed with the label,
+    e.g. "Speaker 2: I'll send the deck on Friday."
+    """
+    if not any(s.get('speaker') for s in segments):
+        return separator.join(s['text'] for s in segments)
+    lines = []
+    current = None
+    for segment in segments:
+        speaker = segment.get('speaker')
+        if lines and speaker == current:
+            lines[-1] += ' ' + segment['text']
+        else:
+            lines.append(f"{speaker}: {segment['text']}" if speaker else segment['text'])
+            current = speaker
+    return '\n'.join(lines)
+
+
+def split_segments_into_windows(segments: List[Dict], max_tokens: int,
+                                anchors: Optional[Set[int]] = None) -> List[Tuple[int, int]]:
+    """
+    Group consecutive transcript segments into token-budgeted windows
+    
+    Args:
+        segments: Transcript segments with a 'text' field
+        max_tokens: Token budget per window
+        anchors: Segment indices that must start a new window, so windows
+                 from an earlier run keep their exact content
+    
+    Returns:
+        List of (start_index, end_index) pairs, end exclusive
+    """
+    anchors = anchors or set()
+    windows = []
+    start = 0
+    used = 0
+    for i, segment in enumerate(segments):
+        tokens = estimate_tokens(segment['text']) + 1
+        if used and (i in anchors or used + tokens > max_tokens):
+            windows.append((start, i))
+            start = i
+            used = 0
+        used += tokens
+    if start < len(segments):
+        windows.append((start, len(segments)))
+    return windows
+
+
+def window_anchors(segments: List[Dict], previous_windows: Optional[List[Dict]]) -> Set[int]:
+    """
+    Find where the windows of an earlier run start in an edited transcript
+    
+    Windows are matched by the start time of their first segment, which an
+    edit to the text doesn't change and inserting or removing segments
+    elsewhere doesn't shift. Segments after the end of the last previous
+    window (an appended recording) start a new window, so the old last
+    window is left as it was.
+    
+    Args:
+        segments: Current transcript segments
+        previous_windows: 'windows' from the earlier result
+    
+    Returns:
+        Segment indices that start a window
+    """
+    timed = [w for w in (previous_windows or []) if 'start_time' in w]
+    if not timed:
+        return set()
+    starts = {w['start_time'] for w in timed}
+    last_end = max(w['end_time'] for w in timed)
+    anchors = {i for i, s in enumerate(segments) if round(s.get('start', -1), 3) in starts}
+    tail = next((i for i, s in enumerate(segments) if s.get('start', 0) >= last_end), None)
+    if tail is not None:
+        anchors.add(tail)
+    return anchors
+
+
+def _dedupe(items: List[str], details: Optional[List[Dict]] = None):
+    """
+    Remove duplicate list items, ignoring case, whitespace and punctuation
+
+    When ``details`` (one entry per item) is given, returns the deduplicated
+    items and their details.
+    """
+    seen = set()
+    unique = []
+    kept = []
+    for i, item in enumerate(items):
+        key = ''.join(ch for ch in item.lower() if ch.isalnum())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(item)
+            kept.append(i)
+    if details is None:
+        return unique
+    return unique, [details[i] for i in kept if i < len(details)]
+
 
 class SummarizationService:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, window_tokens: int = 8000, map_workers: int = 4,
+                 client: AsyncLLMClient = None, name: str = 'gemini', structured: bool = True):
         """
         Initialize the summarization service with Google Gemini
         
         Args:
             api_key: Google API key for Gemini
+            window_tokens: Token budget per prompt in map-reduce mode
+            map_workers: Number of windows summarized concurrently
+            client: Shared LLM client; by default a Gemini client with
+                    default limits is created
+            name: Backend name reported with results
+            structured: Ask for schema-constrained JSON instead of the
+                        SUMMARY / KEY DECISIONS / ACTION ITEMS text format
         """
-        self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
-        if not self.api_key:
-            raise ValueError("Google API key is required. Set GOOGLE_API_KEY in .env file")
+        if client is None:
+            self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
+            if not self.api_key:
+                raise ValueError("Google API key is required. Set GOOGLE_API_KEY in .env file")
+            # Use gemini-2.5-flash which is available and fast
+            client = AsyncLLMClient(GeminiTransport(self.api_key, 'gemini-2.5-flash'))
         
-        genai.configure(api_key=self.api_key)
-        # Use gemini-2.5-flash which is available and fast
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.client = client
+        self.name = name
+        self.model_name = client.model_name
+        self.window_tokens = window_tokens
+        self.map_workers = max(map_workers, 1)
+        self.structured = structured
     
     def summarize_meeting(self, transcript: str) -> Dict:
         """
@@ -31,8 +212,262 @@ class SummarizationService:
         Returns:
             Dictionary containing summary, key decisions, and action items
         """
+        prompt = self._build_prompt(transcript)
+        
+        try:
+            return self._generate_summary(prompt)
+        except Exception as e:
+            print(f"Error generating summary: {e}")
+            raise
+    
+    def summarize_segments(self, segments: List[Dict],
+                           previous_windows: Optional[List[Dict]] = None,
+                           progress_callback: Optional[Callable[[int, int], None]] = None,
+                           previous_merges: Optional[List[Dict]] = None) -> Dict:
+        """
+        Summarize a transcript of any length with a map-reduce pass
+        
+        Segments are grouped into windows of at most ``window_tokens``. Each
+        window is summarized concurrently (map), then the partial summaries,
+        decisions and action items are merged into one result (reduce). A
+        transcript that fits in one window is summarized with a single call.
+        
+        When the results of an earlier run are passed in, window boundaries
+        are kept where they were, so after an edit or an appended recording
+        only the windows whose text changed and the merges above them are
+        re-run. Hashes also cover the prompt version, model and output
+        format, so results from a different prompt or model are never reused.
+        
+        Args:
+            segments: Transcript segments with a 'text' field and,
+                      after diarization, a 'speaker' field
+            previous_windows: 'windows' from an earlier result; windows whose
+                              text is unchanged are reused instead of re-run
+            progress_callback: Optional callable receiving (windows_done, total_windows)
+            previous_merges: 'merges' from an earlier result, reused likewise
+        
+        Returns:
+            Same dictionary as summarize_meeting plus 'windows', 'merges' and
+            'stats' (how many windows, merges and JSON repairs actually ran)
+        """
+        cached = {w['hash']: w for w in (previous_windows or []) if 'hash' in w}
+        speakers = any(s.get('speaker') for s in segments)
+        anchors = window_anchors(segments, previous_windows)
+        
+        windows = []
+        for start, end in split_segments_into_windows(segments, self.window_tokens, anchors):
+            text = format_segments(segments[start:end])
+            windows.append({
+                'start_index': start,
+                'end_index': end,
+                'start_time': round(segments[start].get('start', 0), 3),
+                'end_time': round(segments[end - 1].get('end', 0), 3),
+                'hash': self._hash(text),
+                'text': text
+            })
+        
+        pending = list({w['hash']: w for w in windows if w['hash'] not in cached}.values())
+        print(f"Map-reduce summary: {len(windows)} windows, {len(pending)} to summarize")
+        
+        if pending:
+            total = len(windows)
+            with ThreadPoolExecutor(max_workers=self.map_workers) as executor:
+                futures = {
+                    executor.submit(self._summarize_window, w['text'], total, speakers): w
+                    for w in pending
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    cached[futures[future]['hash']] = future.result()
+                    if progress_callback:
+                        progress_callback(total - len(pending) + done, total)
+        
+        for window in windows:
+            partial = cached[window['hash']]
+            window.pop('text')
+            window['summary'] = partial['summary']
+            window['key_decisions'] = partial['key_decisions']
+            window['action_items'] = partial['action_items']
+            window['action_item_details'] = partial.get('action_item_details', [])
+        repairs = sum(cached[w['hash']].get('repairs', 0) for w in pending)
+        
+        merges = {m['hash']: m for m in (previous_merges or []) if 'hash' in m}
+        used_merges: Dict[str, Dict] = {}
+        merges_before = len(merges)
+        if len(windows) == 1:
+            result = dict(windows[0])
+            result['raw_response'] = cached[windows[0]['hash']].get('raw_response', '')
+        else:
+            previous_keys = set(merges)
+            result = self._reduce_summaries(windows, merges, used_merges)
+            repairs += sum(m.get('repairs', 0) for key, m in merges.items() if key not in previous_keys)
+        
+        return {
+            'summary': result['summary'],
+            'key_decisions': result['key_decisions'],
+            'action_items': result['action_items'],
+            'action_item_details': result.get('action_item_details', []),
+            'raw_response': result.get('raw_response', ''),
+            'windows': windows,
+            'merges': [
+                {k: m.get(k, []) for k in ('hash', 'summary', 'key_decisions', 'action_items',
+                                           'action_item_details')}
+                for m in used_merges.values()
+            ],
+            'stats': {
+                'windows': len(windows),
+                'windows_summarized': len(pending),
+                'merges': len(used_merges),
+                'merges_run': len(merges) - merges_before,
+                'repairs': repairs,
+                'calls': len(pending) + len(merges) - merges_before + repairs
+            }
+        }
+    
+    def _summarize_window(self, text: str, total_windows: int, speakers: bool = False) -> Dict:
+        """Map step: summarize one window of the transcript"""
+        if total_windows == 1:
+            prompt = self._build_prompt(text, speakers=speakers)
+        else:
+            prompt = self._build_prompt(
+                text,
+                context="The transcript below is one part of a longer meeting. "
+                        "Summarize only this part; it will be merged with the others. ",
+                speakers=speakers
+            )
+        return self._generate_summary(prompt)
+    
+    def _generate_summary(self, prompt: str) -> Dict:
+        """
+        Run a summary prompt and parse the response
+        
+        In structured mode the model is asked for JSON matching
+        SUMMARY_SCHEMA. Output that doesn't parse is repaired locally where
+        possible (truncation, trailing commas, stray text), otherwise by one
+        repair call that resends only the broken output, never the
+        transcript. A model that ignored the schema and answered in the text
+        format is parsed as before.
+        
+        Returns:
+            Parsed summary, with 'repairs' set to the repair calls made
+        """
+        if not self.structured:
+            return self._parse_summary_response(self.client.generate(prompt))
+        
+        response_text = self.client.generate(prompt, schema=SUMMARY_SCHEMA)
+        try:
+            return dict(normalize_summary(parse_json(response_text)),
+                        raw_response=response_text, repairs=0)
+        except StructuredOutputError as e:
+            error = str(e)
+        
+        print(f"Summary JSON invalid ({error}), requesting a repair")
+        repaired_text = self.client.generate(build_repair_prompt(response_text, error),
+                                             schema=SUMMARY_SCHEMA)
+        try:
+            return dict(normalize_summary(parse_json(repaired_text)),
+                        raw_response=repaired_text, repairs=1)
+        except StructuredOutputError as e:
+            result = self._parse_summary_response(response_text)
+            if not result['summary']:
+                raise StructuredOutputError(f"Could not parse summary response: {e}")
+            result['repairs'] = 1
+            return result
+    
+    def _reduce_summaries(self, partials: List[Dict], merges: Dict[str, Dict] = None,
+                          used_merges: Dict[str, Dict] = None) -> Dict:
+        """
+        Reduce step: merge partial summaries into one
+        
+        Partials are merged in groups that fit the token budget, repeating
+        until a single summary remains. Each merge is keyed by the hash of
+        its inputs; a merge found in ``merges`` is reused, and new ones are
+        added to it. ``used_merges`` collects every merge of this tree.
+        """
+        merges = {} if merges is None else merges
+        used_merges = {} if used_merges is None else used_merges
+        while True:
+            groups = [[]]
+            used = 0
+            for partial in partials:
+                tokens = estimate_tokens(self._format_partial(partial, 0))
+                if groups[-1] and used + tokens > self.window_tokens:
+                    groups.append([])
+                    used = 0
+                groups[-1].append(partial)
+                used += tokens
+            if len(groups) == len(partials):
+                # Partials larger than the budget on their own; merge in
+                # pairs so every round still makes progress
+                groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+            
+            keys = [self._merge_key(group) for group in groups]
+            todo = {key: group for key, group in zip(keys, groups)
+                    if len(group) > 1 and key not in merges}
+            with ThreadPoolExecutor(max_workers=self.map_workers) as executor:
+                for key, result in zip(todo, executor.map(self._merge_group, todo.values())):
+                    merges[key] = dict(result, hash=key)
+            
+            merged = []
+            for key, group in zip(keys, groups):
+                if len(group) == 1:
+                    merged.append(group[0])
+                else:
+                    used_merges[key] = merges[key]
+                    merged.append(merges[key])
+            
+            if len(merged) == 1:
+                return merged[0]
+            partials = merged
+    
+    def _hash(self, text: str) -> str:
+        """Hash of a prompt input, tied to the prompt version, model and format"""
+        prompt = f"{PROMPT_VERSION}\n{self.model_name}\n{self._response_format()}\n{text}"
+        return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    
+    def _merge_key(self, group: List[Dict]) -> str:
+        """Hash of the partial summaries a merge is built from"""
+        return self._hash('\n\n'.join(self._format_partial(p, i) for i, p in enumerate(group, 1)))
+    
+    def _merge_group(self, group: List[Dict]) -> Dict:
+        """Merge one group of partial summaries with a single LLM call"""
+        if len(group) == 1:
+            return group[0]
+        
+        parts = '\n\n'.join(self._format_partial(p, i) for i, p in enumerate(group, 1))
         prompt = f"""
-You are an expert meeting analyst. Analyze the following meeting transcript and provide:
+You are an expert meeting analyst. The following are summaries of consecutive
+parts of one meeting, each with the key decisions and action items found in
+that part. Merge them into a single summary of the whole meeting. Combine
+duplicate or overlapping decisions and action items into one entry each.
+
+{parts}
+{self._response_format()}"""
+        result = self._generate_summary(prompt)
+        result['key_decisions'] = _dedupe(result['key_decisions'])
+        result['action_items'], result['action_item_details'] = _dedupe(
+            result['action_items'], result.get('action_item_details', []))
+        return result
+    
+    @staticmethod
+    def _format_partial(partial: Dict, number: int) -> str:
+        """Render a partial summary for the reduce prompt"""
+        decisions = '\n'.join(f"- {d}" for d in partial['key_decisions']) or 'None identified.'
+        actions = '\n'.join(f"- {a}" for a in partial['action_items']) or 'None identified.'
+        return (f"PART {number} SUMMARY:\n{partial['summary']}\n"
+                f"PART {number} KEY DECISIONS:\n{decisions}\n"
+                f"PART {number} ACTION ITEMS:\n{actions}")
+    
+    def _response_format(self) -> str:
+        """Output format instructions for the configured mode"""
+        return _JSON_FORMAT if self.structured else _TEXT_FORMAT
+    
+    def _build_prompt(self, transcript: str, context: str = "", speakers: bool = False) -> str:
+        """Build the summarization prompt for a transcript (or part of one)"""
+        if speakers:
+            context += ("Each line starts with the speaker's label. When an action item's owner "
+                        "isn't named, use the label of the speaker who took it on. ")
+        return f"""
+You are an expert meeting analyst. {context}Analyze the following meeting transcript and provide:
 
 1. A concise summary (2-3 paragraphs) of the meeting
 2. Key decisions made during the meeting
@@ -40,36 +475,7 @@ You are an expert meeting analyst. Analyze the following meeting transcript and
 
 Meeting Transcript:
 {transcript}
-
-Please format your response as follows:
-
-SUMMARY:
-[Provide a comprehensive summary here]
-
-KEY DECISIONS:
-- [Decision 1]
-- [Decision 2]
-...
-
-ACTION ITEMS:
-- [Action item 1]
-- [Action item 2]
-...
-
-If there are no key decisions or action items, explicitly state "None identified."
-"""
-        
-        try:
-            response = self.model.generate_content(prompt)
-            result_text = response.text
-            
-            # Parse the response
-            parsed_result = self._parse_summary_response(result_text)
-            return parsed_result
-            
-        except Exception as e:
-            print(f"Error generating summary: {e}")
-            raise
+{self._response_format()}"""
     
     def _parse_summary_response(self, response_text: str) -> Dict:
         """
@@ -92,36 +498,31 @@ If there are no key decisions or action items, explicitly state "None identified
         for line in lines:
             line = line.strip()
             
-            if 'SUMMARY:' in line.upper():
-                current_section = 'summary'
-                continue
-            elif 'KEY DECISION' in line.upper():
-                current_section = 'decisions'
-                continue
-            elif 'ACTION ITEM' in line.upper():
-                current_section = 'actions'
-                continue
+            # Headings only count at the start of a line, so a sentence that
+            # mentions a "key decision" stays where it is
+            heading = _HEADING.match(line)
+            if heading:
+                name = heading.group(1).upper()
+                current_section = 'summary' if name == 'SUMMARY' else \
+                    'decisions' if name.startswith('KEY') else 'actions'
+                line = (heading.group(2) or '').strip()
             
-            if not line or line.startswith('#'):
+            if not line or line.startswith('#') or line.lower().strip('. ') == 'none identified':
                 continue
             
             if current_section == 'summary':
                 summary_lines.append(line)
             elif current_section == 'decisions':
-                if line.startswith('-') or line.startswith('•') or line.startswith('*'):
-                    key_decisions.append(line.lstrip('-•* '))
-                elif line and not any(x in line.upper() for x in ['ACTION', 'DECISION']):
-                    key_decisions.append(line)
+                key_decisions.append(line.lstrip('-•* '))
             elif current_section == 'actions':
-                if line.startswith('-') or line.startswith('•') or line.startswith('*'):
-                    action_items.append(line.lstrip('-•* '))
-                elif line and not any(x in line.upper() for x in ['ACTION', 'DECISION']):
-                    action_items.append(line)
+                action_items.append(line.lstrip('-•* '))
         
+        action_items = [a for a in action_items if a]
         return {
             'summary': ' '.join(summary_lines).strip(),
             'key_decisions': [d for d in key_decisions if d],
-            'action_items': [a for a in action_items if a],
+            'action_items': action_items,
+            'action_item_details': [{'task': a, 'owner': None, 'due_date': None} for a in action_items],
             'raw_response': response_text
         }
     
@@ -139,8 +540,7 @@ If there are no key decisions or action items, explicitly state "None identified
         full_prompt = f"{custom_prompt}\n\nTranscript:\n{transcript}"
         
         try:
-            response = self.model.generate_content(full_prompt)
-            return response.text
+            return self.client.generate(full_prompt)
         except Exception as e:
             print(f"Error generating custom summary: {e}")
             raise
@@ -0,0 +1,162 @@
+"""
+Speech-to-text engines behind TranscriptionService
+
+An engine is any object with:
+
+* ``name``, ``model_size`` and ``options`` (settings that change the output)
+* ``thread_safe``: whether threads may call ``transcribe`` at once
+* ``transcribe(audio, language=None, **options) -> Dict`` taking 16 kHz
+  float32 samples and returning ``text``, ``segments`` (start, end, text)
+  and ``language``, the shape of openai-whisper's result
+* ``memory_bytes() -> int``
+
+WhisperEngine is the reference PyTorch implementation. FasterWhisperEngine
+runs the same models converted for CTranslate2 with int8 weights, which is
+several times faster per CPU core.
+"""
+import os
+from typing import Dict
+
+# Engines selectable with TRANSCRIPTION_ENGINE
+TRANSCRIPTION_ENGINES = ('whisper', 'faster-whisper')
+
+
+class WhisperEngine:
+    """openai-whisper on PyTorch"""
+
+    name = 'whisper'
+    # Whisper installs per-call hooks on the model while decoding, so
+    # threads sharing one model must take turns
+    thread_safe = False
+
+    def __init__(self, model_size: str = 'base', cpu_threads: int = 0):
+        """
+        Args:
+            model_size: Whisper model size (tiny, base, small, medium, large)
+            cpu_threads: Torch threads; 0 leaves torch's default. Torch has
+                         one thread pool per process, so this affects the
+                         whole process
+        """
+        import whisper
+
+        if cpu_threads:
+            import torch
+            torch.set_num_threads(cpu_threads)
+        self.model_size = model_size
+        self.options = {}
+        self.model = whisper.load_model(model_size)
+
+    def transcribe(self, audio, language: str = None, **options) -> Dict:
+        """Transcribe samples; ``options`` are passed to ``whisper.transcribe``"""
+        options.setdefault('verbose', None)
+        return self.model.transcribe(audio, language=language, task='transcribe', **options)
+
+    def memory_bytes(self) -> int:
+        """Size of the loaded model's weights"""
+        try:
+            return sum(p.numel() * p.element_size() for p in self.model.parameters())
+        except AttributeError:
+            return 0
+
+
+class FasterWhisperEngine:
+    """
+    Whisper on CTranslate2 (the faster-whisper package)
+
+    Weights are quantized to int8 when the model loads, so a model takes
+    about a quarter of its float32 memory and matrix products run on int8
+    kernels. Decoding is greedy with the same temperature fallback as
+    openai-whisper's default, so the two engines choose words the same
+    way; int8 rounding can still change a word here and there.
+    """
+
+    name = 'faster-whisper'
+    thread_safe = True
+
+    def __init__(self, model_size: str = 'base', compute_type: str = 'int8',
+                 cpu_threads: int = 0, workers: int = 1, beam_size: int = 1,
+                 download_root: str = None):
+        """
+        Args:
+            model_size: Whisper model size, or a directory holding a
+                        converted CTranslate2 model
+            compute_type: CTranslate2 compute type (int8, int8_float32,
+                          float32, ...)
+            cpu_threads: Threads per transcription; 0 lets CTranslate2 choose
+            workers: Transcriptions that can run at once from different
+                     threads (each holds its own scratch buffers)
+            beam_size: 1 for greedy decoding like openai-whisper's
+                       default; 5 for beam search like its CLI
+            download_root: Where converted models are cached
+        """
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImportError("The faster-whisper engine requires faster-whisper. "
+                              "Install it with: pip install faster-whisper")
+
+        self.model_size = model_size
+        self.options = {'compute_type': compute_type, 'beam_size': beam_size}
+        self.beam_size = beam_size
+        self.model = WhisperModel(model_size, device='cpu', compute_type=compute_type,
+                                  cpu_threads=cpu_threads, num_workers=max(workers, 1),
+                                  download_root=download_root)
+        self._model_path = model_size if os.path.isdir(model_size) else None
+        self._download_root = download_root
+
+    def transcribe(self, audio, language: str = None, initial_prompt: str = None,
+                   condition_on_previous_text: bool = True, **options) -> Dict:
+        """
+        Transcribe samples into an openai-whisper style result
+
+        ``options`` that only openai-whisper understands (e.g. ``verbose``)
+        are ignored.
+        """
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            task='transcribe',
+            beam_size=self.beam_size,
+            initial_prompt=initial_prompt,
+            condition_on_previous_text=condition_on_previous_text
+        )
+        # The segments are generated lazily while decoding runs
+        segments = [{'start': s.start, 'end': s.end, 'text': s.text} for s in segments]
+        return {
+            'text': ''.join(s['text'] for s in segments),
+            'segments': segments,
+            'language': info.language
+        }
+
+    def memory_bytes(self) -> int:
+        """Size of the model's weights file (the loaded int8 copy is smaller)"""
+        path = self._model_path
+        if path is None:
+            try:
+                from faster_whisper.utils import download_model
+                path = download_model(self.model_size, local_files_only=True,
+                                      cache_dir=self._download_root)
+            except Exception:
+                return 0
+        weights = os.path.join(path, 'model.bin')
+        return os.path.getsize(weights) if os.path.exists(weights) else 0
+
+
+def create_engine(name: str, model_size: str, **options):
+    """
+    Build a transcription engine
+
+    Args:
+        name: One of TRANSCRIPTION_ENGINES
+        model_size: Whisper model size
+        **options: Engine-specific options (see the engine classes)
+
+    Raises:
+        ValueError: If the engine is unknown
+    """
+    if name == 'whisper':
+        return WhisperEngine(model_size, cpu_threads=options.get('cpu_threads', 0))
+    if name == 'faster-whisper':
+        return FasterWhisperEngine(model_size, **options)
+    raise ValueError(f"Unknown transcription engine '{name}'. "
+                     f"Allowed: {', '.join(TRANSCRIPTION_ENGINES)}")
@@ -1,12 +1,37 @@
 """
 Transcription service using OpenAI Whisper (local) for audio-to-text conversion
+
+The Whisper implementation is imported by the selected engine (see
+transcription_engines), so openai-whisper and torch are only needed for
+the default engine.
 """
-import whisper
+import contextlib
+import multiprocessing
 import os
-from typing import Dict
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List
+
+from .audio_chunking import (
+    SAMPLE_RATE, plan_chunks, stitch_segments, init_chunk_worker, transcribe_chunk
+)
+from .audio_decoder import AudioDecoder, load_audio, load_pcm
+from .diarization import Diarizer, assign_speakers
+from .transcription_engines import create_engine
+from .vad import SpeechMap, detect_speech
+
+# Skip the VAD cut when nearly everything is speech; concatenating spans
+# would save little and only add boundaries
+VAD_MAX_SPEECH_RATIO = 0.9
 
 class TranscriptionService:
-    def __init__(self, model_size: str = "base"):
+    def __init__(self, model_size: str = "base", chunk_processes: int = 1,
+                 chunk_seconds: float = 120.0, chunk_overlap_seconds: float = 2.0,
+                 long_audio_threshold: float = 600.0, decoder: AudioDecoder = None,
+                 vad: bool = False, vad_options: Dict = None, diarizer: Diarizer = None,
+                 engine: str = 'whisper', engine_options: Dict = None):
         """
         Initialize the transcription service with Whisper
         
@@ -16,34 +41,144 @@ class TranscriptionService:
                        - base: good balance (recommended)
                        - small: better accuracy
                        - medium/large: best accuracy, slower
+            chunk_processes: Worker processes for long-audio mode (1 disables it)
+            chunk_seconds: Target chunk length in long-audio mode
+            chunk_overlap_seconds: Audio shared by neighbouring chunks
+            long_audio_threshold: Recordings longer than this many seconds
+                                  are transcribed in parallel chunks
+            decoder: Optional shared AudioDecoder; when given, audio is
+                     decoded once to a cached .npy file instead of on
+                     every call
+            vad: Drop non-speech regions before transcription and map the
+                 segment times back onto the original recording
+            vad_options: Keyword arguments for ``detect_speech``
+            diarizer: Optional shared Diarizer; when given, speakers are
+                      found while Whisper runs and every segment gets a
+                      'speaker' label
+            engine: Inference engine, 'whisper' (PyTorch) or
+                    'faster-whisper' (CTranslate2, int8)
+            engine_options: Keyword arguments for the engine
         """
-        print(f"Loading Whisper {model_size} model...")
-        self.model = whisper.load_model(model_size)
+        print(f"Loading Whisper {model_size} model ({engine})...")
+        self._engine_options = engine_options or {}
+        self.engine = create_engine(engine, model_size, **self._engine_options)
         print("Whisper model loaded successfully!")
+        
+        self.model_size = model_size
+        self.chunk_processes = max(chunk_processes, 1)
+        self.chunk_seconds = chunk_seconds
+        self.chunk_overlap_seconds = chunk_overlap_seconds
+        self.long_audio_threshold = long_audio_threshold
+        self.decoder = decoder
+        self.vad = vad
+        self.vad_options = vad_options or {}
+        self.diarizer = diarizer
+        self._chunk_pool = None
+        self._chunk_pool_lock = threading.Lock()
+        self._inference_lock = threading.Lock()
     
-    def transcribe_audio(self, audio_path: str, language: str = None) -> Dict:
+    @property
+    def model_name(self) -> str:
+        """Model size, prefixed with the engine unless it's the default one"""
+        if self.engine.name == 'whisper':
+            return self.model_size
+        return f"{self.engine.name}:{self.model_size}"
+    
+    def _inference(self):
+        """Lock held around a call into an engine that isn't thread-safe"""
+        return contextlib.nullcontext() if self.engine.thread_safe else self._inference_lock
+    
+    def transcribe_audio(self, audio_path: str, language: str = None,
+                         progress_callback: Callable[[int, int], None] = None,
+                         segment_callback: Callable[[List[Dict]], None] = None) -> Dict:
         """
         Transcribe audio file to text
         
+        Recordings longer than ``long_audio_threshold`` are split into
+        chunks and transcribed in parallel when ``chunk_processes`` > 1.
+        With ``vad`` enabled, silence is cut out first and the threshold
+        applies to the remaining speech.
+        
         Args:
             audio_path: Path to the audio file
             language: Optional language code (e.g., 'en', 'es')
+            progress_callback: Optional callable receiving (chunks_done, total_chunks)
+            segment_callback: Optional callable receiving each batch of new
+                              segments, in timeline order, as they are produced
         
         Returns:
-            Dictionary containing transcript and segments
+            Dictionary containing transcript, segments, language and
+            timings (decode, VAD and inference seconds, audio and speech
+            duration); with a diarizer also speakers, and segments carry a
+            'speaker' (segments passed to ``segment_callback`` don't, since
+            they are produced before diarization finishes)
         """
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
         print(f"Transcribing audio file: {audio_path}")
         
+        started = time.perf_counter()
+        timings = {}
+        # Decode once; the samples are reused by whichever path runs below
+        pcm_path = None
+        if self.decoder is not None:
+            pcm_path = self.decoder.decode(audio_path)
+            audio = load_pcm(pcm_path)
+        else:
+            audio = load_audio(audio_path)
+        timings['audio_seconds'] = round(len(audio) / SAMPLE_RATE, 3)
+        timings['decode_seconds'] = round(time.perf_counter() - started, 3)
+        
+        started = time.perf_counter()
+        speech_map = self._speech_map(audio) if self.vad else None
+        if self.vad:
+            timings['vad_seconds'] = round(time.perf_counter() - started, 3)
+        if speech_map is not None:
+            if not speech_map.spans:
+                print("No speech detected")
+                if progress_callback:
+                    progress_callback(1, 1)
+                timings.update(speech_seconds=0.0, inference_seconds=0.0)
+                return {'transcript': '', 'segments': [], 'language': language or 'unknown',
+                        'timings': timings}
+        # Speakers are found on the full recording on the diarizer's thread
+        # while Whisper works on the (possibly shortened) copy
+        diarization = None
+        if self.diarizer is not None:
+            diarization = self.diarizer.submit(audio, speech_map.spans if speech_map else None)
+        if speech_map is not None:
+            audio = speech_map.compress(audio)
+            # Chunk workers would read the uncut file, so hand them samples
+            pcm_path = None
+        duration = len(audio) / SAMPLE_RATE
+        timings['speech_seconds'] = round(duration, 3)
+        
+        started = time.perf_counter()
+        if self.chunk_processes > 1 and duration > self.long_audio_threshold:
+            if speech_map is not None and segment_callback:
+                segment_callback = self._remapping_callback(segment_callback, speech_map)
+            result = self.transcribe_long_audio(audio, language, progress_callback,
+                                                segment_callback, pcm_path=pcm_path)
+            if speech_map is not None:
+                result['segments'] = speech_map.remap_segments(result['segments'])
+            timings['inference_seconds'] = round(time.perf_counter() - started, 3)
+            result['timings'] = timings
+            self._attach_speakers(result, diarization)
+            return result
+        
+        if progress_callback:
+            progress_callback(0, 1)
+        
         # Transcribe with Whisper
-        result = self.model.transcribe(
-            audio_path,
-            language=language,
-            task="transcribe",
-            verbose=False
-        )
+        with self._inference():
+            result = self.engine.transcribe(
+                audio,
+                language=language,
+                verbose=False
+            )
+        if progress_callback:
+            progress_callback(1, 1)
         
         # Extract full transcript
         transcript = result['text'].strip()
@@ -56,13 +191,173 @@ class TranscriptionService:
                 'end': segment['end'],
                 'text': segment['text'].strip()
             })
+        if speech_map is not None:
+            segments = speech_map.remap_segments(segments)
+        if segment_callback and segments:
+            segment_callback(segments)
+        timings['inference_seconds'] = round(time.perf_counter() - started, 3)
+        
+        return self._attach_speakers({
+            'transcript': transcript,
+            'segments': segments,
+            'language': result.get('language', 'unknown'),
+            'timings': timings
+        }, diarization)
+    
+    @staticmethod
+    def _attach_speakers(result: Dict, diarization) -> Dict:
+        """Wait for the diarization Future, if any, and label the segments"""
+        if diarization is None:
+            return result
+        started = time.perf_counter()
+        speakers = diarization.result()
+        result['segments'] = assign_speakers(result['segments'], speakers['turns'])
+        result['speakers'] = speakers['speakers']
+        result['timings']['diarization_seconds'] = speakers['seconds']
+        # Time Whisper spent waiting for the diarizer; zero when it overlapped fully
+        result['timings']['diarization_wait_seconds'] = round(time.perf_counter() - started, 3)
+        return result
+    
+    def memory_bytes(self) -> int:
+        """Size of the loaded model's weights"""
+        return self.engine.memory_bytes()
+    
+    def _speech_map(self, audio) -> SpeechMap:
+        """Run VAD, or return None when there's too little silence to bother"""
+        speech_map = SpeechMap(detect_speech(audio, **self.vad_options), len(audio))
+        print(f"VAD: {speech_map.speech_ratio:.0%} of {len(audio) / SAMPLE_RATE:.0f}s is speech")
+        if speech_map.spans and speech_map.speech_ratio > VAD_MAX_SPEECH_RATIO:
+            return None
+        return speech_map
+    
+    @staticmethod
+    def _remapping_callback(segment_callback, speech_map: SpeechMap):
+        return lambda segments: segment_callback(speech_map.remap_segments(segments))
+    
+    def transcribe_long_audio(self, audio, language: str = None,
+                              progress_callback: Callable[[int, int], None] = None,
+                              segment_callback: Callable[[List[Dict]], None] = None,
+                              pcm_path: str = None) -> Dict:
+        """
+        Transcribe a long recording as overlapping chunks in a process pool
+        
+        Chunk boundaries are placed at the quietest point near every
+        ``chunk_seconds``; each worker process holds its own Whisper model.
+        
+        Args:
+            audio: Path to the audio file or decoded 16 kHz float32 samples
+            language: Optional language code (e.g., 'en', 'es')
+            progress_callback: Optional callable receiving (chunks_done, total_chunks)
+            segment_callback: Optional callable receiving new segments as soon
+                              as every chunk before them has finished
+            pcm_path: Decoded .npy file holding ``audio``; workers then read
+                      their chunk from it instead of receiving the samples
+        
+        Returns:
+            Dictionary containing transcript and segments
+        """
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+        
+        chunks = plan_chunks(
+            audio,
+            chunk_seconds=self.chunk_seconds,
+            overlap_seconds=self.chunk_overlap_seconds
+        )
+        print(f"Long-audio mode: {len(audio) / SAMPLE_RATE:.0f}s in {len(chunks)} chunks "
+              f"across {self.chunk_processes} processes")
+        
+        if progress_callback:
+            progress_callback(0, len(chunks))
+        
+        pool = self._get_chunk_pool()
+        if pcm_path:
+            futures = {
+                pool.submit(transcribe_chunk, pcm_path, language, c['start'], c['end']): i
+                for i, c in enumerate(chunks)
+            }
+        else:
+            futures = {
+                pool.submit(transcribe_chunk, audio[c['start']:c['end']], language): i
+                for i, c in enumerate(chunks)
+            }
+        
+        done = 0
+        ready = 0     # length of the prefix of chunks that have finished
+        emitted = 0   # stitched segments already passed to segment_callback
+        for future in as_completed(futures):
+            chunk = chunks[futures[future]]
+            chunk_result = future.result()
+            chunk['segments'] = chunk_result['segments']
+            chunk['language'] = chunk_result['language']
+            done += 1
+            if progress_callback:
+                progress_callback(done, len(chunks))
+            
+            if segment_callback:
+                while ready < len(chunks) and 'segments' in chunks[ready]:
+                    ready += 1
+                _, stitched = stitch_segments(chunks[:ready])
+                if len(stitched) > emitted:
+                    segment_callback(stitched[emitted:])
+                    emitted = len(stitched)
+        
+        transcript, segments = stitch_segments(chunks)
+        languages = Counter(c['language'] for c in chunks if c.get('language'))
         
         return {
             'transcript': transcript,
             'segments': segments,
+            'language': language or (languages.most_common(1)[0][0] if languages else 'unknown')
+        }
+    
+    def transcribe_samples(self, audio, language: str = None,
+                           initial_prompt: str = None) -> Dict:
+        """
+        Transcribe decoded 16 kHz float32 samples already in memory
+        
+        Used by live transcription, which re-runs Whisper on a short
+        rolling buffer rather than on a file.
+        
+        Args:
+            audio: Mono float32 samples
+            language: Optional language code
+            initial_prompt: Preceding text, to keep wording consistent
+        
+        Returns:
+            Dictionary with segments (relative to the buffer) and language
+        """
+        with self._inference():
+            result = self.engine.transcribe(
+                audio,
+                language=language,
+                initial_prompt=initial_prompt,
+                condition_on_previous_text=False,
+                verbose=None
+            )
+        return {
+            'segments': [
+                {'start': s['start'], 'end': s['end'], 'text': s['text'].strip()}
+                for s in result['segments'] if s['text'].strip()
+            ],
             'language': result.get('language', 'unknown')
         }
     
+    def _get_chunk_pool(self) -> ProcessPoolExecutor:
+        """Lazily start the long-audio process pool"""
+        with self._chunk_pool_lock:
+            if self._chunk_pool is None:
+                # Split the cores between processes so torch doesn't oversubscribe
+                threads = max((os.cpu_count() or 1) // self.chunk_processes, 1)
+                self._chunk_pool = ProcessPoolExecutor(
+                    max_workers=self.chunk_processes,
+                    # fork() after torch has started its thread pools can deadlock
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_chunk_worker,
+                    initargs=(self.model_size, threads, self.engine.name, self._engine_options)
+                )
+            return self._chunk_pool
+    
     def transcribe_with_timestamps(self, audio_path: str) -> str:
         """
         Transcribe audio with formatted timestamps
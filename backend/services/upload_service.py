@@ -0,0 +1,472 @@
+"""
+Streaming upload ingest: spools request bodies to disk in fixed-size chunks
+while hashing and sniffing the audio container, with resumable uploads
+"""
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+CHUNK_SIZE = 1024 * 1024
+SNIFF_BYTES = 64
+
+# Parts accepted in one multipart upload (the file plus a few form fields)
+MAX_FORM_PARTS = 16
+
+
+class UploadError(Exception):
+    """Raised for uploads that are rejected; carries an HTTP status code"""
+
+    def __init__(self, message: str, status_code: int = 400, **details):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+def sniff_audio_format(header: bytes) -> Optional[Dict]:
+    """
+    Identify an audio container from its first bytes
+
+    Args:
+        header: At least the first SNIFF_BYTES of the file
+
+    Returns:
+        Dict with 'format' (file extension) and 'codec' when known, or None
+        if the bytes don't look like a supported audio file
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        codec = None
+        # The fmt chunk normally follows the RIFF header directly
+        if header[12:16] == b'fmt ' and len(header) >= 24:
+            audio_format = struct.unpack('<H', header[20:22])[0]
+            codec = {1: 'pcm', 3: 'pcm_float', 6: 'alaw', 7: 'mulaw',
+                     0xFFFE: 'extensible'}.get(audio_format, f'0x{audio_format:04x}')
+        return {'format': 'wav', 'codec': codec}
+    if header[:4] == b'fLaC':
+        return {'format': 'flac', 'codec': 'flac'}
+    if header[:4] == b'OggS':
+        codec = 'opus' if b'OpusHead' in header else 'vorbis' if b'vorbis' in header else None
+        return {'format': 'ogg', 'codec': codec}
+    if header[:4] == b'\x1a\x45\xdf\xa3':
+        return {'format': 'webm', 'codec': None}
+    if header[4:8] == b'ftyp':
+        return {'format': 'm4a', 'codec': 'aac'}
+    if header[:3] == b'ID3' or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return {'format': 'mp3', 'codec': 'mp3'}
+    return None
+
+
+class StreamingSpool:
+    """
+    Writes a byte stream to disk chunk by chunk, hashing it as it goes.
+
+    Only one chunk is held in memory at a time, so memory use is constant
+    regardless of upload size.
+    """
+
+    def __init__(self, path: str, max_bytes: int, append: bool = False, digest=None,
+                 start: int = 0, header: bytes = b''):
+        """
+        Args:
+            path: Destination file
+            max_bytes: Reject the upload once it grows past this size
+            append: Continue an existing partial file
+            digest: hashlib object already fed with the existing bytes
+            start: Bytes of the upload already stored elsewhere; ``path``
+                   receives the data that follows them
+            header: First bytes of the upload when ``start`` is set
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = os.path.getsize(path) if append and os.path.exists(path) else start
+        self.digest = digest or hashlib.sha256()
+        self.header = header[:SNIFF_BYTES]
+        if append and self.size:
+            with open(path, 'rb') as f:
+                self.header = f.read(SNIFF_BYTES)
+        self._file = open(path, 'ab' if append else 'wb')
+
+    def write_stream(self, stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+        """
+        Copy a stream into the spool
+
+        Args:
+            stream: Readable binary stream (e.g. request.stream)
+            chunk_size: Bytes read per iteration
+
+        Returns:
+            Number of bytes written
+        """
+        written = 0
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            self.write(chunk)
+            written += len(chunk)
+        return written
+
+    def write(self, chunk: bytes):
+        """Append one chunk"""
+        if self.size + len(chunk) > self.max_bytes:
+            raise UploadError(f'File too large. Maximum size is {self.max_bytes} bytes', 413)
+        if len(self.header) < SNIFF_BYTES:
+            self.header += chunk[:SNIFF_BYTES - len(self.header)]
+            # Fail fast on non-audio content instead of minutes later in ffmpeg
+            if len(self.header) >= SNIFF_BYTES and sniff_audio_format(self.header) is None:
+                raise UploadError('File content is not a supported audio format', 415)
+        self._file.write(chunk)
+        self.digest.update(chunk)
+        self.size += len(chunk)
+
+    def close(self) -> Dict:
+        """
+        Flush the file and describe what was received
+
+        Returns:
+            Dict with size, sha256, format and codec
+        """
+        self._file.close()
+        detected = sniff_audio_format(self.header) or {}
+        return {
+            'size': self.size,
+            'sha256': self.digest.hexdigest(),
+            'format': detected.get('format'),
+            'codec': detected.get('codec')
+        }
+
+    def abort(self):
+        """Close and delete the partial file"""
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def spool_stream(stream: BinaryIO, path: str, max_bytes: int) -> Dict:
+    """
+    Stream an upload to ``path`` and return its size, hash and format
+
+    Raises:
+        UploadError: If the upload is too large or not audio
+    """
+    spool = StreamingSpool(path, max_bytes)
+    try:
+        spool.write_stream(stream)
+    except Exception:
+        spool.abort()
+        raise
+    info = spool.close()
+    if info['format'] is None:
+        os.remove(path)
+        raise UploadError('File content is not a supported audio format', 415)
+    return info
+
+
+def spool_multipart(stream: BinaryIO, boundary: bytes, field: str,
+                    destination: Callable[[str], str], max_bytes: int) -> Optional[Dict]:
+    """
+    Stream one file of a multipart/form-data body to disk
+
+    The body is parsed as it is read, so the file is written once, with no
+    temporary copy, and content that isn't audio is rejected as soon as
+    its first bytes arrive.
+
+    Args:
+        stream: The raw request body
+        boundary: Multipart boundary from the Content-Type header
+        field: Name of the file field to keep; other parts are skipped
+        destination: Called with the file's name before any of its data is
+                     written; returns the path to write to, or raises
+                     UploadError to refuse the file
+        max_bytes: Reject the file once it grows past this size
+
+    Returns:
+        Dict with size, sha256, format and codec, or None if the body has
+        no such field
+
+    Raises:
+        UploadError: If the body is malformed, or the file too large or not audio
+    """
+    decoder = MultipartDecoder(boundary, max_parts=MAX_FORM_PARTS)
+    spool = None
+    target = None
+    result = None
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, (Field, File)):
+                    target = None
+                    if isinstance(event, File) and event.name == field and spool is None:
+                        spool = target = StreamingSpool(destination(event.filename or ''), max_bytes)
+                elif isinstance(event, Data) and target is not None:
+                    target.write(event.data)
+                    if not event.more_data:
+                        result = target.close()
+                        target = None
+                        if result['format'] is None:
+                            raise UploadError('File content is not a supported audio format', 415)
+                event = decoder.next_event()
+            if not chunk:
+                break
+    except Exception as e:
+        if spool is not None:
+            spool.abort()
+        if isinstance(e, RequestEntityTooLarge):
+            raise UploadError(f'Too many form parts (maximum {MAX_FORM_PARTS})', 413)
+        if isinstance(e, ValueError):
+            raise UploadError(f'Malformed multipart body: {e}', 400)
+        raise
+    if target is not None:
+        # The body ended inside the file part
+        spool.abort()
+        raise UploadError('Upload incomplete', 400)
+    return result
+
+
+class ResumableUploadManager:
+    """
+    Resumable chunked uploads identified by an upload id and byte offset.
+
+    A client creates an upload, sends chunks with the offset they start at,
+    and after a dropped connection asks for the current offset and resumes
+    from there. Each chunk is kept as its own object in the storage backend
+    under ``.partial/<upload_id>/<offset>``, next to a ``.partial/<upload_id>.json``
+    metadata object, so with shared storage any node can continue or finish
+    an upload, and uploads survive a server restart. The SHA-256 is computed
+    from the stored chunks when the upload is completed.
+    """
+
+    PREFIX = '.partial/'
+
+    def __init__(self, storage, spool_dir: str, max_bytes: int, expire_seconds: int = 24 * 3600):
+        """
+        Args:
+            storage: Storage backend for chunks and metadata (see services.storage)
+            spool_dir: Local directory where a chunk is spooled before it is stored
+            max_bytes: Maximum total size of one upload
+            expire_seconds: Partial uploads untouched for longer are removed
+        """
+        self.storage = storage
+        self.spool_dir = os.path.join(spool_dir, '.spool')
+        self.max_bytes = max_bytes
+        self.expire_seconds = expire_seconds
+        # Serialize chunks of one upload on this node; across nodes a chunk
+        # for an offset that was already stored is rejected or overwritten
+        # with the same bytes
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def _meta_key(self, upload_id: str) -> str:
+        return f"{self.PREFIX}{upload_id}.json"
+
+    def _chunk_prefix(self, upload_id: str) -> str:
+        return f"{self.PREFIX}{upload_id}/"
+
+    def _upload_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def _load_meta(self, upload_id: str) -> Dict:
+        if not upload_id.isalnum():
+            raise UploadError('Upload not found', 404)
+        try:
+            return json.loads(self.storage.get_bytes(self._meta_key(upload_id)))
+        except FileNotFoundError:
+            raise UploadError('Upload not found', 404)
+
+    def _save_meta(self, upload_id: str, meta: Dict):
+        # Rewritten on every chunk, so its modification time tracks activity
+        meta['updated_at'] = time.time()
+        self.storage.put_bytes(self._meta_key(upload_id), json.dumps(meta).encode('utf-8'))
+
+    def _chunks(self, upload_id: str) -> Tuple[List[str], int]:
+        """
+        Stored chunks that continue each other from offset 0
+
+        Returns:
+            (keys in order, bytes received so far)
+        """
+        stored = {}
+        for obj in self.storage.list(self._chunk_prefix(upload_id)):
+            name = obj['key'].rsplit('/', 1)[-1]
+            if name.isdigit():
+                stored[int(name)] = obj
+        keys = []
+        offset = 0
+        while offset in stored and stored[offset]['size'] > 0:
+            keys.append(stored[offset]['key'])
+            offset += stored[offset]['size']
+        return keys, offset
+
+    def _header(self, keys: List[str]) -> bytes:
+        """First SNIFF_BYTES of an upload, which may span several chunks"""
+        header = b''
+        for key in keys:
+            if len(header) >= SNIFF_BYTES:
+                break
+            header += self.storage.get_bytes(key, 0, SNIFF_BYTES - len(header))
+        return header
+
+    def create(self, filename: str, total_size: int = None) -> Dict:
+        """
+        Start a new resumable upload
+
+        Args:
+            filename: Original (already sanitized) file name
+            total_size: Expected size in bytes, if the client knows it
+
+        Returns:
+            Upload status dict
+        """
+        if total_size is not None and total_size > self.max_bytes:
+            raise UploadError(f'File too large. Maximum size is {self.max_bytes} bytes', 413)
+        self.cleanup_expired()
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'total_size': total_size,
+            'created_at': time.time()
+        }
+        self._save_meta(upload_id, meta)
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict:
+        """Current offset of an upload"""
+        meta = self._load_meta(upload_id)
+        _, offset = self._chunks(upload_id)
+        return {
+            'upload_id': upload_id,
+            'filename': meta['filename'],
+            'offset': offset,
+            'total_size': meta.get('total_size')
+        }
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO) -> Dict:
+        """
+        Append a chunk that starts at ``offset``
+
+        The chunk is spooled to a local file and then stored as one object.
+
+        Raises:
+            UploadError: 409 if ``offset`` doesn't match the bytes received so far
+        """
+        with self._upload_lock(upload_id):
+            meta = self._load_meta(upload_id)
+            keys, current = self._chunks(upload_id)
+            if offset != current:
+                raise UploadError('Offset mismatch', 409, offset=current)
+
+            header = self._header(keys)
+            spool_path = os.path.join(self.spool_dir, f"{upload_id}.{uuid.uuid4().hex}")
+            spool = StreamingSpool(spool_path, meta.get('total_size') or self.max_bytes,
+                                   start=offset, header=header)
+            try:
+                spool.write_stream(stream)
+            finally:
+                # Keep whatever arrived before a dropped connection; the
+                # client resumes from the new offset
+                spool.close()
+                try:
+                    if spool.size > offset:
+                        self.storage.put_file(f"{self._chunk_prefix(upload_id)}{offset:016d}",
+                                              spool_path)
+                        self._save_meta(upload_id, meta)
+                finally:
+                    os.remove(spool_path)
+            return self.status(upload_id)
+
+    def complete(self, upload_id: str, dest_dir: str, name: str) -> Dict:
+        """
+        Finish an upload and write it to ``dest_dir``
+
+        Args:
+            upload_id: Upload to finish
+            dest_dir: Directory for the finished file
+            name: File name without extension; the sniffed format is appended
+
+        Returns:
+            Dict with path, filename, size, sha256, format and codec
+        """
+        with self._upload_lock(upload_id):
+            meta = self._load_meta(upload_id)
+            keys, size = self._chunks(upload_id)
+            if meta.get('total_size') is not None and size != meta['total_size']:
+                raise UploadError('Upload incomplete', 409, offset=size)
+
+            detected = sniff_audio_format(self._header(keys))
+            if detected is None:
+                raise UploadError('File content is not a supported audio format', 415)
+
+            # Join the chunks, hashing them on the way
+            digest = hashlib.sha256()
+            dest_path = os.path.join(dest_dir, f"{name}.{detected['format']}")
+            tmp_path = dest_path + '.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for key in keys:
+                        for chunk in self.storage.stream(key):
+                            f.write(chunk)
+                            digest.update(chunk)
+                os.replace(tmp_path, dest_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._delete(upload_id)
+
+        with self._lock:
+            self._locks.pop(upload_id, None)
+        return {
+            'path': dest_path,
+            'filename': meta['filename'],
+            'size': size,
+            'sha256': digest.hexdigest(),
+            'format': detected['format'],
+            'codec': detected['codec']
+        }
+
+    def _delete(self, upload_id: str):
+        """Remove an upload's chunks and metadata"""
+        prefix = self._chunk_prefix(upload_id)
+        for obj in self.storage.list(prefix):
+            self.storage.delete(obj['key'])
+        self.storage.delete(self._meta_key(upload_id))
+        # Local storage leaves the emptied chunk directory behind
+        chunk_dir = self.storage.local_path(prefix.rstrip('/'))
+        if chunk_dir:
+            try:
+                os.rmdir(chunk_dir)
+            except OSError:
+                pass
+
+    def cleanup_expired(self):
+        """Remove partial uploads that have not been touched recently"""
+        cutoff = time.time() - self.expire_seconds
+        for obj in self.storage.list(self.PREFIX):
+            name = obj['key'][len(self.PREFIX):]
+            if name.endswith('.json') and obj['modified'] < cutoff:
+                try:
+                    self._delete(name[:-len('.json')])
+                except OSError:
+                    pass
+        # Spooled chunks orphaned by a crash mid-request
+        for name in os.listdir(self.spool_dir):
+            path = os.path.join(self.spool_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
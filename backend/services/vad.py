@@ -0,0 +1,143 @@
+"""
+Energy-based voice activity detection used to skip silence before Whisper
+"""
+import bisect
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .audio_chunking import SAMPLE_RATE, frame_energy
+
+VAD_FRAME_SECONDS = 0.03
+
+# Silence inserted between concatenated speech spans, so Whisper still
+# hears a pause where the cut was made
+JOIN_GAP_SECONDS = 0.2
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                  threshold_db: float = 12.0, min_speech_seconds: float = 0.25,
+                  min_silence_seconds: float = 1.0, padding_seconds: float = 0.3) -> List[Tuple[int, int]]:
+    """
+    Find the regions of a recording that contain speech
+
+    The threshold adapts to the recording: the noise floor is taken as a
+    low percentile of frame energies, and a frame counts as speech when it
+    is ``threshold_db`` above it. Pauses shorter than ``min_silence_seconds``
+    are bridged so sentences aren't cut apart, and every span is padded so
+    soft word onsets and endings are kept.
+
+    Args:
+        audio: Mono float32 samples
+        sample_rate: Sample rate of ``audio``
+        threshold_db: How far above the noise floor speech must be
+        min_speech_seconds: Shorter bursts (clicks, bumps) are ignored
+        min_silence_seconds: Shorter pauses are treated as speech
+        padding_seconds: Audio kept on either side of each span
+
+    Returns:
+        Sorted, non-overlapping (start, end) sample ranges
+    """
+    frame_length = int(VAD_FRAME_SECONDS * sample_rate)
+    energy = frame_energy(audio, frame_length)
+    if len(energy) == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    energy_db = 20 * np.log10(energy + 1e-10)
+    noise_floor = np.percentile(energy_db, 10)
+    # Digital silence makes the floor meaningless, so never go below -60 dBFS
+    threshold = max(noise_floor + threshold_db, -60.0)
+    speech = energy_db > threshold
+
+    # Edges of runs of speech frames
+    padded = np.concatenate(([False], speech, [False])).astype(np.int8)
+    changes = np.flatnonzero(np.diff(padded))
+    runs = list(zip(changes[::2], changes[1::2]))
+
+    min_silence = int(min_silence_seconds / VAD_FRAME_SECONDS)
+    merged: List[List[int]] = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] < min_silence:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    min_speech = int(min_speech_seconds / VAD_FRAME_SECONDS)
+    padding = int(padding_seconds * sample_rate)
+    spans: List[Tuple[int, int]] = []
+    for start, end in merged:
+        if end - start < min_speech:
+            continue
+        start = max(start * frame_length - padding, 0)
+        end = min(end * frame_length + padding, len(audio))
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+class SpeechMap:
+    """
+    Concatenates speech spans and maps times on the shortened audio back
+    onto the original recording.
+    """
+
+    def __init__(self, spans: List[Tuple[int, int]], total_samples: int,
+                 sample_rate: int = SAMPLE_RATE):
+        """
+        Args:
+            spans: Speech (start, end) sample ranges from ``detect_speech``
+            total_samples: Length of the original recording
+            sample_rate: Sample rate of both timelines
+        """
+        self.spans = spans
+        self.total_samples = total_samples
+        self.sample_rate = sample_rate
+        self.gap = int(JOIN_GAP_SECONDS * sample_rate)
+        # Start of each span on the shortened timeline
+        self._offsets = []
+        position = 0
+        for start, end in spans:
+            self._offsets.append(position)
+            position += end - start + self.gap
+
+    @property
+    def speech_samples(self) -> int:
+        return sum(end - start for start, end in self.spans)
+
+    @property
+    def speech_ratio(self) -> float:
+        """Fraction of the recording that is speech"""
+        return self.speech_samples / self.total_samples if self.total_samples else 0.0
+
+    def compress(self, audio: np.ndarray) -> np.ndarray:
+        """Return only the speech spans, joined by short silent gaps"""
+        silence = np.zeros(self.gap, dtype=audio.dtype)
+        parts = []
+        for start, end in self.spans:
+            parts.append(audio[start:end])
+            parts.append(silence)
+        return np.concatenate(parts) if parts else audio[:0]
+
+    def to_original(self, seconds: float) -> float:
+        """
+        Map a time on the shortened audio to the original recording
+
+        Times inside an inserted gap map to the end of the preceding span.
+        """
+        position = seconds * self.sample_rate
+        index = max(bisect.bisect_right(self._offsets, position) - 1, 0)
+        start, end = self.spans[index]
+        original = start + min(position - self._offsets[index], end - start)
+        return float(original / self.sample_rate)
+
+    def remap_segments(self, segments: List[Dict]) -> List[Dict]:
+        """Copy segments with start/end moved onto the original timeline"""
+        remapped = []
+        for segment in segments:
+            segment = dict(segment)
+            segment['start'] = round(self.to_original(segment['start']), 3)
+            segment['end'] = round(max(self.to_original(segment['end']), segment['start']), 3)
+            remapped.append(segment)
+        return remapped
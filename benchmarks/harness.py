@@ -0,0 +1,202 @@
+"""
+Load generation, latency percentiles, peak memory and comparison of
+result files
+"""
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from services import resident_memory_bytes
+
+
+def latency_summary(latencies: List[float]) -> Dict:
+    """Mean, min, max and p50/p95/p99 of a list of durations, in seconds"""
+    if not latencies:
+        return {}
+    values = np.asarray(latencies)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'mean': round(float(values.mean()), 6),
+        'min': round(float(values.min()), 6),
+        'p50': round(float(p50), 6),
+        'p95': round(float(p95), 6),
+        'p99': round(float(p99), 6),
+        'max': round(float(values.max()), 6)
+    }
+
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Word error rate: (substitutions + deletions + insertions) / reference words
+
+    Both texts are lower-cased and stripped of punctuation first. The edit
+    distance is computed one row at a time with numpy; insertions within a
+    row are resolved with a running minimum, so there's no inner Python
+    loop and hour-long transcripts take seconds.
+    """
+    ref = _WORD.findall(reference.lower())
+    hyp = _WORD.findall(hypothesis.lower())
+    if not ref:
+        return float(len(hyp) > 0)
+    vocabulary = {w: i for i, w in enumerate(set(ref) | set(hyp))}
+    hyp_ids = np.array([vocabulary[w] for w in hyp], dtype=np.int64)
+    positions = np.arange(len(hyp) + 1)
+    row = positions.copy()
+    for word in ref:
+        substitute = row[:-1] + (hyp_ids != vocabulary[word])
+        best = np.concatenate(([row[0] + 1], np.minimum(row[1:] + 1, substitute)))
+        # Insertions: best[j] = min over k <= j of best[k] + (j - k)
+        row = np.minimum.accumulate(best - positions) + positions
+    return round(float(row[-1]) / len(ref), 4)
+
+
+class PeakMemory:
+    """Samples resident memory in a background thread while a block runs"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = resident_memory_bytes()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+def run_load(func: Callable[[int], Optional[Dict]], iterations: int, concurrency: int = 1,
+             warmup: int = 1) -> Dict:
+    """
+    Call ``func(i)`` for i in range(iterations) from ``concurrency`` threads
+
+    ``func`` may return a dict of numbers (e.g. audio seconds processed);
+    they are summed into ``totals``. Failed calls are counted, not timed.
+
+    Returns:
+        iterations, concurrency, errors, wall_seconds, throughput_per_second,
+        latency_seconds (percentiles), peak_rss_bytes and totals
+    """
+    for i in range(warmup):
+        func(-1 - i)
+
+    latencies: List[float] = []
+    totals: Dict[str, float] = {}
+    errors = []
+    lock = threading.Lock()
+
+    def call(i):
+        started = time.perf_counter()
+        try:
+            extra = func(i)
+        except Exception as e:
+            with lock:
+                if not errors:
+                    traceback.print_exc()
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            for key, value in (extra or {}).items():
+                totals[key] = totals.get(key, 0) + value
+
+    with PeakMemory() as memory:
+        started = time.perf_counter()
+        if concurrency <= 1:
+            for i in range(iterations):
+                call(i)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(call, range(iterations)))
+        wall = time.perf_counter() - started
+
+    return {
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'wall_seconds': round(wall, 4),
+        'throughput_per_second': round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        'latency_seconds': latency_summary(latencies),
+        'peak_rss_bytes': memory.peak,
+        'totals': totals
+    }
+
+
+# (path, direction): +1 means higher is worse, -1 means lower is worse.
+# p99 is reported but not compared: with tens of iterations it is one or
+# two samples and mostly noise.
+COMPARED_FIELDS = (
+    (('latency_seconds', 'p50'), 1),
+    (('latency_seconds', 'p95'), 1),
+    (('throughput_per_second',), -1),
+    (('real_time_factor',), 1),
+    (('word_error_rate',), 1),
+    (('peak_rss_bytes',), 1),
+)
+
+
+def _field(result: Dict, path):
+    for key in path:
+        if not isinstance(result, dict):
+            return None
+        result = result.get(key)
+    return result if isinstance(result, (int, float)) else None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.1) -> List[Dict]:
+    """
+    Compare two result files benchmark by benchmark
+
+    Args:
+        current: Results of this run
+        baseline: Results of an earlier run
+        threshold: Relative change counted as a regression (0.1 = 10%)
+
+    Returns:
+        One row per compared value with benchmark, metric, baseline,
+        current, change (relative) and regression (bool)
+    """
+    rows = []
+    for name, result in current.get('benchmarks', {}).items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous is None:
+            continue
+        for path, direction in COMPARED_FIELDS:
+            new, old = _field(result, path), _field(previous, path)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            rows.append({
+                'benchmark': name,
+                'metric': '.'.join(path),
+                'baseline': old,
+                'current': new,
+                'change': round(change, 4),
+                'regression': change * direction > threshold
+            })
+    return rows
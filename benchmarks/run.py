@@ -0,0 +1,176 @@
+"""
+Benchmark suite for the transcribe/summarize pipeline
+
+Runs each suite on synthetic, seeded inputs, so results from two commits on
+the same machine are comparable. Results are written as JSON. With
+``--compare``, the run is checked against an earlier result file and the
+script exits with status 1 when a latency, throughput, real-time factor,
+word error rate or memory figure got worse by more than ``--threshold``.
+
+Suites:
+    parse       summary response parsing (text, JSON, truncated-JSON repair)
+    vad         voice activity detection
+    diarize     speaker diarization
+    storage     meeting store save / load / field read / time-range read
+    summarize   extractive vs LLM summarizer (the LLM is a local fake)
+    http        API endpoints over HTTP against an in-process server
+    transcribe  transcription engines with and without VAD, and their word
+                error rate on a reference recording (needs ffmpeg and model
+                download)
+
+Usage:
+    python benchmarks/run.py --output before.json
+    git checkout my-branch
+    python benchmarks/run.py --output after.json --compare before.json
+
+    python benchmarks/run.py --suites storage,http --iterations 200 --concurrency 8
+    python benchmarks/run.py --suites transcribe --models tiny,base --audio-seconds 60,600 --silence-ratio 0.4
+
+    # Engines side by side on one core: real-time factor and word error rate
+    python benchmarks/run.py --suites transcribe --engines whisper,faster-whisper --threads 1 \\
+        --reference-audio talk.wav --reference-text talk.txt
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, HERE)
+
+from harness import compare  # noqa: E402
+from suites import SUITES  # noqa: E402
+
+DEFAULT_SUITES = 'parse,vad,diarize,storage,summarize,http'
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                              timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> dict:
+    """Where and on what the benchmark ran"""
+    import numpy
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def _number_list(value):
+    return [float(v) for v in value.split(',') if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Unthink pipeline")
+    parser.add_argument('--suites', default=DEFAULT_SUITES,
+                        help=f"Comma-separated suites from: {', '.join(SUITES)} (default: {DEFAULT_SUITES})")
+    parser.add_argument('--iterations', type=int, default=50, help="Calls per benchmark (some suites scale it)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Threads issuing calls at once")
+    parser.add_argument('--audio-seconds', type=_number_list, default=[60.0],
+                        help="Comma-separated lengths of the synthetic recordings")
+    parser.add_argument('--silence-ratio', type=float, default=0.3, help="Share of each recording that is silence")
+    parser.add_argument('--models', default='tiny', help="Whisper sizes for the transcribe suite")
+    parser.add_argument('--engines', default='whisper',
+                        help="Comma-separated transcription engines: whisper, faster-whisper")
+    parser.add_argument('--compute-type', default='int8', help="CTranslate2 compute type for faster-whisper")
+    parser.add_argument('--threads', type=int, default=0,
+                        help="CPU threads per transcription (0 = library default; 1 compares per core)")
+    parser.add_argument('--reference-audio', help="Real recording to measure word error rate on")
+    parser.add_argument('--reference-text', help="Correct transcript of --reference-audio")
+    parser.add_argument('--transcribe-iterations', type=int, default=3)
+    parser.add_argument('--segments', type=int, default=1200,
+                        help="Transcript segments per synthetic meeting (~1200 is an hour and a half)")
+    parser.add_argument('--window-tokens', type=int, default=8000, help="Map-reduce window for the LLM summarizer")
+    parser.add_argument('--llm-latency', type=float, default=0.05, help="Response time of the fake LLM, seconds")
+    parser.add_argument('--s3-bucket', help="Run the storage suite against this S3 bucket instead of local disk")
+    parser.add_argument('--s3-endpoint', help="S3-compatible endpoint for --s3-bucket (MinIO, moto_server)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Scratch directory (default: a temporary directory)")
+    parser.add_argument('--output', help="Write results to this JSON file (default: stdout)")
+    parser.add_argument('--compare', help="Earlier result file to check this run against")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Relative change counted as a regression (default 0.1 = 10%%)")
+    parser.add_argument('--verbose', action='store_true', help="Show the services' own log output")
+    args = parser.parse_args(argv)
+    args.models = [m.strip() for m in args.models.split(',') if m.strip()]
+    args.engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    args.suites = [s.strip() for s in args.suites.split(',') if s.strip()]
+    if bool(args.reference_audio) != bool(args.reference_text):
+        parser.error("--reference-audio and --reference-text go together")
+    unknown = [s for s in args.suites if s not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+    return args
+
+
+def print_comparison(rows, threshold: float):
+    regressions = [r for r in rows if r['regression']]
+    print(f"\n{'benchmark':<44} {'metric':<22} {'baseline':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['benchmark']:<44} {row['metric']:<22} {row['baseline']:>12.6g} "
+              f"{row['current']:>12.6g} {row['change']:>+8.1%}{flag}", file=sys.stderr)
+    print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}", file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='unthink-bench-')
+    results = {'environment': environment(), 'config': {
+        k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'workdir', 'verbose')
+    }, 'benchmarks': {}}
+
+    for name in args.suites:
+        print(f"Running {name}...", file=sys.stderr)
+        started = time.perf_counter()
+        log = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+            suite_results = SUITES[name](args, workdir)
+        results['benchmarks'].update(suite_results)
+        for bench, result in suite_results.items():
+            latency = result.get('latency_seconds', {})
+            print(f"  {bench:<44} p50 {latency.get('p50', 0) * 1000:9.2f} ms  "
+                  f"p95 {latency.get('p95', 0) * 1000:9.2f} ms  "
+                  f"{result['throughput_per_second']:9.1f}/s"
+                  + (f"  errors {result['errors']}" if result['errors'] else ''), file=sys.stderr)
+        print(f"  ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if print_comparison(compare(results, baseline, args.threshold), args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
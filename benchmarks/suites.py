@@ -0,0 +1,379 @@
+"""
+Benchmark suites. Each takes the parsed arguments and a scratch directory
+and returns {benchmark name: result}, where a result is what
+``harness.run_load`` reports plus any suite-specific figures.
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import urllib.request
+import uuid
+from http.server import ThreadingHTTPServer
+from typing import Dict, List
+
+from harness import run_load, word_error_rate
+from synthetic_audio import make_wav, synthesize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORDS = ("we need to ship the release before the review next week and the budget "
+          "looks fine but marketing wants another pass on the launch copy so let's "
+          "agree that Sam owns the follow up and I will send the contract by Friday "
+          "the dashboard numbers dropped after the migration which we should check").split()
+
+
+def synthetic_segments(count: int, seed: int = 0, salt: str = '') -> List[Dict]:
+    """
+    Transcript segments of 8-25 words, 3-8 seconds each
+
+    ``salt`` is prepended to the first segment, so callers can make every
+    transcript unique (and defeat caching and request coalescing).
+    """
+    rng = random.Random(seed)
+    segments = []
+    position = 0.0
+    for i in range(count):
+        length = rng.uniform(3, 8)
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 25))]
+        text = ' '.join(words).capitalize() + '.'
+        if i == 0 and salt:
+            text = f"{salt} {text}"
+        segments.append({'start': round(position, 2), 'end': round(position + length, 2), 'text': text})
+        position += length + rng.uniform(0, 1)
+    return segments
+
+
+def _discard(func):
+    """Wrap ``func`` so its return value isn't mistaken for run_load totals"""
+    def call(i):
+        func(i)
+    return call
+
+
+def start_fake_llm(latency: float, jitter: float = 0.0):
+    """Run examples/fake_llm_server.py in this process; returns (server, url)"""
+    sys.path.insert(0, os.path.join(ROOT, 'examples'))
+    from fake_llm_server import FakeLLMHandler
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = 0.0
+    server.malformed_rate = 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/generate"
+
+
+def bench_parse(args, workdir: str) -> Dict:
+    """Summary response parsing: the text format, JSON, and truncated-JSON repair"""
+    from types import SimpleNamespace
+    from services import SummarizationService, StreamingJSONParser, normalize_summary, parse_json
+
+    items = 40
+    text = ("SUMMARY:\n" + ' '.join(_WORDS) * 3 + "\n\nKEY DECISIONS:\n" +
+            ''.join(f"- Decision {i}: {' '.join(_WORDS[:12])}\n" for i in range(items)) +
+            "\nACTION ITEMS:\n" +
+            ''.join(f"- Task {i}: {' '.join(_WORDS[5:20])} (owner: Sam, due: Friday)\n" for i in range(items)))
+    document = json.dumps({
+        'summary': ' '.join(_WORDS) * 3,
+        'key_decisions': [f"Decision {i}: {' '.join(_WORDS[:12])}" for i in range(items)],
+        'action_items': [{'task': f"Task {i}: {' '.join(_WORDS[5:20])}", 'owner': 'Sam', 'due_date': 'Friday'}
+                         for i in range(items)]
+    }, indent=2)
+    truncated = document[:int(len(document) * 0.8)]
+
+    service = SummarizationService(client=SimpleNamespace(model_name='none'), name='bench')
+
+    def repair(_):
+        parser = StreamingJSONParser()
+        parser.feed(truncated)
+        normalize_summary(parser.finish())
+
+    iterations = args.iterations * 20
+    return {
+        'parse.text': run_load(_discard(lambda _: service._parse_summary_response(text)), iterations),
+        'parse.json': run_load(_discard(lambda _: normalize_summary(parse_json(document))), iterations),
+        'parse.json_repair': run_load(repair, iterations)
+    }
+
+
+def bench_vad(args, workdir: str) -> Dict:
+    """Voice activity detection on synthetic audio"""
+    from services import detect_speech
+
+    results = {}
+    for seconds in args.audio_seconds:
+        audio = synthesize(seconds, args.silence_ratio, seed=args.seed)
+
+        def detect(_, audio=audio):
+            detect_speech(audio)
+        result = run_load(detect, max(args.iterations // 5, 3))
+        result['real_time_factor'] = round(result['latency_seconds']['mean'] / seconds, 6)
+        results[f"vad.{seconds:g}s"] = result
+    return results
+
+
+def bench_diarize(args, workdir: str) -> Dict:
+    """Speaker diarization (MFCC embeddings and clustering) on synthetic audio"""
+    from services import Diarizer, detect_speech
+
+    diarizer = Diarizer()
+    results = {}
+    for seconds in args.audio_seconds:
+        audio = synthesize(seconds, args.silence_ratio, seed=args.seed)
+        spans = detect_speech(audio)
+
+        def diarize(_, audio=audio, spans=spans):
+            return {'speakers': len(diarizer.diarize(audio, spans)['speakers'])}
+        result = run_load(diarize, max(args.iterations // 10, 3))
+        result['real_time_factor'] = round(result['latency_seconds']['mean'] / seconds, 6)
+        results[f"diarize.{seconds:g}s"] = result
+    return results
+
+
+def _storage(args, workdir: str):
+    from services import create_storage
+
+    if args.s3_bucket:
+        return create_storage('s3', '', {
+            'bucket': args.s3_bucket,
+            'prefix': f"bench-{uuid.uuid4().hex[:8]}/",
+            'endpoint_url': args.s3_endpoint,
+            'region': None
+        })
+    return create_storage('local', os.path.join(workdir, 'storage'))
+
+
+def bench_storage(args, workdir: str) -> Dict:
+    """Meeting store writes and full, field-only and time-range reads"""
+    from services import MeetingStore
+
+    store = MeetingStore(_storage(args, workdir))
+    segments = synthetic_segments(args.segments, seed=args.seed)
+    base = {'transcript': ' '.join(s['text'] for s in segments), 'summary': ' '.join(_WORDS),
+            'key_decisions': ['Ship on Friday'], 'action_items': ['Send the contract']}
+    meeting_ids = [f"bench_{i}" for i in range(max(args.concurrency, 1) * 4)]
+    for meeting_id in meeting_ids:
+        store.save(meeting_id, dict(base, meeting_id=meeting_id, segments=segments))
+    middle = segments[len(segments) // 2]['start']
+
+    def save(i):
+        # A changed segment forces a new segments file, like a transcript edit
+        meeting_id = meeting_ids[i % len(meeting_ids)]
+        edited = [dict(segments[0], text=f"Edit {i}.")] + segments[1:]
+        store.save(meeting_id, dict(base, meeting_id=meeting_id, segments=edited,
+                                    transcript=' '.join(s['text'] for s in edited)))
+
+    backend = 's3' if args.s3_bucket else 'local'
+    return {
+        f"storage.{backend}.save": run_load(save, args.iterations, args.concurrency),
+        f"storage.{backend}.load": run_load(
+            _discard(lambda i: store.load(meeting_ids[i % len(meeting_ids)])), args.iterations, args.concurrency),
+        f"storage.{backend}.load_fields": run_load(
+            _discard(lambda i: store.load(meeting_ids[i % len(meeting_ids)], fields=['summary', 'action_items'])),
+            args.iterations, args.concurrency),
+        f"storage.{backend}.load_range": run_load(
+            _discard(lambda i: store.load(meeting_ids[i % len(meeting_ids)], fields=['segments'],
+                                          start=middle, end=middle + 60)),
+            args.iterations, args.concurrency)
+    }
+
+
+def bench_summarize(args, workdir: str) -> Dict:
+    """Summarizer backends side by side on the same transcripts (LLM faked)"""
+    from services import AsyncLLMClient, ExtractiveSummarizer, HTTPTransport, SummarizationService
+
+    server, url = start_fake_llm(args.llm_latency)
+    try:
+        client = AsyncLLMClient(HTTPTransport(url, pool_size=args.concurrency * 4),
+                                max_concurrency=args.concurrency * 4)
+        backends = {
+            'extractive': ExtractiveSummarizer(),
+            'http': SummarizationService(client=client, name='http', window_tokens=args.window_tokens),
+            'http_text': SummarizationService(client=client, name='http', window_tokens=args.window_tokens,
+                                              structured=False)
+        }
+        results = {}
+        iterations = max(args.iterations // 5, 3)
+        for name, backend in backends.items():
+            # A different transcript per call, so nothing is shared between calls
+            def summarize(i, backend=backend):
+                segments = synthetic_segments(args.segments, seed=args.seed, salt=f"{name}-{i}")
+                result = backend.summarize_segments(segments)
+                return {'llm_calls': result.get('stats', {}).get('calls', 0)}
+            results[f"summarize.{name}"] = run_load(summarize, iterations, args.concurrency)
+        return results
+    finally:
+        server.shutdown()
+
+
+def _multipart(field: str, filename: str, payload: bytes):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _request(base_url: str, method: str, path: str, body: bytes = None, content_type: str = None) -> Dict:
+    request = urllib.request.Request(base_url + path, data=body, method=method)
+    if content_type:
+        request.add_header('Content-Type', content_type)
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def bench_http(args, workdir: str) -> Dict:
+    """
+    API endpoints over real HTTP against an in-process server, with the
+    summarizer pointed at the fake LLM and all data in a scratch directory
+    """
+    import logging
+    from werkzeug.serving import make_server
+    from config import Config
+
+    llm_server, llm_url = start_fake_llm(args.llm_latency)
+    root = os.path.join(workdir, 'http')
+    shutil.rmtree(root, ignore_errors=True)
+    Config.UPLOAD_FOLDER = os.path.join(root, 'uploads')
+    Config.DECODED_FOLDER = os.path.join(root, 'uploads', '.decoded')
+    Config.DATA_FOLDER = os.path.join(root, 'data')
+    Config.INDEX_DB_PATH = os.path.join(root, 'data', 'meetings.sqlite3')
+    Config.CACHE_FOLDER = os.path.join(root, 'cache')
+    Config.STORAGE_BACKEND = 'local'
+    Config.PRELOAD_MODELS = []
+    Config.LLM_ENDPOINT = llm_url
+    Config.SUMMARY_BACKEND = 'http'
+    import app as backend_app
+
+    # One access-log line per request would dominate the output and the timings
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, backend_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        meeting_ids = []
+        for i in range(20):
+            meeting_id = backend_app.new_meeting_id()
+            segments = synthetic_segments(args.segments // 4, seed=args.seed + i)
+            backend_app.save_result(meeting_id, {
+                'meeting_id': meeting_id, 'timestamp': '2024-01-15T14:30:22',
+                'transcript': ' '.join(s['text'] for s in segments), 'segments': segments, 'language': 'en'
+            })
+            meeting_ids.append(meeting_id)
+
+        audio = open(make_wav(os.path.join(workdir, 'audio'), 30, args.silence_ratio, args.seed), 'rb').read()
+
+        def upload(_):
+            body, content_type = _multipart('audio', 'bench.wav', audio)
+            _request(base_url, 'POST', '/api/upload', body, content_type)
+            return {'bytes': len(audio)}
+
+        def summarize(i):
+            # Changing the transcript misses the summary cache, like a new meeting would
+            meeting_id = meeting_ids[i % len(meeting_ids)]
+            data = backend_app.load_result(meeting_id)
+            data['segments'][0]['text'] = f"Run {i} {uuid.uuid4().hex[:6]}."
+            data['transcript'] = ' '.join(s['text'] for s in data['segments'])
+            backend_app.save_result(meeting_id, data)
+            _request(base_url, 'POST', f'/api/summarize/{meeting_id}')
+
+        def get(path):
+            return _discard(lambda i: _request(base_url, 'GET', path.format(id=meeting_ids[i % len(meeting_ids)])))
+
+        n, c = args.iterations, args.concurrency
+        results = {
+            'http.health': run_load(get('/api/health'), n, c),
+            'http.upload': run_load(upload, n, c),
+            'http.list_meetings': run_load(get('/api/meetings?limit=20'), n, c),
+            'http.get_meeting_fields': run_load(get('/api/meetings/{id}?fields=summary'), n, c),
+            'http.get_meeting': run_load(get('/api/meetings/{id}'), n, c),
+            'http.search': run_load(get('/api/search?q=contract%20friday'), n, c),
+            'http.summarize': run_load(summarize, max(n // 5, 3), c)
+        }
+        upload_result = results['http.upload']
+        upload_result['bytes_per_second'] = round(
+            upload_result['totals'].get('bytes', 0) / max(upload_result['wall_seconds'], 1e-9))
+        return results
+    finally:
+        server.shutdown()
+        llm_server.shutdown()
+
+
+def _engine_options(engine: str, args) -> Dict:
+    if engine == 'faster-whisper':
+        return {'compute_type': args.compute_type, 'beam_size': 1, 'cpu_threads': args.threads}
+    return {'cpu_threads': args.threads}
+
+
+def _transcribe_load(service, path: str, iterations: int) -> Dict:
+    texts = []
+
+    def transcribe(_):
+        result = service.transcribe_audio(path, language='en')
+        texts.append(result['transcript'])
+        timings = result['timings']
+        busy = sum(timings.get(k, 0) for k in ('decode_seconds', 'vad_seconds', 'inference_seconds'))
+        return {'audio_seconds': timings['audio_seconds'], 'busy_seconds': busy}
+
+    result = run_load(transcribe, iterations, 1, warmup=0)
+    totals = result['totals']
+    result['real_time_factor'] = round(
+        totals.get('busy_seconds', 0) / totals['audio_seconds'], 4) if totals.get('audio_seconds') else None
+    result['text'] = texts[-1] if texts else None
+    return result
+
+
+def bench_transcribe(args, workdir: str) -> Dict:
+    """
+    Each engine and Whisper size on synthetic recordings, with and without
+    VAD, plus word error rate on a real recording when --reference-audio
+    and --reference-text are given (needs ffmpeg)
+    """
+    if shutil.which('ffmpeg') is None:
+        print("Skipping transcribe: ffmpeg not found", file=sys.stderr)
+        return {}
+    from services import TranscriptionService
+
+    reference = None
+    if args.reference_audio and args.reference_text:
+        with open(args.reference_text, encoding='utf-8') as f:
+            reference = f.read()
+
+    results = {}
+    for engine in args.engines:
+        # Names without a suffix stay comparable with earlier whisper-only runs
+        engine_suffix = '' if engine == 'whisper' else f".{engine}"
+        options = _engine_options(engine, args)
+        for model_size in args.models:
+            variants = {
+                '': TranscriptionService(model_size=model_size, engine=engine, engine_options=options),
+                '.vad': TranscriptionService(model_size=model_size, vad=True, engine=engine,
+                                             engine_options=options)
+            }
+            for seconds in args.audio_seconds:
+                path = make_wav(os.path.join(workdir, 'audio'), seconds, args.silence_ratio, args.seed)
+                for suffix, service in variants.items():
+                    result = _transcribe_load(service, path, args.transcribe_iterations)
+                    del result['text']
+                    results[f"transcribe.{model_size}.{seconds:g}s{suffix}{engine_suffix}"] = result
+            if reference is not None:
+                result = _transcribe_load(variants[''], args.reference_audio, args.transcribe_iterations)
+                text = result.pop('text')
+                result['word_error_rate'] = word_error_rate(reference, text) if text is not None else None
+                results[f"transcribe.{model_size}.reference{engine_suffix}"] = result
+    return results
+
+
+SUITES = {
+    'parse': bench_parse,
+    'vad': bench_vad,
+    'diarize': bench_diarize,
+    'storage': bench_storage,
+    'summarize': bench_summarize,
+    'http': bench_http,
+    'transcribe': bench_transcribe
+}
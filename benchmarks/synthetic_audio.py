@@ -0,0 +1,97 @@
+"""
+Synthetic meeting audio with a controlled length and share of silence
+
+The "speech" is voiced syllables: harmonic tones at 90-250 Hz with a
+syllable-rate envelope, grouped into utterances and separated by pauses.
+Whisper won't produce meaningful text from it, but it decodes, passes
+through VAD and costs as much inference time as real speech. The
+recordings are deterministic for a given seed, so benchmark runs on
+different commits process the same samples.
+"""
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Background noise level (linear amplitude), roughly -60 dBFS
+NOISE_LEVEL = 0.001
+
+
+def _syllables(rng: np.random.Generator, length: int, sample_rate: int) -> np.ndarray:
+    """One utterance: syllables of 120-300 ms with short gaps between words"""
+    out = np.zeros(length, dtype=np.float32)
+    position = 0
+    f0 = rng.uniform(90, 250)
+    while position < length:
+        size = int(rng.uniform(0.12, 0.3) * sample_rate)
+        end = min(position + size, length)
+        t = np.arange(end - position) / sample_rate
+        pitch = f0 * (1 + 0.05 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        tone = sum(np.sin(k * phase) / k for k in range(1, 6))
+        envelope = np.sin(np.pi * np.arange(end - position) / max(end - position, 1)) ** 2
+        out[position:end] = 0.25 * tone * envelope
+        position = end + int(rng.uniform(0.0, 0.15) * sample_rate)
+    return out
+
+
+def synthesize(duration: float, silence_ratio: float = 0.3, sample_rate: int = SAMPLE_RATE,
+               seed: int = 0) -> np.ndarray:
+    """
+    Generate a mono float32 recording
+
+    Args:
+        duration: Length in seconds
+        silence_ratio: Share of the recording (0-1) that is pauses
+        sample_rate: Sample rate
+        seed: Random seed; the same arguments always give the same samples
+
+    Returns:
+        Samples in [-1, 1]
+    """
+    rng = np.random.default_rng(seed)
+    total = int(duration * sample_rate)
+    audio = (rng.standard_normal(total) * NOISE_LEVEL).astype(np.float32)
+    speech_total = int(total * (1 - min(max(silence_ratio, 0.0), 1.0)))
+    if speech_total <= 0:
+        return audio
+
+    # Utterances of 3-15 s until the speech budget is used up
+    utterances = []
+    remaining = speech_total
+    while remaining > 0:
+        size = min(int(rng.uniform(3, 15) * sample_rate), remaining)
+        utterances.append(size)
+        remaining -= size
+
+    # Split the silence into pauses before, between and after utterances
+    silence_total = total - speech_total
+    weights = rng.dirichlet(np.ones(len(utterances) + 1))
+    pauses = np.floor(weights * silence_total).astype(int)
+
+    position = int(pauses[0])
+    for size, pause in zip(utterances, pauses[1:]):
+        audio[position:position + size] += _syllables(rng, size, sample_rate)
+        position += size + int(pause)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+    """Write samples as 16-bit PCM WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def make_wav(directory: str, duration: float, silence_ratio: float = 0.3, seed: int = 0) -> str:
+    """Write a synthetic recording to ``directory`` (reused if it exists) and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"synthetic_{duration:g}s_{silence_ratio:g}_{seed}.wav")
+    if not os.path.exists(path):
+        write_wav(path, synthesize(duration, silence_ratio, seed=seed))
+    return path
@@ -2,14 +2,20 @@
 Simple command-line interface for Meeting Summarizer
 Useful for quick testing without the web interface
 """
+import argparse
+import glob
 import os
-import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from services import TranscriptionService, SummarizationService
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+AUDIO_EXTENSIONS = {'wav', 'mp3', 'm4a', 'flac', 'ogg', 'webm'}
+
 def print_banner():
     """Print application banner"""
     print("=" * 60)
@@ -17,12 +23,13 @@ def print_banner():
     print("=" * 60)
     print()
 
-def process_audio_file(audio_path):
+def process_audio_file(audio_path, model_size="base"):
     """
     Process an audio file: transcribe and summarize
     
     Args:
         audio_path: Path to the audio file
+        model_size: Whisper model size
     """
     if not os.path.exists(audio_path):
         print(f"Error: File not found: {audio_path}")
@@ -37,7 +44,7 @@ def process_audio_file(audio_path):
     print()
     
     try:
-        transcription_service = TranscriptionService(model_size="base")
+        transcription_service = TranscriptionService(model_size=model_size)
         result = transcription_service.transcribe_audio(audio_path)
         
         transcript = result['transcript']
@@ -140,22 +147,189 @@ def save_results(output_file, transcript, summary_result):
         else:
             f.write("None identified.\n")
 
+def summary_path_for(audio_path):
+    """Path of the summary file written for an audio file"""
+    return audio_path.rsplit('.', 1)[0] + '_summary.txt'
+
+def is_up_to_date(audio_path):
+    """True if the summary file exists and is newer than the audio"""
+    output_file = summary_path_for(audio_path)
+    return os.path.exists(output_file) and \
+        os.path.getmtime(output_file) >= os.path.getmtime(audio_path)
+
+def collect_audio_files(inputs, recursive=False):
+    """
+    Expand files, directories and glob patterns into a sorted list of audio files
+    
+    Args:
+        inputs: Paths, directories or glob patterns
+        recursive: Descend into subdirectories of directory inputs
+    """
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            candidates = glob.glob(pattern, recursive=recursive)
+        else:
+            candidates = glob.glob(item, recursive=True) or [item]
+        for path in candidates:
+            if os.path.isfile(path) and path.rsplit('.', 1)[-1].lower() in AUDIO_EXTENSIONS:
+                files.add(os.path.abspath(path))
+    return sorted(files)
+
+def process_batch(inputs, workers=1, summary_workers=4, model_size="base",
+                  recursive=False, force=False):
+    """
+    Transcribe and summarize many files
+    
+    Each transcription worker loads the Whisper model once and reuses it for
+    every file it handles. Finished transcripts are summarized by a separate
+    pool while later files are still being transcribed. Files whose
+    _summary.txt is newer than the audio are skipped unless ``force`` is set.
+    
+    Args:
+        inputs: Files, directories or glob patterns
+        workers: Concurrent transcription workers (one model each)
+        summary_workers: Concurrent summarization calls
+        model_size: Whisper model size
+        recursive: Descend into subdirectories
+        force: Re-process files even if their summary is up to date
+    """
+    audio_files = collect_audio_files(inputs, recursive)
+    pending = [f for f in audio_files if force or not is_up_to_date(f)]
+    skipped = len(audio_files) - len(pending)
+    
+    print(f"Found {len(audio_files)} audio files, {skipped} already up to date, "
+          f"{len(pending)} to process")
+    print()
+    if not pending:
+        return
+    
+    local = threading.local()
+    print_lock = threading.Lock()
+    stats = {'transcribed': 0, 'summarized': 0, 'failed': 0,
+             'audio_seconds': 0.0, 'transcribe_seconds': 0.0, 'summarize_seconds': 0.0}
+    
+    def log(message):
+        with print_lock:
+            print(message)
+    
+    def transcribe(audio_path):
+        if not hasattr(local, 'service'):
+            local.service = TranscriptionService(model_size=model_size)
+        start = time.time()
+        result = local.service.transcribe_audio(audio_path)
+        elapsed = time.time() - start
+        duration = result['segments'][-1]['end'] if result['segments'] else 0.0
+        return result, duration, elapsed
+    
+    def summarize(audio_path, transcript):
+        start = time.time()
+        summary_result = summarization_service.summarize_meeting(transcript)
+        save_results(summary_path_for(audio_path), transcript, summary_result)
+        return time.time() - start
+    
+    summarization_service = SummarizationService()
+    started = time.time()
+    
+    with ThreadPoolExecutor(max_workers=workers) as transcribe_pool, \
+            ThreadPoolExecutor(max_workers=summary_workers) as summarize_pool:
+        transcribe_futures = {transcribe_pool.submit(transcribe, f): f for f in pending}
+        summarize_futures = {}
+        
+        for future in as_completed(transcribe_futures):
+            audio_path = transcribe_futures[future]
+            try:
+                result, duration, elapsed = future.result()
+            except Exception as e:
+                stats['failed'] += 1
+                log(f"✗ Transcription failed: {audio_path}: {e}")
+                continue
+            
+            stats['transcribed'] += 1
+            stats['audio_seconds'] += duration
+            stats['transcribe_seconds'] += elapsed
+            log(f"✓ Transcribed [{stats['transcribed']}/{len(pending)}] {audio_path} "
+                f"({duration:.0f}s audio in {elapsed:.0f}s)")
+            summarize_futures[summarize_pool.submit(summarize, audio_path, result['transcript'])] = audio_path
+        
+        for future in as_completed(summarize_futures):
+            audio_path = summarize_futures[future]
+            try:
+                stats['summarize_seconds'] += future.result()
+                stats['summarized'] += 1
+                log(f"💾 Summary saved: {summary_path_for(audio_path)}")
+            except Exception as e:
+                stats['failed'] += 1
+                log(f"✗ Summarization failed: {audio_path}: {e}")
+    
+    print_throughput_report(stats, len(audio_files), skipped, time.time() - started)
+
+def print_throughput_report(stats, total_files, skipped, wall_seconds):
+    """Print a summary of a batch run"""
+    audio_hours = stats['audio_seconds'] / 3600
+    print()
+    print("=" * 60)
+    print("BATCH REPORT")
+    print("=" * 60)
+    print(f"Files found:          {total_files}")
+    print(f"Skipped (up to date): {skipped}")
+    print(f"Transcribed:          {stats['transcribed']}")
+    print(f"Summarized:           {stats['summarized']}")
+    print(f"Failed:               {stats['failed']}")
+    print(f"Wall time:            {wall_seconds:.1f}s")
+    print(f"Audio processed:      {audio_hours:.2f} hours")
+    if wall_seconds > 0:
+        print(f"Throughput:           {stats['summarized'] / wall_seconds * 60:.2f} files/min, "
+              f"{stats['audio_seconds'] / wall_seconds:.1f}x real time")
+    if stats['audio_seconds'] > 0:
+        print(f"Transcription RTF:    {stats['transcribe_seconds'] / stats['audio_seconds']:.3f} "
+              f"(worker seconds per audio second)")
+    if stats['summarized']:
+        print(f"Avg summary latency:  {stats['summarize_seconds'] / stats['summarized']:.1f}s")
+    print()
+
 def main():
     """Main CLI function"""
     print_banner()
     
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(
+        description="Transcribe and summarize meeting recordings",
+        epilog="Supported formats: WAV, MP3, M4A, FLAC, OGG, WEBM"
+    )
+    parser.add_argument('inputs', nargs='*', help="Audio file, or with --batch files, directories or globs")
+    parser.add_argument('--batch', action='store_true',
+                        help="Process many files (implied by several inputs, a directory or a glob)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Concurrent transcription workers, each loading the model once (default 1)")
+    parser.add_argument('--summary-workers', type=int, default=4,
+                        help="Concurrent summarization requests (default 4)")
+    parser.add_argument('--model', default="base", help="Whisper model size (default base)")
+    parser.add_argument('--recursive', action='store_true', help="Descend into subdirectories")
+    parser.add_argument('--force', action='store_true', help="Re-process files with an up-to-date summary")
+    args = parser.parse_args()
+    
+    if not args.inputs:
         print("Usage: python cli_tool.py <audio_file>")
+        print("       python cli_tool.py --batch <dir|glob|file> [...] [--workers N]")
         print()
         print("Example:")
         print("  python cli_tool.py meeting.mp3")
+        print("  python cli_tool.py --batch recordings/ --workers 2")
         print()
         print("Supported formats: WAV, MP3, M4A, FLAC, OGG, WEBM")
         print()
         return
     
-    audio_file = sys.argv[1]
-    process_audio_file(audio_file)
+    batch = args.batch or len(args.inputs) > 1 or \
+        os.path.isdir(args.inputs[0]) or glob.has_magic(args.inputs[0])
+    
+    if batch:
+        process_batch(args.inputs, workers=max(args.workers, 1),
+                      summary_workers=max(args.summary_workers, 1),
+                      model_size=args.model, recursive=args.recursive, force=args.force)
+    else:
+        process_audio_file(args.inputs[0], model_size=args.model)
     
     print("=" * 60)
     print("Processing complete! 🎉")
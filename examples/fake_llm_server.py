@@ -0,0 +1,129 @@
+"""
+Fake LLM server for testing and benchmarking summarization offline
+
+Answers POST requests with {"prompt": ...} bodies with a canned summary in
+the format the summarization service parses, after a configurable delay.
+A share of requests can fail with 429/503 to exercise retries. Requests
+with a ``json_schema`` get a JSON summary instead, a share of which can be
+cut short to exercise the repair path.
+
+Usage:
+    python examples/fake_llm_server.py --port 8089 --latency 0.8 --error-rate 0.1 --malformed-rate 0.2
+
+Then start the backend with:
+    LLM_ENDPOINT=http://localhost:8089/generate python app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+stats = {'requests': 0, 'errors': 0, 'malformed': 0, 'concurrent': 0, 'max_concurrent': 0}
+stats_lock = threading.Lock()
+
+
+def fake_summary(prompt):
+    """Build a response in the SUMMARY / KEY DECISIONS / ACTION ITEMS format"""
+    words = prompt.split()
+    return (
+        "SUMMARY:\n"
+        f"The team reviewed progress over a prompt of {len(words)} words "
+        "and agreed on next steps.\n\n"
+        "KEY DECISIONS:\n"
+        "- Proceed with the proposed plan\n\n"
+        "ACTION ITEMS:\n"
+        "- Circulate the notes to the team\n"
+    )
+
+
+def fake_json_summary(prompt, malformed=False):
+    """Build a JSON summary matching the service's schema, optionally truncated"""
+    words = prompt.split()
+    text = json.dumps({
+        'summary': f"The team reviewed progress over a prompt of {len(words)} words "
+                   "and agreed on next steps.",
+        'key_decisions': ['Proceed with the proposed plan'],
+        'action_items': [{'task': 'Circulate the notes to the team', 'owner': 'Alex',
+                          'due_date': 'Friday'}]
+    }, indent=2)
+    if malformed:
+        # Stop mid-object, as a model hitting its token limit would
+        return text[:random.randint(len(text) // 3, len(text) - 2)]
+    return text
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like a real API
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        prompt = body.get('prompt', '')
+
+        with stats_lock:
+            stats['requests'] += 1
+            stats['concurrent'] += 1
+            stats['max_concurrent'] = max(stats['max_concurrent'], stats['concurrent'])
+        try:
+            time.sleep(max(random.gauss(self.server.latency, self.server.jitter), 0))
+            if random.random() < self.server.error_rate:
+                with stats_lock:
+                    stats['errors'] += 1
+                status = random.choice([429, 503])
+                self._send(status, {'error': 'simulated failure'}, {'Retry-After': '0.2'} if status == 429 else {})
+                return
+            if 'json_schema' in body:
+                # Repair prompts always succeed, so one repair call is enough
+                malformed = 'The JSON below' not in prompt and random.random() < self.server.malformed_rate
+                if malformed:
+                    with stats_lock:
+                        stats['malformed'] += 1
+                self._send(200, {'text': fake_json_summary(prompt, malformed)})
+            else:
+                self._send(200, {'text': fake_summary(prompt)})
+        finally:
+            with stats_lock:
+                stats['concurrent'] -= 1
+
+    def do_GET(self):
+        with stats_lock:
+            self._send(200, dict(stats))
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake LLM endpoint for offline tests")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help="Mean response time in seconds")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Standard deviation of the response time")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with 429/503")
+    parser.add_argument('--malformed-rate', type=float, default=0.0,
+                        help="Share of JSON responses cut short")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), FakeLLMHandler)
+    server.latency = args.latency
+    server.jitter = args.jitter
+    server.error_rate = args.error_rate
+    server.malformed_rate = args.malformed_rate
+    print(f"Fake LLM listening on http://127.0.0.1:{args.port}/generate "
+          f"(latency {args.latency}s, error rate {args.error_rate:.0%}); GET / for stats")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -45,8 +45,16 @@ def process_meeting(meeting_id):
     response = requests.post(f"{BASE_URL}/api/process/{meeting_id}")
     
     print(f"Status: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
+    if response.status_code != 202:
+        print(f"Error: {response.text}")
+        return None
+    
+    job_id = response.json()['job_id']
+    print(f"Queued as job {job_id}")
+    job = wait_for_job(job_id)
+    
+    if job.get('status') == 'done':
+        data = job['result']
         print("\n--- Results ---")
         print(f"Meeting ID: {data.get('meeting_id')}")
         print(f"Language: {data.get('language')}")
@@ -60,9 +68,19 @@ def process_meeting(meeting_id):
             print(f"  {i}. {action}")
         return data
     else:
-        print(f"Error: {response.text}")
+        print(f"Error: {job.get('error')}")
         return None
 
+def wait_for_job(job_id, poll_interval=2):
+    """Poll a background job until it is done or failed"""
+    while True:
+        job = requests.get(f"{BASE_URL}/api/jobs/{job_id}").json()
+        if job.get('status') not in ('queued', 'running'):
+            print(f"Job {job_id}: {job.get('status')} {job.get('timings', '')}")
+            return job
+        print(f"  {job['status']} ({job['stage']}) {job['progress'] * 100:.0f}%")
+        time.sleep(poll_interval)
+
 def get_meeting_details(meeting_id):
     """Get details of a specific meeting"""
     print(f"\n=== Getting Meeting Details for {meeting_id} ===")